@@ -29,3 +29,6 @@ from assessments.models import *
 
 admin.site.register(score_sheet_address.ScoreSheetAddress,
                     score_sheet_address.ScoreSheetAddressAdmin)
+
+admin.site.register(score_encoding_progress_counter.ScoreEncodingProgressCounter,
+                    score_encoding_progress_counter.ScoreEncodingProgressCounterAdmin)
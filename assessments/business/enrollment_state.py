@@ -31,9 +31,9 @@ ENROLLED_LATE_COLOR = '#dff0d8'
 NOT_ENROLLED_COLOR = '#f2dede'
 
 
-def get_line_color(enrollment):
+def get_line_color(enrollment, current_session=None):
     if enrollment.enrollment_state == enrollment_states.ENROLLED:
-        current_session = mdl.session_exam_calendar.current_session_exam()
+        current_session = current_session or mdl.session_exam_calendar.current_session_exam()
         if enrollment.date_enrollment \
                 and enrollment.date_enrollment > current_session.academic_calendar.start_date:
             return ENROLLED_LATE_COLOR
@@ -23,12 +23,17 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
-from django.http import HttpResponse
+import itertools
+import tempfile
+from wsgiref.util import FileWrapper
+
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from openpyxl import Workbook
 from openpyxl.styles import Color, Style, PatternFill, Font, colors
 from openpyxl.writer.excel import save_virtual_workbook
+from openpyxl.writer.write_only import WriteOnlyCell
 
 from assessments.business.enrollment_state import get_line_color, ENROLLED_LATE_COLOR, NOT_ENROLLED_COLOR
 from base import models as mdl
@@ -46,6 +51,21 @@ JUSTIFICATION_ALIASES = {
 FIRST_COL_LEGEND_ENROLLMENT_STATUS = 7
 FIRST_ROW_LEGEND_ENROLLMENT_STATUS = 7
 
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+COLUMNS_WIDTH = {'A': 18, 'C': 18, 'E': 18, 'F': 25, 'G': 25, 'H': 30, 'I': 15, 'J': 15, 'K': 15}
+
+# Styles of the streamed export, created once and shared by all its cells
+FILL_NON_EDITABLE = PatternFill(patternType='solid', fgColor=Color('C1C1C1'))
+FILL_ENROLLED_LATE = PatternFill(patternType='solid', fgColor=Color(ENROLLED_LATE_COLOR.lstrip("#")))
+FILL_NOT_ENROLLED = PatternFill(patternType='solid', fgColor=Color(NOT_ENROLLED_COLOR.lstrip("#")))
+FILLS_BY_LINE_COLOR = {ENROLLED_LATE_COLOR: FILL_ENROLLED_LATE, NOT_ENROLLED_COLOR: FILL_NOT_ENROLLED}
+FONT_WARNING = Font(color=colors.RED)
+
+STREAMING_CHUNK_SIZE = 64 * 1024
+# Number of exam enrollments fetched at once when a queryset is exported with .iterator()
+EXPORT_CHUNK_SIZE = 2000
+
 
 def export_xls(exam_enrollments):
     workbook = Workbook()
@@ -90,11 +110,125 @@ def export_xls(exam_enrollments):
     academic_year = lst_exam_enrollments[0].learning_unit_enrollment.learning_unit_year.academic_year
 
     filename = "session_%s_%s_%s.xlsx" % (str(academic_year.year), str(number_session), learn_unit_acronym)
-    response = HttpResponse(save_virtual_workbook(workbook), content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response = HttpResponse(save_virtual_workbook(workbook), content_type=XLSX_CONTENT_TYPE)
     response['Content-Disposition'] = 'attachment; filename=%s' % filename
     return response
 
 
+def export_xls_streaming(exam_enrollments):
+    """
+    Same file as export_xls, written with a write-only workbook: the rows are written to disk while the exam
+    enrollments are iterated (a queryset can be given with .iterator()) and the file is streamed in the response.
+    The exam enrollments must not be empty.
+    """
+    exam_enrollments = iter(exam_enrollments)
+    first_exam_enroll = next(exam_enrollments)
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    for column, width in COLUMNS_WIDTH.items():
+        worksheet.column_dimensions[column].width = width
+    for row in _get_header_and_legend_rows(worksheet, first_exam_enroll):
+        worksheet.append(row)
+
+    current_session = mdl.session_exam_calendar.current_session_exam()
+    for exam_enroll in itertools.chain([first_exam_enroll], exam_enrollments):
+        worksheet.append(_get_exam_enrollment_row(worksheet, exam_enroll, current_session))
+
+    xlsx_file = tempfile.TemporaryFile()
+    workbook.save(xlsx_file)
+    xlsx_file.seek(0)
+
+    response = StreamingHttpResponse(FileWrapper(xlsx_file, STREAMING_CHUNK_SIZE), content_type=XLSX_CONTENT_TYPE)
+    response['Content-Disposition'] = 'attachment; filename=%s' % _get_filename(first_exam_enroll)
+    return response
+
+
+def _get_filename(exam_enroll):
+    return "session_%s_%s_%s.xlsx" % (
+        str(exam_enroll.learning_unit_enrollment.learning_unit_year.academic_year.year),
+        str(exam_enroll.session_exam.number_session),
+        exam_enroll.session_exam.learning_unit_year.acronym
+    )
+
+
+def _get_header_and_legend_rows(worksheet, exam_enroll):
+    """ Rows of _add_header_and_legend_to_file for a write-only worksheet """
+    ue = exam_enroll.learning_unit_enrollment.learning_unit_year
+    date_format = str(_('date_format'))
+    legend_rows = []
+    __display_legends(legend_rows, ue.decimal_scores)
+    legend_rows[0][FIRST_COL_LEGEND_ENROLLMENT_STATUS - 1] = _get_cell(
+        worksheet, legend_rows[0][FIRST_COL_LEGEND_ENROLLMENT_STATUS - 1], fill=FILL_ENROLLED_LATE
+    )
+    legend_rows[1][FIRST_COL_LEGEND_ENROLLMENT_STATUS - 1] = _get_cell(
+        worksheet, legend_rows[1][FIRST_COL_LEGEND_ENROLLMENT_STATUS - 1], fill=FILL_NOT_ENROLLED
+    )
+    legend_rows[3][1] = _get_cell(worksheet, legend_rows[3][1], font=FONT_WARNING)
+
+    return [
+        [str(ue) + " " + ue.complete_title if ue.complete_title else str(ue)],
+        [str('Session: %s' % exam_enroll.session_exam.number_session)],
+        [str('')],
+        [_get_cell(worksheet, str(
+            '%s' % (_("The data presented on this document correspond to the state of the system dated "
+                      "%(printing_date)s and are likely to evolve") % {
+                'printing_date': timezone.now().strftime(date_format)})
+        ), font=FONT_WARNING)],
+        [_get_cell(worksheet, str(_("Students deliberated are not shown")), font=FONT_WARNING)],
+        [str('')],
+        *legend_rows,
+        [str('')],
+        [str(elem) for elem in HEADER],
+    ]
+
+
+def _get_exam_enrollment_row(worksheet, exam_enroll, current_session):
+    """ Row of export_xls for a write-only worksheet """
+    student = exam_enroll.learning_unit_enrollment.student
+    person = student.person
+
+    score = None
+    if exam_enroll.score_final is not None:
+        if exam_enroll.session_exam.learning_unit_year.decimal_scores:
+            score = "{0:.2f}".format(exam_enroll.score_final)
+        else:
+            score = "{0:.0f}".format(exam_enroll.score_final)
+    justification = JUSTIFICATION_ALIASES.get(exam_enroll.justification_final, "")
+
+    values = [str(exam_enroll.learning_unit_enrollment.learning_unit_year.academic_year),
+              str(exam_enroll.session_exam.number_session),
+              exam_enroll.session_exam.learning_unit_year.acronym,
+              exam_enroll.learning_unit_enrollment.offer.acronym,
+              student.registration_id,
+              person.last_name,
+              person.first_name,
+              person.email,
+              score,
+              str(justification),
+              __get_session_exam_deadline(exam_enroll) if exam_enroll.enrollment_state == 'ENROLLED' else '']
+
+    # Same coloring as __coloring_non_editable then _coloring_enrollment_state
+    is_encoded = not (score is None and exam_enroll.justification_final is None)
+    state_fill = FILLS_BY_LINE_COLOR.get(get_line_color(exam_enroll, current_session))
+    row = []
+    for column_number, value in enumerate(values, start=1):
+        fill = state_fill
+        if not fill and (column_number < 9 or column_number > 10 or is_encoded):
+            fill = FILL_NON_EDITABLE
+        row.append(_get_cell(worksheet, value, fill=fill) if fill else value)
+    return row
+
+
+def _get_cell(worksheet, value, fill=None, font=None):
+    cell = WriteOnlyCell(worksheet, value=value)
+    if fill:
+        cell.fill = fill
+    if font:
+        cell.font = font
+    return cell
+
+
 def _add_header_and_legend_to_file(exam_enrollments, worksheet):
     ue = exam_enrollments[0].learning_unit_enrollment.learning_unit_year
     worksheet.append([str(ue) + " " + ue.complete_title if ue.complete_title else str(ue)])
@@ -209,13 +343,7 @@ def justification_other_values():
 
 def __get_session_exam_deadline(exam_enroll):
     date_format = str(_('date_format'))
-    deadline = None
-
-    session_exam_deadline = mdl.exam_enrollment.get_session_exam_deadline(exam_enroll)
-    if session_exam_deadline:
-        deadline = session_exam_deadline.deadline_tutor_computed if session_exam_deadline.deadline_tutor_computed else\
-                   session_exam_deadline.deadline
-
+    deadline = mdl.exam_enrollment.get_deadline(exam_enroll)
     return deadline.strftime(date_format) if deadline else "-"
 
 
@@ -24,20 +24,130 @@
 #
 ##############################################################################
 import copy
+import datetime
 import unicodedata
 from decimal import Decimal, Context, Inexact
 
+from django.contrib.postgres.lookups import Unaccent
+from django.core import signing
 from django.db import transaction
+from django.db.models import CharField, Func, Q, Value
+from django.db.models.functions import Coalesce, Replace, Upper
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from assessments.models import score_encoding_progress_counter
 from base.models import academic_year, session_exam_calendar, exam_enrollment, program_manager, tutor, offer_year, \
     learning_unit_year
 from base.models.enums import exam_enrollment_justification_type
+from base.models.enums import exam_enrollment_state as enrollment_states
+from base.models.exam_enrollment import ExamEnrollment
+
+DEFAULT_PAGE_SIZE = 100
+SORT_KEYS = ('sort_learning_unit_acronym', 'sort_offer_acronym', 'sort_last_name', 'sort_first_name')
+CURSOR_SALT = 'score_encoding_list_page'
+
+SCORE_AND_JUSTIFICATION_FIELDS = (
+    'score_draft', 'justification_draft',
+    'score_reencoded', 'justification_reencoded',
+    'score_final', 'justification_final',
+)
 
 
 def get_scores_encoding_list(user, **kwargs):
     current_academic_year = academic_year.current_academic_year()
     current_number_session = session_exam_calendar.find_session_exam_number()
+    learning_unit_year_id = kwargs.get('learning_unit_year_id')
+    enrollments = _find_enrollments(user, current_academic_year, current_number_session, **kwargs)
+
+    # Append deadline/deadline_tutor for each exam enrollments
+    enrollments = _append_session_exam_deadline(list(enrollments))
+    enrollments = sort_encodings(enrollments)
+
+    return ScoresEncodingList(**{
+        'academic_year': current_academic_year,
+        'number_session': current_number_session,
+        'learning_unit_year': learning_unit_year.get_by_id(learning_unit_year_id) if learning_unit_year_id else None,
+        'enrollments': enrollments
+    })
+
+
+def get_scores_encoding_list_page(user, cursor=None, page_size=DEFAULT_PAGE_SIZE, **kwargs):
+    """
+    Page of get_scores_encoding_list, sorted by the database in the order of sort_encodings.
+    :param cursor: The next_cursor of the previous page (None for the first page)
+    :return: A ScoresEncodingList with the enrollments of the page, the next_cursor (None on the last page) and
+             the enrolled_count of the whole list.
+    """
+    current_academic_year = academic_year.current_academic_year()
+    current_number_session = session_exam_calendar.find_session_exam_number()
+    learning_unit_year_id = kwargs.get('learning_unit_year_id')
+    enrollments = _find_enrollments(user, current_academic_year, current_number_session, **kwargs)
+    enrolled_count = enrollments.filter(enrollment_state=enrollment_states.ENROLLED).count()
+
+    enrollments = order_by_sort_keys(enrollments)
+    if cursor:
+        try:
+            enrollments = enrollments.filter(_get_keyset_filter(signing.loads(cursor, salt=CURSOR_SALT)))
+        except signing.BadSignature:
+            # Tampered or outdated cursor: restart from the first page
+            pass
+    enrollments = list(enrollments[:page_size + 1])
+
+    next_cursor = None
+    if len(enrollments) > page_size:
+        enrollments = enrollments[:page_size]
+        last_enrollment = enrollments[-1]
+        next_cursor = signing.dumps(
+            [getattr(last_enrollment, key) for key in SORT_KEYS] + [last_enrollment.pk],
+            salt=CURSOR_SALT
+        )
+
+    return ScoresEncodingList(**{
+        'academic_year': current_academic_year,
+        'number_session': current_number_session,
+        'learning_unit_year': learning_unit_year.get_by_id(learning_unit_year_id) if learning_unit_year_id else None,
+        'enrollments': _append_session_exam_deadline(enrollments),
+        'next_cursor': next_cursor,
+        'enrolled_count': enrolled_count,
+    })
+
+
+def find_enrollments_to_export(user, learning_unit_year_id):
+    """
+    Exam enrollments of the score sheet export, like get_scores_encoding_list filtered by
+    filter_without_closed_exam_enrollments, as a queryset which can be iterated with .iterator()
+    """
+    enrollments = _find_enrollments(
+        user,
+        academic_year.current_academic_year(),
+        session_exam_calendar.find_session_exam_number(),
+        learning_unit_year_id=learning_unit_year_id
+    )
+    return prepare_enrollments_to_export(enrollments, program_manager.is_program_manager(user))
+
+
+def prepare_enrollments_to_export(enrollments, is_program_manager):
+    """
+    Remove the closed exam enrollments (deadline reached) of a queryset of find_for_score_encodings, then sort it
+    by the database in the order of sort_encodings with the relations used by the export
+    """
+    deadline_field = 'session_exam_deadline_date' if is_program_manager else 'session_exam_deadline_tutor_date'
+    enrollments = enrollments.filter(
+        Q(**{deadline_field + '__isnull': True}) | Q(**{deadline_field + '__gte': datetime.date.today()})
+    ).select_related(
+        'session_exam__learning_unit_year',
+        'learning_unit_enrollment__learning_unit_year__academic_year',
+    )
+    return order_by_sort_keys(enrollments)
+
+
+def order_by_sort_keys(enrollments):
+    """ Sort a queryset of exam enrollments by the database in the order of sort_encodings """
+    return enrollments.annotate(**_get_sort_keys()).order_by(*SORT_KEYS, 'pk')
+
+
+def _find_enrollments(user, current_academic_year, current_number_session, **kwargs):
     is_program_manager = program_manager.is_program_manager(user)
     learning_unit_year_id = kwargs.get('learning_unit_year_id')
     offer_year_id = kwargs.get('offer_year_id')
@@ -77,33 +187,22 @@ def get_scores_encoding_list(user, **kwargs):
     if enrollments_ids:
         enrollments = enrollments.filter(id__in=enrollments_ids)
 
-    # Append deadline/deadline_tutor for each exam enrollments
-    enrollments = _append_session_exam_deadline(list(enrollments))
-    enrollments = sort_encodings(enrollments)
-
-    return ScoresEncodingList(**{
-        'academic_year': current_academic_year,
-        'number_session': current_number_session,
-        'learning_unit_year': learning_unit_year.get_by_id(learning_unit_year_id) if learning_unit_year_id else None,
-        'enrollments': enrollments
-    })
+    return enrollments
 
 
 def _append_session_exam_deadline(enrollments):
+    today = datetime.date.today()
     for enrollment in enrollments:
-        enrollment.deadline = exam_enrollment.get_deadline(enrollment)
-        enrollment.deadline_reached = exam_enrollment.is_deadline_reached(enrollment)
-        enrollment.deadline_tutor_reached = exam_enrollment.is_deadline_tutor_reached(enrollment)
+        deadline, deadline_tutor = exam_enrollment.get_session_exam_deadline_dates(enrollment)
+        enrollment.deadline = deadline_tutor
+        enrollment.deadline_reached = deadline is not None and deadline < today
+        enrollment.deadline_tutor_reached = deadline_tutor is not None and deadline_tutor < today
     return enrollments
 
 
 def filter_without_closed_exam_enrollments(scores_encoding_list, is_program_manager=True):
-    if is_program_manager:
-        scores_encoding_list.enrollments = [enrollment for enrollment in scores_encoding_list.enrollments
-                                            if not exam_enrollment.is_deadline_reached(enrollment)]
-    else:
-        scores_encoding_list.enrollments = [enrollment for enrollment in scores_encoding_list.enrollments
-                                            if not exam_enrollment.is_deadline_tutor_reached(enrollment)]
+    scores_encoding_list.enrollments = [enrollment for enrollment in scores_encoding_list.enrollments
+                                        if not is_deadline_reached(enrollment, is_program_manager)]
     return scores_encoding_list
 
 
@@ -132,36 +231,92 @@ def update_enrollments(scores_encoding_list, user):
     return updated_enrollments
 
 
+def bulk_update_enrollments(scores_encoding_list, user):
+    """ Same as update_enrollments, but all the modified enrollments are saved together (see bulk_save_enrollments) """
+    is_program_manager = program_manager.is_program_manager(user)
+    enrollments_to_update = [get_enrollment_to_update(enrollment, is_program_manager)
+                             for enrollment in scores_encoding_list.enrollments]
+    return bulk_save_enrollments([enrollment for enrollment in enrollments_to_update if enrollment],
+                                 user, is_program_manager)
+
+
 def assign_encoded_to_reencoded_enrollments(scores_encoding_list):
     scores_encoding_list_assigned = []
     for enrollment in scores_encoding_list.enrollments:
         enrollment = clean_score_and_justification(enrollment)
         enrollment.score_reencoded = enrollment.score_encoded
         enrollment.justification_reencoded = enrollment.justification_encoded
-        enrollment.full_clean()
+        # Validation (the relations are not modified by the encoding)
+        enrollment.full_clean(exclude=['session_exam', 'learning_unit_enrollment'])
         scores_encoding_list_assigned.append(enrollment)
 
     scores_encoding_list.enrollments = scores_encoding_list_assigned
     return scores_encoding_list
 
 
+def keep_double_encoding_differences(scores_encoding_list, is_program_manager):
+    """
+    Only keep the enrollments of the list for which the reencoded scores/justifications (see
+    assign_encoded_to_reencoded_enrollments) differ from the first encoding (final for a program manager,
+    draft for a tutor). The comparison is done by the database, the reencoded values are not saved.
+    """
+    different_ids = set(
+        exam_enrollment.find_double_encoding_differences(scores_encoding_list.enrollments, is_program_manager)
+        .values_list('id', flat=True)
+    ) if scores_encoding_list.enrollments else set()
+    scores_encoding_list.enrollments = [enrollment for enrollment in scores_encoding_list.enrollments
+                                        if enrollment.id in different_ids]
+    return scores_encoding_list
+
+
 def update_enrollment(enrollment, user, is_program_manager=None):
     if is_program_manager is None:
         is_program_manager = program_manager.is_program_manager(user)
 
+    enrollment_updated = get_enrollment_to_update(enrollment, is_program_manager)
+    if enrollment_updated:
+        with transaction.atomic():
+            enrollment_updated.save()
+
+            if is_program_manager:
+                exam_enrollment.create_exam_enrollment_historic(user, enrollment_updated)
+    return enrollment_updated
+
+
+def get_enrollment_to_update(enrollment, is_program_manager):
+    """
+    Return a copy of the enrollment with its encoded score and justification set and validated (not saved yet)
+    or None when the enrollment cannot be modified or is unchanged.
+    """
     enrollment = clean_score_and_justification(enrollment)
 
     if can_modify_exam_enrollment(enrollment, is_program_manager) and \
             is_enrollment_changed(enrollment, is_program_manager):
+        return _set_score_and_justification(enrollment, is_program_manager)
+    return None
 
-        with transaction.atomic():
-            enrollment_updated = set_score_and_justification(enrollment, is_program_manager)
 
-            if is_program_manager:
-                exam_enrollment.create_exam_enrollment_historic(user, enrollment)
+def bulk_save_enrollments(enrollments, user, is_program_manager, create_history=None):
+    """
+    Save the enrollments returned by get_enrollment_to_update (and their history for a program manager,
+    or when create_history is set) in a single transaction.
+    """
+    if not enrollments:
+        return enrollments
 
-            return enrollment_updated
-    return None
+    if create_history is None:
+        create_history = is_program_manager
+    now = timezone.now()
+    for enrollment in enrollments:
+        enrollment.changed = now
+
+    with transaction.atomic():
+        ExamEnrollment.objects.bulk_update(enrollments, SCORE_AND_JUSTIFICATION_FIELDS + ('changed',))
+        if create_history:
+            exam_enrollment.bulk_create_exam_enrollment_historic(user, enrollments)
+        # bulk_update does not send the signals which keep the progress counters up to date
+        score_encoding_progress_counter.refresh(enrollment.session_exam_id for enrollment in enrollments)
+    return enrollments
 
 
 def clean_score_and_justification(enrollment):
@@ -229,13 +384,25 @@ def can_modify_exam_enrollment(enrollment, is_program_manager):
 
 
 def is_deadline_reached(enrollment, is_program_manager=True):
+    # The flags are already set on the enrollments of get_scores_encoding_list
     if is_program_manager:
+        if hasattr(enrollment, 'deadline_reached'):
+            return enrollment.deadline_reached
         return exam_enrollment.is_deadline_reached(enrollment)
     else:
+        if hasattr(enrollment, 'deadline_tutor_reached'):
+            return enrollment.deadline_tutor_reached
         return exam_enrollment.is_deadline_tutor_reached(enrollment)
 
 
 def set_score_and_justification(enrollment, is_program_manager):
+    _set_score_and_justification(enrollment, is_program_manager)
+    enrollment.save()
+
+    return enrollment
+
+
+def _set_score_and_justification(enrollment, is_program_manager):
     enrollment.score_reencoded = None
     enrollment.justification_reencoded = None
     enrollment.score_draft = enrollment.score_encoded
@@ -244,9 +411,8 @@ def set_score_and_justification(enrollment, is_program_manager):
         enrollment.score_final = enrollment.score_encoded
         enrollment.justification_final = enrollment.justification_encoded
 
-    #Validation
-    enrollment.full_clean()
-    enrollment.save()
+    #Validation (the relations are not modified by the encoding)
+    enrollment.full_clean(exclude=['session_exam', 'learning_unit_enrollment'])
 
     return enrollment
 
@@ -257,6 +423,9 @@ class ScoresEncodingList:
         self.number_session = kwargs.get('number_session')
         self.learning_unit_year = kwargs.get('learning_unit_year')
         self.enrollments = kwargs.get('enrollments')
+        # Only set for a page (see get_scores_encoding_list_page)
+        self.next_cursor = kwargs.get('next_cursor')
+        self.enrolled_count = kwargs.get('enrolled_count')
 
     @property
     def progress_int(self):
@@ -301,6 +470,41 @@ def sort_encodings(exam_enrollments):
     return sorted(exam_enrollments, key=lambda k: _sort(k))
 
 
+def _get_sort_keys():
+    """
+    Keys of sort_encodings computed by the database (accents and spaces removed, upper case, compared by code point)
+    """
+    student_person = 'learning_unit_enrollment__offer_enrollment__student__person__'
+    return {
+        'sort_learning_unit_acronym': _CollateC(
+            Coalesce('learning_unit_enrollment__learning_unit_year__acronym', Value(''))
+        ),
+        'sort_offer_acronym': _CollateC(
+            Coalesce('learning_unit_enrollment__offer_enrollment__offer_year__acronym', Value(''))
+        ),
+        'sort_last_name': _CollateC(_normalized(student_person + 'last_name')),
+        'sort_first_name': _CollateC(_normalized(student_person + 'first_name')),
+    }
+
+
+def _normalized(field_name):
+    return Upper(Unaccent(Replace(Coalesce(field_name, Value('')), Value(' '), Value(''))))
+
+
+class _CollateC(Func):
+    template = '(%(expressions)s) COLLATE "C"'
+    output_field = CharField()
+
+
+def _get_keyset_filter(cursor_values):
+    """ Enrollments after the cursor, in the order of SORT_KEYS then pk """
+    *sort_values, pk = cursor_values
+    keyset_filter = Q(pk__gt=pk)
+    for key, value in reversed(list(zip(SORT_KEYS, sort_values))):
+        keyset_filter = Q(**{key + '__gt': value}) | (Q(**{key: value}) & keyset_filter)
+    return keyset_filter
+
+
 def _normalize_string(string):
     """
     Remove accents in the string passed in parameter.
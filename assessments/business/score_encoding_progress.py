@@ -23,18 +23,33 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
+from django.db.models import F
+
+from assessments.models import score_encoding_progress_counter
 from attribution.models import attribution
 from base.models import offer_year, exam_enrollment, tutor
 from base.models.offer_year import OfferYear
 
 
 def get_scores_encoding_progress(user, offer_year_id, number_session, academic_year, learning_unit_year_ids=None):
-    queryset = exam_enrollment.get_progress_by_learning_unit_years_and_offer_years(user=user,
-                                                                                   offer_year_id=offer_year_id,
-                                                                                   session_exam_number=number_session,
-                                                                                   academic_year=academic_year,
-                                                                                   learning_unit_year_ids=learning_unit_year_ids,
-                                                                                   only_enrolled=True)
+    # Read the counters maintained with the exam enrollments (only the enrolled students are counted)
+    queryset = score_encoding_progress_counter.search(
+        user=user,
+        offer_year_id=offer_year_id,
+        session_exam_number=number_session,
+        academic_year=academic_year,
+        learning_unit_year_ids=learning_unit_year_ids
+    ).values(
+        'total_exam_enrollments',
+        'exam_enrollments_encoded',
+        'scores_not_yet_submitted',
+        learning_unit_enrollment__learning_unit_year=F('learning_unit_year'),
+        learning_unit_enrollment__learning_unit_year__acronym=F('learning_unit_year__acronym'),
+        learning_unit_enrollment__learning_unit_year__specific_title=F('learning_unit_year__specific_title'),
+        learning_unit_enrollment__learning_unit_year__learning_container_year__common_title=
+        F('learning_unit_year__learning_container_year__common_title'),
+        learning_unit_enrollment__offer_enrollment__offer_year=F('offer_year'),
+    )
 
     return _sort_by_acronym([ScoreEncodingProgress(**row) for row in list(queryset)])
 
@@ -38,6 +38,7 @@ from base.models import entity as entity_model, entity_version as entity_version
 from base.models.enums import exam_enrollment_state as enrollment_states
 from base.models.enums.person_address_type import PersonAddressType
 from base.models.exam_enrollment import justification_label_authorized, get_deadline
+from base.models.learning_unit_year import LearningUnitYear
 
 
 def get_score_sheet_address(off_year):
@@ -51,16 +52,75 @@ def get_score_sheet_address(off_year):
             entity_id = map_offer_year_entity_type_with_entity_id[address.entity_address_choice]
             ent_version = entity_version.get_last_version(entity_id)
             entity = entity_model.get_by_internal_id(entity_id)
-            if not entity:  # Case no address found for this entity
-                entity = entity_model.Entity()
-            email = address.email
-            address = entity
-            address.recipient = '{} - {}'.format(ent_version.acronym, ent_version.title)
-            address.email = email
+            address = _get_entity_address(address, ent_version, entity)
     return {'entity_id_selected': entity_id,
             'address': _get_address_as_dict(address)}
 
 
+def get_score_sheet_addresses(offer_year_ids):
+    """
+    Same as get_score_sheet_address for many offer years, with a fixed number of queries.
+    :return: {<offer_year_id>: <score sheet address>}
+    """
+    addresses = {
+        address.offer_year_id: address
+        for address in score_sheet_address.ScoreSheetAddress.objects.filter(
+            offer_year_id__in=offer_year_ids
+        ).select_related('country')
+    }
+    offer_year_entities = offer_year_entity.OfferYearEntity.objects.filter(
+        offer_year_id__in=[offer_year_id for offer_year_id, address in addresses.items() if not address.customized],
+        type__in=[ENTITY_MANAGEMENT, ENTITY_ADMINISTRATION]
+    )
+    entity_ids_by_offer_year = {}
+    for off_year_entity in offer_year_entities:
+        entity_ids_by_offer_year.setdefault(off_year_entity.offer_year_id, {})[off_year_entity.type] = \
+            off_year_entity.entity_id
+
+    last_versions = _find_last_versions_by_entity_id(
+        entity_id for entity_ids in entity_ids_by_offer_year.values() for entity_id in entity_ids.values()
+    )
+    last_versions.update(_find_last_versions_by_entity_id(
+        version.parent_id for version in last_versions.values() if version.parent_id not in last_versions
+    ))
+    entities = entity_model.Entity.objects.select_related('country').in_bulk(last_versions.keys())
+
+    score_sheet_addresses = {}
+    for offer_year_id in offer_year_ids:
+        address = addresses.get(offer_year_id)
+        entity_id = None
+        if address and not address.customized:
+            entity_ids = entity_ids_by_offer_year[offer_year_id]
+            version_management = last_versions[entity_ids[ENTITY_MANAGEMENT]]
+            version_admin = last_versions[entity_ids[ENTITY_ADMINISTRATION]]
+            entity_id = {
+                ENTITY_MANAGEMENT: version_management.entity_id,
+                ENTITY_MANAGEMENT_PARENT: version_management.parent_id,
+                ENTITY_ADMINISTRATION: version_admin.entity_id,
+                ENTITY_ADMINISTRATION_PARENT: version_admin.parent_id,
+            }[address.entity_address_choice]
+            address = _get_entity_address(address, last_versions[entity_id], entities.get(entity_id))
+        score_sheet_addresses[offer_year_id] = {'entity_id_selected': entity_id,
+                                                'address': _get_address_as_dict(address)}
+    return score_sheet_addresses
+
+
+def _find_last_versions_by_entity_id(entity_ids):
+    """ entity_version.get_last_version of each entity """
+    versions = entity_version.EntityVersion.objects.filter(entity_id__in=set(entity_ids)).order_by('start_date')
+    return {version.entity_id: version for version in versions}
+
+
+def _get_entity_address(address, ent_version, entity):
+    if not entity:  # Case no address found for this entity
+        entity = entity_model.Entity()
+    email = address.email
+    address = entity
+    address.recipient = '{} - {}'.format(ent_version.acronym, ent_version.title)
+    address.email = email
+    return address
+
+
 def _get_address_as_dict(address):
     field_names = ['recipient', 'location', 'postal_code', 'city', 'country', 'phone', 'fax', 'email']
     if address:
@@ -119,6 +179,7 @@ def scores_sheet_data(exam_enrollments, tutor=None):
     # Will contain lists of examEnrollments splitted by learningUnitYear
     enrollments_by_learn_unit = _group_by_learning_unit_year_id(
         exam_enrollments)  # {<learning_unit_year_id> : [<ExamEnrollment>]}
+    related_data = _ScoresSheetRelatedData(enrollments_by_learn_unit)
 
     learning_unit_years = []
     for exam_enrollments in enrollments_by_learn_unit.values():
@@ -126,14 +187,13 @@ def scores_sheet_data(exam_enrollments, tutor=None):
         learn_unit_year_dict = {}
         # We can take the first element of the list 'exam_enrollments' to get the learning_unit_yr
         # because all exam_enrollments have the same learningUnitYear
-        learning_unit_yr = exam_enrollments[0].session_exam.learning_unit_year
-        scores_responsible = attribution.find_responsible(learning_unit_yr.id)
+        learning_unit_yr = related_data.learning_unit_years[exam_enrollments[0].session_exam.learning_unit_year_id]
+        scores_responsible = related_data.scores_responsibles.get(learning_unit_yr.id)
         scores_responsible_address = None
         person = None
         if scores_responsible:
             person = scores_responsible.person
-            scores_responsible_address = person_address.get_by_label(scores_responsible.person,
-                                                                     PersonAddressType.PROFESSIONAL.name)
+            scores_responsible_address = related_data.professional_addresses.get(person.id)
 
         learn_unit_year_dict['academic_year'] = str(learning_unit_yr.academic_year)
 
@@ -167,7 +227,7 @@ def scores_sheet_data(exam_enrollments, tutor=None):
             exam_enrollment = list_enrollments[0]
             off_year = exam_enrollment.learning_unit_enrollment.offer_enrollment.offer_year
             number_session = exam_enrollment.session_exam.number_session
-            deliberation_date = session_exam_calendar.find_deliberation_date(number_session, off_year)
+            deliberation_date = related_data.deliberation_dates[number_session].get(off_year.id)
             if deliberation_date:
                 deliberation_date = deliberation_date.strftime(date_format)
             else:
@@ -175,7 +235,7 @@ def scores_sheet_data(exam_enrollments, tutor=None):
 
             program = {'acronym': exam_enrollment.learning_unit_enrollment.offer_enrollment.offer_year.acronym,
                        'deliberation_date': deliberation_date,
-                       'address': _get_serialized_address(off_year)}
+                       'address': _serialize_address(related_data.score_sheet_addresses[off_year.id])}
             enrollments = []
             for exam_enrol in list_enrollments:
                 student = exam_enrol.learning_unit_enrollment.student
@@ -188,7 +248,7 @@ def scores_sheet_data(exam_enrollments, tutor=None):
                     "justification": _(exam_enrol.get_justification_final_display())
                     if exam_enrol.justification_final else '',
                     "deadline": _get_formatted_deadline(date_format, exam_enrol),
-                    "enrollment_state_color": get_line_color(exam_enrol),
+                    "enrollment_state_color": get_line_color(exam_enrol, related_data.current_session),
                 })
             program['enrollments'] = enrollments
             programs.append(program)
@@ -201,12 +261,65 @@ def scores_sheet_data(exam_enrollments, tutor=None):
 
 
 def _get_serialized_address(off_year):
-    address = get_score_sheet_address(off_year)['address']
+    return _serialize_address(get_score_sheet_address(off_year))
+
+
+def _serialize_address(score_sheet_addr):
+    address = score_sheet_addr['address']
     country = address.get('country')
     address['country'] = country.name if country else ''
     return address
 
 
+class _ScoresSheetRelatedData:
+    """
+    Data of the scores sheets related to the exam enrollments (grouped by learning unit year), loaded with a fixed
+    number of queries whatever the number of learning unit years and offer years.
+    """
+    def __init__(self, enrollments_by_learn_unit):
+        learning_unit_year_ids = list(enrollments_by_learn_unit.keys())
+        offer_year_ids_by_session = {}
+        for exam_enrollments in enrollments_by_learn_unit.values():
+            for exam_enroll in exam_enrollments:
+                offer_year_ids_by_session.setdefault(exam_enroll.session_exam.number_session, set()).add(
+                    exam_enroll.learning_unit_enrollment.offer_enrollment.offer_year_id
+                )
+
+        self.learning_unit_years = LearningUnitYear.objects.select_related(
+            'academic_year', 'learning_container_year'
+        ).in_bulk(learning_unit_year_ids)
+        self.scores_responsibles = self._find_scores_responsibles(learning_unit_year_ids)
+        self.professional_addresses = self._find_professional_addresses(
+            [tutor.person_id for tutor in self.scores_responsibles.values()]
+        )
+        self.deliberation_dates = {
+            nb_session: session_exam_calendar.find_deliberation_dates(nb_session, offer_year_ids)
+            for nb_session, offer_year_ids in offer_year_ids_by_session.items()
+        }
+        self.score_sheet_addresses = get_score_sheet_addresses(
+            set().union(*offer_year_ids_by_session.values())
+        )
+        self.current_session = session_exam_calendar.current_session_exam()
+
+    @staticmethod
+    def _find_scores_responsibles(learning_unit_year_ids):
+        """ attribution.find_responsible of each learning unit year """
+        attributions = attribution.Attribution.objects.filter(
+            learning_unit_year_id__in=learning_unit_year_ids,
+            score_responsible=True
+        ).select_related('tutor__person').order_by('learning_unit_year_id', '-tutor_id')
+        return {att.learning_unit_year_id: att.tutor for att in attributions}
+
+    @staticmethod
+    def _find_professional_addresses(person_ids):
+        """ person_address.get_by_label of each person for the professional address """
+        addresses = person_address.PersonAddress.objects.filter(
+            person_id__in=person_ids,
+            label=PersonAddressType.PROFESSIONAL.name
+        ).order_by('person_id', '-pk')
+        return {address.person_id: address for address in addresses}
+
+
 def _group_by_learning_unit_year_id(exam_enrollments):
     """
     :param exam_enrollments: List of examEnrollments to regroup by earningunitYear.id
@@ -25,7 +25,7 @@
 ##############################################################################
 import django_filters
 from django import forms
-from django.db.models import Q, Prefetch, Value, CharField, OuterRef, Subquery, When, Case
+from django.db.models import Q, Prefetch, Value, CharField, When, Case, F
 from django.db.models.functions import Concat
 from django.utils.translation import gettext_lazy as _
 
@@ -33,7 +33,6 @@ from assessments.business import scores_responsible as business_scores_responsib
 from attribution.models.attribution import Attribution
 from base.business.entity import get_entities_ids
 from base.forms.learning_unit.search.simple import filter_by_entities
-from base.models.entity_version import EntityVersion
 from base.models.learning_unit_year import LearningUnitYear, LearningUnitYearQuerySet
 
 
@@ -120,11 +119,6 @@ class ScoresResponsibleFilter(django_filters.FilterSet):
         )
         queryset = super().filter_queryset(queryset)
 
-        entity_requirement = EntityVersion.objects.filter(
-            entity=OuterRef('learning_container_year__requirement_entity'),
-        ).current(
-            OuterRef('academic_year__start_date')
-        ).values('acronym')[:1]
         queryset = LearningUnitYearQuerySet.annotate_entities_allocation_and_requirement_acronym(queryset)
         return queryset.select_related('learning_container_year').prefetch_related(
             Prefetch(
@@ -136,5 +130,5 @@ class ScoresResponsibleFilter(django_filters.FilterSet):
                 )
             )
         ).annotate(
-            requirement_entity=Subquery(entity_requirement)
+            requirement_entity=F('entity_requirement')
         )
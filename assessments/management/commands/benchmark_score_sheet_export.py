@@ -0,0 +1,118 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+import datetime
+import time
+import tracemalloc
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assessments.business import score_encoding_export, score_encoding_list
+from base.models import exam_enrollment
+from base.models.exam_enrollment import ExamEnrollment
+from base.models.learning_unit_enrollment import LearningUnitEnrollment
+from base.models.offer_enrollment import OfferEnrollment
+from base.models.person import Person
+from base.models.session_exam import SessionExam
+from base.models.student import Student
+from base.utils.db import rollback_atomic
+
+
+class Command(BaseCommand):
+    """Compare the score sheet exports on generated exam enrollments, as the export view builds them."""
+
+    help = "Benchmark the score sheet exports on exam enrollments generated for a session exam " \
+           "(rolled back at the end)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Number of exam enrollments to export")
+
+    def handle(self, *args, **options):
+        session_exam = SessionExam.objects.filter(offer_year__isnull=False).select_related(
+            'learning_unit_year__academic_year'
+        ).first()
+        if not session_exam:
+            raise CommandError("A session exam with an offer year is needed to generate the exam enrollments")
+
+        with rollback_atomic():
+            self._run(session_exam, options['rows'])
+
+    def _run(self, session_exam, nb_rows):
+        self._create_exam_enrollments(session_exam, nb_rows)
+        # Same queryset as _find_enrollments for the learning unit year of the session exam
+        enrollments = exam_enrollment.find_for_score_encodings(
+            session_exam.number_session,
+            learning_unit_year_id=session_exam.learning_unit_year_id,
+            academic_year=session_exam.learning_unit_year.academic_year
+        )
+
+        self.stdout.write("{} exam enrollments exported".format(nb_rows))
+        self.stdout.write("{:<32} {:>12} {:>18}".format('', 'time (ms)', 'peak memory (MiB)'))
+        # Former export view: list sorted in Python (get_scores_encoding_list) written in memory
+        self._measure('export_xls (sorted list)', lambda: score_encoding_export.export_xls(
+            score_encoding_list.sort_encodings(list(enrollments))
+        ).content)
+        # Export view: queryset sorted by the database (find_enrollments_to_export) written while it is iterated
+        self._measure('export_xls_streaming (queryset)', lambda: b''.join(
+            score_encoding_export.export_xls_streaming(
+                score_encoding_list.prepare_enrollments_to_export(enrollments, is_program_manager=True)
+                .iterator(chunk_size=score_encoding_export.EXPORT_CHUNK_SIZE)
+            ).streaming_content
+        ))
+
+    def _measure(self, name, export):
+        tracemalloc.start()
+        start = time.perf_counter()
+        export()
+        duration = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.stdout.write("{:<32} {:>12.2f} {:>18.2f}".format(name, duration * 1000, peak / 1024 / 1024))
+
+    @staticmethod
+    def _create_exam_enrollments(session_exam, nb_rows):
+        today = datetime.date.today()
+        persons = Person.objects.bulk_create(
+            Person(first_name="Benchmark", last_name="Student {}".format(index), email="benchmark@example.com")
+            for index in range(nb_rows)
+        )
+        students = Student.objects.bulk_create(
+            Student(person=person, registration_id=uuid.uuid4().hex[:10]) for person in persons
+        )
+        offer_enrollments = OfferEnrollment.objects.bulk_create(
+            OfferEnrollment(student=student, offer_year_id=session_exam.offer_year_id, date_enrollment=today)
+            for student in students
+        )
+        learning_unit_enrollments = LearningUnitEnrollment.objects.bulk_create(
+            LearningUnitEnrollment(offer_enrollment=offer_enrollment,
+                                   learning_unit_year_id=session_exam.learning_unit_year_id,
+                                   date_enrollment=today)
+            for offer_enrollment in offer_enrollments
+        )
+        ExamEnrollment.objects.bulk_create(
+            ExamEnrollment(session_exam=session_exam, learning_unit_enrollment=learning_unit_enrollment)
+            for learning_unit_enrollment in learning_unit_enrollments
+        )
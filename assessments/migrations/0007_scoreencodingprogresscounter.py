@@ -0,0 +1,48 @@
+# Generated by Django 2.2.5 on 2020-03-20 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+POPULATE_COUNTERS = """
+INSERT INTO assessments_scoreencodingprogresscounter (
+    session_exam_id, learning_unit_year_id, offer_year_id,
+    total_exam_enrollments, exam_enrollments_encoded, scores_not_yet_submitted
+)
+SELECT ee.session_exam_id, lue.learning_unit_year_id, oe.offer_year_id,
+       COUNT(ee.id),
+       SUM(CASE WHEN ee.score_final IS NOT NULL OR ee.justification_final IS NOT NULL THEN 1 ELSE 0 END),
+       SUM(CASE WHEN (ee.score_draft IS NOT NULL OR ee.justification_draft IS NOT NULL)
+                     AND ee.score_final IS NULL AND ee.justification_final IS NULL THEN 1 ELSE 0 END)
+FROM base_examenrollment ee
+JOIN base_learningunitenrollment lue ON lue.id = ee.learning_unit_enrollment_id
+JOIN base_offerenrollment oe ON oe.id = lue.offer_enrollment_id
+WHERE ee.enrollment_state = 'ENROLLED'
+GROUP BY ee.session_exam_id, lue.learning_unit_year_id, oe.offer_year_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0507_auto_20200316_1322'),
+        ('assessments', '0006_auto_20190802_1104'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreEncodingProgressCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_exam_enrollments', models.PositiveIntegerField(default=0)),
+                ('exam_enrollments_encoded', models.PositiveIntegerField(default=0)),
+                ('scores_not_yet_submitted', models.PositiveIntegerField(default=0)),
+                ('learning_unit_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.LearningUnitYear')),
+                ('offer_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.OfferYear')),
+                ('session_exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.SessionExam')),
+            ],
+            options={
+                'unique_together': {('session_exam', 'learning_unit_year', 'offer_year')},
+            },
+        ),
+        migrations.RunSQL(POPULATE_COUNTERS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,15 @@
+# Generated by Django 2.2.5 on 2020-03-23 09:41
+
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0007_scoreencodingprogresscounter'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.5 on 2020-03-25 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0008_unaccent_extension'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scoreencodingprogresscounter',
+            name='exam_enrollments_encoded',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='scoreencodingprogresscounter',
+            name='scores_not_yet_submitted',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='scoreencodingprogresscounter',
+            name='total_exam_enrollments',
+            field=models.IntegerField(default=0),
+        ),
+    ]
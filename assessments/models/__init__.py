@@ -1,2 +1,3 @@
 from assessments.models import score_sheet_address
 from assessments.models import scores_encoding
+from assessments.models import score_encoding_progress_counter
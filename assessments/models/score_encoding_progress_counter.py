@@ -0,0 +1,208 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+from django.db import models, transaction
+from django.db.models import F, Q, Subquery
+
+from attribution.models import attribution
+from base.models import academic_year as academic_yr, exam_enrollment, offer_year, program_manager, tutor
+from base.models.enums import exam_enrollment_state as enrollment_states
+from base.models.exam_enrollment import ExamEnrollment
+from base.models.learning_unit_enrollment import LearningUnitEnrollment
+from base.models.session_exam import SessionExam
+from osis_common.models.osis_model_admin import OsisModelAdmin
+
+REBUILD_BATCH_SIZE = 500
+
+# Fields of an exam enrollment which determine the counter it belongs to and how it is counted
+PROGRESS_FIELDS = ('session_exam_id', 'learning_unit_enrollment_id', 'enrollment_state',
+                   'score_draft', 'justification_draft', 'score_final', 'justification_final')
+
+
+class ScoreEncodingProgressCounterAdmin(OsisModelAdmin):
+    list_display = ('session_exam', 'learning_unit_year', 'offer_year', 'total_exam_enrollments',
+                    'exam_enrollments_encoded', 'scores_not_yet_submitted')
+    raw_id_fields = ('session_exam', 'learning_unit_year', 'offer_year')
+    search_fields = ['learning_unit_year__acronym', 'offer_year__acronym']
+
+
+class ScoreEncodingProgressCounter(models.Model):
+    """ Score encoding progress of the enrolled students, kept up to date with the exam enrollments """
+    session_exam = models.ForeignKey('base.SessionExam', on_delete=models.CASCADE)
+    learning_unit_year = models.ForeignKey('base.LearningUnitYear', on_delete=models.CASCADE)
+    offer_year = models.ForeignKey('base.OfferYear', on_delete=models.CASCADE)
+    # Not positive integers: an out of date counter can become negative before it is computed again (see update)
+    total_exam_enrollments = models.IntegerField(default=0)
+    exam_enrollments_encoded = models.IntegerField(default=0)
+    scores_not_yet_submitted = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('session_exam', 'learning_unit_year', 'offer_year')
+
+    def __str__(self):
+        return u"%s - %s" % (self.session_exam, self.offer_year)
+
+
+def refresh(session_exam_ids):
+    """ Compute again the counters of the session exams from their exam enrollments """
+    session_exam_ids = sorted(set(session_exam_ids))
+    if not session_exam_ids:
+        return
+
+    with transaction.atomic():
+        # Lock the session exams so that concurrent refreshes of the same counters are serialized
+        list(SessionExam.objects.select_for_update().filter(pk__in=session_exam_ids).order_by('pk')
+             .values_list('pk', flat=True))
+        rows = ExamEnrollment.objects.filter(
+            session_exam_id__in=session_exam_ids,
+            enrollment_state=enrollment_states.ENROLLED
+        ).values(
+            'session_exam_id',
+            'learning_unit_enrollment__learning_unit_year_id',
+            'learning_unit_enrollment__offer_enrollment__offer_year_id'
+        ).annotate(**exam_enrollment.get_progress_aggregates()).order_by()
+
+        ScoreEncodingProgressCounter.objects.filter(session_exam_id__in=session_exam_ids).delete()
+        ScoreEncodingProgressCounter.objects.bulk_create(
+            ScoreEncodingProgressCounter(
+                session_exam_id=row['session_exam_id'],
+                learning_unit_year_id=row['learning_unit_enrollment__learning_unit_year_id'],
+                offer_year_id=row['learning_unit_enrollment__offer_enrollment__offer_year_id'],
+                total_exam_enrollments=row['total_exam_enrollments'],
+                exam_enrollments_encoded=row['exam_enrollments_encoded'],
+                scores_not_yet_submitted=row['scores_not_yet_submitted'],
+            ) for row in rows
+        )
+
+
+def get_progress_values(enrollment):
+    return {field: getattr(enrollment, field) for field in PROGRESS_FIELDS}
+
+
+def get_stored_progress_values(enrollment):
+    """ Values of the exam enrollment as loaded from the database, read again only when they were not all loaded """
+    loaded_values = getattr(enrollment, '_loaded_values', {})
+    if all(field in loaded_values for field in PROGRESS_FIELDS):
+        return {field: loaded_values[field] for field in PROGRESS_FIELDS}
+    return ExamEnrollment.objects.filter(pk=enrollment.pk).values(*PROGRESS_FIELDS).first()
+
+
+def update(previous_values, values):
+    """
+    Apply the change of one exam enrollment to its counter with F() increments.
+    previous_values is None when the exam enrollment is created and values is None when it is deleted.
+    The counters are computed again (see refresh) when the exam enrollment moves to another counter,
+    when its counter does not exist yet or when the counter becomes negative (it was out of date).
+    """
+    enrollments_values = [enrollment_values for enrollment_values in (previous_values, values) if enrollment_values]
+    session_exam_id, learning_unit_enrollment_id = _get_counter_key(enrollments_values[0])
+    if any(_get_counter_key(enrollment_values) != (session_exam_id, learning_unit_enrollment_id)
+           for enrollment_values in enrollments_values):
+        refresh(enrollment_values['session_exam_id'] for enrollment_values in enrollments_values)
+        return
+
+    previous_counts, counts = _get_counts(previous_values), _get_counts(values)
+    deltas = {field: counts[field] - previous_counts[field] for field in counts}
+    if not any(deltas.values()):
+        return
+
+    counter = ScoreEncodingProgressCounter.objects.filter(
+        session_exam_id=session_exam_id,
+        learning_unit_year_id=Subquery(
+            LearningUnitEnrollment.objects.filter(pk=learning_unit_enrollment_id).values('learning_unit_year_id')
+        ),
+        offer_year_id=Subquery(
+            LearningUnitEnrollment.objects.filter(pk=learning_unit_enrollment_id)
+            .values('offer_enrollment__offer_year_id')
+        )
+    )
+    if not counter.update(**{field: F(field) + delta for field, delta in deltas.items()}):
+        refresh([session_exam_id])
+    elif any(delta < 0 for delta in deltas.values()):
+        if counter.filter(_is_out_of_range()).exists():
+            refresh([session_exam_id])
+        elif deltas['total_exam_enrollments'] < 0:
+            counter.filter(total_exam_enrollments=0).delete()
+
+
+def _is_out_of_range():
+    return Q(total_exam_enrollments__lt=0) | Q(exam_enrollments_encoded__lt=0) | Q(scores_not_yet_submitted__lt=0)
+
+
+def _get_counter_key(enrollment_values):
+    return enrollment_values['session_exam_id'], enrollment_values['learning_unit_enrollment_id']
+
+
+def _get_counts(enrollment_values):
+    """ Contribution of one exam enrollment to its counter, like exam_enrollment.get_progress_aggregates """
+    counts = {'total_exam_enrollments': 0, 'exam_enrollments_encoded': 0, 'scores_not_yet_submitted': 0}
+    if not enrollment_values or enrollment_values['enrollment_state'] != enrollment_states.ENROLLED:
+        return counts
+
+    counts['total_exam_enrollments'] = 1
+    if enrollment_values['score_final'] is not None or enrollment_values['justification_final'] is not None:
+        counts['exam_enrollments_encoded'] = 1
+    elif enrollment_values['score_draft'] is not None or enrollment_values['justification_draft'] is not None:
+        counts['scores_not_yet_submitted'] = 1
+    return counts
+
+
+def rebuild():
+    """ Compute again all the counters. Return the number of session exams refreshed """
+    session_exam_ids = list(SessionExam.objects.order_by('pk').values_list('pk', flat=True))
+    for index in range(0, len(session_exam_ids), REBUILD_BATCH_SIZE):
+        refresh(session_exam_ids[index:index + REBUILD_BATCH_SIZE])
+    with transaction.atomic():
+        ScoreEncodingProgressCounter.objects.exclude(session_exam_id__in=SessionExam.objects.values('pk')).delete()
+    return len(session_exam_ids)
+
+
+def search(user, session_exam_number, learning_unit_year_ids=None, offer_year_id=None, academic_year=None):
+    """
+    Counters visible by the user, filtered like exam_enrollment.get_progress_by_learning_unit_years_and_offer_years
+    """
+    if not academic_year:
+        academic_year = academic_yr.starting_academic_year()
+
+    if offer_year_id:
+        offer_year_ids = [offer_year_id]
+    else:
+        offer_year_ids = offer_year.find_by_user(user).values_list('id', flat=True)
+
+    queryset = ScoreEncodingProgressCounter.objects.filter(
+        session_exam__number_session=session_exam_number,
+        learning_unit_year__academic_year=academic_year
+    )
+
+    if learning_unit_year_ids is not None:
+        queryset = queryset.filter(learning_unit_year_id__in=learning_unit_year_ids)
+    elif not program_manager.is_program_manager(user):
+        tutor_user = tutor.find_by_user(user)
+        if tutor_user:
+            queryset = queryset.filter(learning_unit_year_id__in=attribution.find_by_tutor(tutor_user))
+
+    if offer_year_ids:
+        queryset = queryset.filter(offer_year_id__in=offer_year_ids)
+    return queryset
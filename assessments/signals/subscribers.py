@@ -23,9 +23,12 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 
 from assessments.business import scores_encodings_deadline
+from assessments.models import score_encoding_progress_counter
+from base.models.exam_enrollment import ExamEnrollment
 from base.signals import publisher
 
 
@@ -42,3 +45,24 @@ def compute_student_score_encoding_deadline(sender, **kwargs):
 @receiver(publisher.compute_all_scores_encodings_deadlines)
 def compute_all_scores_encodings_deadlines(sender, **kwargs):
     scores_encodings_deadline.recompute_all_deadlines(kwargs['academic_calendar'])
+
+
+@receiver(pre_save, sender=ExamEnrollment)
+def keep_score_encoding_progress_values(sender, instance, **kwargs):
+    # The values stored before the save are compared with the saved ones to update the counter
+    if not kwargs.get('raw') and instance.pk:
+        instance._previous_progress_values = score_encoding_progress_counter.get_stored_progress_values(instance)
+
+
+@receiver(post_save, sender=ExamEnrollment)
+def update_score_encoding_progress_counter(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        values = score_encoding_progress_counter.get_progress_values(instance)
+        score_encoding_progress_counter.update(getattr(instance, '_previous_progress_values', None), values)
+        instance._previous_progress_values = None
+        instance._loaded_values = dict(getattr(instance, '_loaded_values', {}), **values)
+
+
+@receiver(post_delete, sender=ExamEnrollment)
+def remove_from_score_encoding_progress_counter(sender, instance, **kwargs):
+    score_encoding_progress_counter.update(score_encoding_progress_counter.get_progress_values(instance), None)
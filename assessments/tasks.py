@@ -0,0 +1,66 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+from django.contrib import messages
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.utils import translation
+
+from assessments.business import score_sheet_import
+from backoffice.celery import app as celery_app
+
+
+@celery_app.task(bind=True)
+def import_score_sheet(self, user_id, learning_unit_year_id, file_path, language) -> dict:
+    report = score_sheet_import.JobMessagesReport()
+    rows = {'total': 0}
+
+    def progress(current, total):
+        rows['total'] = total
+        self.update_state(
+            state=score_sheet_import.STATE_PROGRESS,
+            meta={'user_id': user_id, 'current': current, 'total': total}
+        )
+
+    try:
+        user = User.objects.get(pk=user_id)
+        with translation.override(language), score_sheet_import.import_lock(learning_unit_year_id) as locked:
+            if locked:
+                with default_storage.open(file_path, 'rb') as file:
+                    scores_saved = score_sheet_import.import_xls_scores(
+                        user, report, file, learning_unit_year_id, progress=progress
+                    )
+            else:
+                report.add(messages.ERROR, score_sheet_import.get_import_locked_message())
+                scores_saved = False
+    finally:
+        default_storage.delete(file_path)
+
+    return {
+        'user_id': user_id,
+        'total': rows['total'],
+        'scores_saved': scores_saved,
+        'messages': report.messages,
+    }
@@ -24,17 +24,18 @@
 #
 ##############################################################################
 import datetime
+import io
 
 from django.test import TestCase
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from openpyxl import Workbook
+from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Color
 
 from assessments.business.enrollment_state import ENROLLED_LATE_COLOR, NOT_ENROLLED_COLOR
 from assessments.business.score_encoding_export import _coloring_enrollment_state, FIRST_COL_LEGEND_ENROLLMENT_STATUS, \
     _color_legend, FIRST_ROW_LEGEND_ENROLLMENT_STATUS, _add_header_and_legend_to_file, \
-    justification_other_values
+    justification_other_values, export_xls_streaming, HEADER
 from base import models as mdl
 from base.models.enums import exam_enrollment_state as enrollment_states
 from base.models.enums import number_session, academic_calendar_type
@@ -186,3 +187,26 @@ class XlsTests(TestCase):
             if ue.decimal_scores else
             str(_('Unauthorized decimal for this learning unit'))
         )
+
+    def test_export_xls_streaming(self):
+        exam_enrollments = [
+            ExamEnrollmentFactory(session_exam=self.session_exam,
+                                  enrollment_state=enrollment_states.ENROLLED,
+                                  date_enrollment=self.academic_calendar.start_date,
+                                  score_final=12),
+            ExamEnrollmentFactory(session_exam=self.session_exam,
+                                  enrollment_state=enrollment_states.NOT_ENROLLED,
+                                  date_enrollment=self.academic_calendar.start_date),
+        ]
+
+        response = export_xls_streaming(iter(exam_enrollments))
+        worksheet = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+
+        self.assertEqual(worksheet.cell(row=12, column=1).value, str(HEADER[0]))
+        self.assertEqual(worksheet.cell(row=13, column=5).value,
+                         exam_enrollments[0].learning_unit_enrollment.student.registration_id)
+        self.assertEqual(worksheet.cell(row=13, column=9).value, "12")
+        self.assertEqual(worksheet.cell(row=13, column=9).fill.fgColor, Color('C1C1C1'))
+        self.assertEqual(worksheet.cell(row=14, column=9).fill.fgColor, Color(rgb=NOT_ENROLLED_COLOR.lstrip('#')))
+        legend_cell = worksheet.cell(row=FIRST_ROW_LEGEND_ENROLLMENT_STATUS, column=FIRST_COL_LEGEND_ENROLLMENT_STATUS)
+        self.assertEqual(legend_cell.fill.fgColor, Color(rgb=ENROLLED_LATE_COLOR.lstrip('#')))
@@ -28,6 +28,9 @@ import decimal
 from django.test import TestCase
 
 from assessments.business import score_encoding_list
+from base.models.exam_enrollment import ExamEnrollmentHistory
+from base.tests.factories.exam_enrollment import ExamEnrollmentFactory
+from base.tests.factories.person import PersonFactory
 
 
 class TestConvertToDecimal(TestCase):
@@ -45,3 +48,32 @@ class TestConvertToDecimal(TestCase):
     def test_when_deciamls_unauthorized(self):
         with self.assertRaises(ValueError):
             score_encoding_list._convert_to_decimal(float(15.555), False)
+
+
+class TestBulkSaveEnrollments(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.person = PersonFactory()
+        cls.enrollments = [ExamEnrollmentFactory(), ExamEnrollmentFactory()]
+
+    def test_save_scores_and_history(self):
+        for score, enrollment in enumerate(self.enrollments, start=10):
+            enrollment.score_draft = enrollment.score_final = score
+
+        score_encoding_list.bulk_save_enrollments(self.enrollments, self.person.user, is_program_manager=True)
+
+        for score, enrollment in enumerate(self.enrollments, start=10):
+            enrollment.refresh_from_db()
+            self.assertEqual(enrollment.score_final, score)
+            history = ExamEnrollmentHistory.objects.get(exam_enrollment=enrollment)
+            self.assertEqual(history.score_final, score)
+            self.assertEqual(history.person, self.person)
+
+    def test_no_history_for_tutor(self):
+        self.enrollments[0].score_draft = 12
+
+        score_encoding_list.bulk_save_enrollments(self.enrollments[:1], self.person.user, is_program_manager=False)
+
+        self.enrollments[0].refresh_from_db()
+        self.assertEqual(self.enrollments[0].score_draft, 12)
+        self.assertFalse(ExamEnrollmentHistory.objects.exists())
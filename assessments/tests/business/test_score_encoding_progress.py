@@ -25,12 +25,17 @@
 ##############################################################################
 from random import randint
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from assessments.business import score_encoding_progress
+from assessments.models import score_encoding_progress_counter
+from assessments.models.score_encoding_progress_counter import ScoreEncodingProgressCounter
 from attribution.tests.factories.attribution import AttributionFactory
 from attribution.tests.models import test_attribution
-from base.models.enums import number_session
+from base.models.enums import number_session, exam_enrollment_state
+from base.models.exam_enrollment import ExamEnrollment
 from base.tests.factories.academic_calendar import AcademicCalendarExamSubmissionFactory
 from base.tests.factories.academic_year import AcademicYearFactory
 from base.tests.factories.learning_unit_year import LearningUnitYearFactory
@@ -220,3 +225,103 @@ class ScoreEncodingProgressTest(TestCase):
                 exam_enrollment.score_final = randint(0, 20)
                 exam_enrollment.save()
                 counter_filled -= 1
+
+
+class ScoreEncodingProgressCounterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.academic_year = AcademicYearFactory(current=True)
+        cls.offer_year = OfferYearFactory(academic_year=cls.academic_year)
+        cls.learning_unit_year = LearningUnitYearFactory(academic_year=cls.academic_year)
+        cls.session_exam = SessionExamFactory(number_session=number_session.ONE,
+                                              learning_unit_year=cls.learning_unit_year)
+        cls.exam_enrollments = []
+        for _ in range(0, 3):
+            offer_enrollment = test_offer_enrollment.create_offer_enrollment(StudentFactory(), cls.offer_year)
+            learning_unit_enrollment = test_learning_unit_enrollment.create_learning_unit_enrollment(
+                offer_enrollment=offer_enrollment,
+                learning_unit_year=cls.learning_unit_year)
+            cls.exam_enrollments.append(
+                test_exam_enrollment.create_exam_enrollment(cls.session_exam, learning_unit_enrollment)
+            )
+
+    def assert_counter_equal(self, total, encoded, not_yet_submitted):
+        counter = ScoreEncodingProgressCounter.objects.get(session_exam=self.session_exam,
+                                                           learning_unit_year=self.learning_unit_year,
+                                                           offer_year=self.offer_year)
+        self.assertEqual(
+            (counter.total_exam_enrollments, counter.exam_enrollments_encoded, counter.scores_not_yet_submitted),
+            (total, encoded, not_yet_submitted)
+        )
+
+    def test_counter_updated_when_scores_are_saved(self):
+        self.assert_counter_equal(3, 0, 0)
+
+        self.exam_enrollments[0].score_draft = 12
+        self.exam_enrollments[0].save()
+        self.exam_enrollments[1].score_final = 15
+        self.exam_enrollments[1].save()
+        self.assert_counter_equal(3, 1, 1)
+
+    def test_counter_only_count_enrolled_students(self):
+        self.exam_enrollments[2].enrollment_state = exam_enrollment_state.NOT_ENROLLED
+        self.exam_enrollments[2].save()
+        self.assert_counter_equal(2, 0, 0)
+
+    def test_counter_updated_when_scores_are_changed(self):
+        enrollment = ExamEnrollment.objects.get(pk=self.exam_enrollments[0].pk)
+        enrollment.score_draft = 12
+        enrollment.save()
+        enrollment.score_final = 12
+        enrollment.save()
+        self.assert_counter_equal(3, 1, 0)
+
+        enrollment.score_final = None
+        enrollment.save()
+        self.assert_counter_equal(3, 0, 1)
+
+    def test_counter_updated_when_exam_enrollment_is_deleted(self):
+        enrollment = ExamEnrollment.objects.get(pk=self.exam_enrollments[0].pk)
+        enrollment.score_final = 12
+        enrollment.save()
+        enrollment.delete()
+        self.assert_counter_equal(2, 0, 0)
+
+    def test_counter_removed_when_its_last_exam_enrollment_is_not_enrolled(self):
+        enrollments = list(ExamEnrollment.objects.filter(session_exam=self.session_exam).order_by('pk'))
+        for enrollment in enrollments:
+            enrollment.enrollment_state = exam_enrollment_state.NOT_ENROLLED
+            enrollment.save()
+        self.assertFalse(ScoreEncodingProgressCounter.objects.filter(session_exam=self.session_exam).exists())
+
+        enrollments[0].enrollment_state = exam_enrollment_state.ENROLLED
+        enrollments[0].save()
+        self.assert_counter_equal(1, 0, 0)
+
+    def test_counter_computed_again_when_it_becomes_negative(self):
+        ScoreEncodingProgressCounter.objects.filter(session_exam=self.session_exam).update(total_exam_enrollments=0)
+        enrollment = ExamEnrollment.objects.get(pk=self.exam_enrollments[0].pk)
+        enrollment.enrollment_state = exam_enrollment_state.NOT_ENROLLED
+        enrollment.save()
+        self.assert_counter_equal(2, 0, 0)
+
+    def test_stored_values_not_read_again_when_saving_a_loaded_exam_enrollment(self):
+        enrollment = ExamEnrollment.objects.get(pk=self.exam_enrollments[0].pk)
+        enrollment.score_draft = 12
+        with CaptureQueriesContext(connection) as queries:
+            enrollment.save()
+            enrollment.score_final = 12
+            enrollment.save()
+
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "base_examenrollment"' in query['sql']
+        ])
+        self.assert_counter_equal(3, 1, 0)
+
+    def test_rebuild_fix_drift(self):
+        ExamEnrollment.objects.filter(pk=self.exam_enrollments[0].pk).update(score_final=10)
+        self.assert_counter_equal(3, 0, 0)
+
+        score_encoding_progress_counter.rebuild()
+        self.assert_counter_equal(3, 1, 0)
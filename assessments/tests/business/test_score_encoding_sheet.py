@@ -25,15 +25,19 @@
 ##############################################################################
 import datetime
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from assessments.business import score_encoding_sheet
 from assessments.models.enums import score_sheet_address_choices
+from assessments.models.score_sheet_address import ScoreSheetAddress
 from assessments.tests.factories.score_sheet_address import ScoreSheetAddressFactory
 from attribution.tests.factories.attribution import AttributionFactory
 from base.models.enums import exam_enrollment_state as enrollment_states
+from base.models import exam_enrollment
 from base.models.exam_enrollment import ExamEnrollment
 from base.tests.factories.academic_year import AcademicYearFactory
 from base.tests.factories.education_group_year import EducationGroupYearFactory
@@ -103,6 +107,19 @@ class ScoreSheetAddressTest(TestCase):
         self.assertIn('email', keys)
         self.assertIn('recipient', keys)
 
+    def test_get_score_sheet_addresses(self):
+        offer_year_without_address = OfferYearFactory(academic_year=self.academic_year)
+        for entity_address_choice in [score_sheet_address_choices.ENTITY_ADMINISTRATION,
+                                      score_sheet_address_choices.ENTITY_MANAGEMENT, None]:
+            ScoreSheetAddressFactory(offer_year=self.offer_year, entity_address_choice=entity_address_choice)
+            addresses = score_encoding_sheet.get_score_sheet_addresses([self.offer_year.id,
+                                                                        offer_year_without_address.id])
+            self.assertEqual(addresses[self.offer_year.id],
+                             score_encoding_sheet.get_score_sheet_address(self.offer_year))
+            self.assertEqual(addresses[offer_year_without_address.id],
+                             score_encoding_sheet.get_score_sheet_address(offer_year_without_address))
+            ScoreSheetAddress.objects.filter(offer_year=self.offer_year).delete()
+
     def test_get_address_as_dict(self):
         address1 = ScoreSheetAddressFactory(offer_year=self.offer_year)
         self._assert_address_fields_are_in_object(address1)
@@ -190,6 +207,26 @@ class ScoreSheetDataTest(TestCase):
             else:
                 self.assertEqual(enrollment['deadline'], '')
 
+    def test_scores_sheet_data_number_of_queries(self):
+        exam_enrollments = list(exam_enrollment.find_for_score_encodings(1, academic_year=self.academic_year))
+        with CaptureQueriesContext(connection) as one_learning_unit_queries:
+            score_encoding_sheet.scores_sheet_data(exam_enrollments)
+
+        other_learning_unit_year = LearningUnitYearFactory(academic_year=self.academic_year)
+        _create_attribution(other_learning_unit_year, person=PersonFactory(), is_score_responsible=True)
+        other_offer_enrollment = OfferEnrollmentFactory(offer_year=OfferYearFactory(academic_year=self.academic_year))
+        ExamEnrollmentFactory(
+            learning_unit_enrollment=LearningUnitEnrollmentFactory(offer_enrollment=other_offer_enrollment,
+                                                                   learning_unit_year=other_learning_unit_year),
+            session_exam=SessionExamFactory(number_session=1, learning_unit_year=other_learning_unit_year),
+        )
+        exam_enrollments = list(exam_enrollment.find_for_score_encodings(1, academic_year=self.academic_year))
+        with CaptureQueriesContext(connection) as two_learning_units_queries:
+            data_computed = score_encoding_sheet.scores_sheet_data(exam_enrollments)
+
+        self.assertEqual(len(data_computed['learning_unit_years']), 2)
+        self.assertEqual(len(one_learning_unit_queries), len(two_learning_units_queries))
+
 
 def _create_attribution(learning_unit_year, person, is_score_responsible=False):
     PersonAddressFactory(person=person, label='PROFESSIONAL', city="Louvain-la-neuve")
@@ -24,6 +24,7 @@
 #
 ##############################################################################
 from datetime import timedelta
+from io import BytesIO
 from unittest import mock
 from unittest.mock import patch
 
@@ -35,19 +36,24 @@ from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext
 from django.utils.translation import gettext_lazy as _
+from openpyxl import load_workbook
 
+from assessments.business import score_encoding_list
 from assessments.business.score_encoding_list import ScoresEncodingList
+from assessments.business.score_sheet_import import UploadValueError, _extract_session_number
 from assessments.tests.views.test_upload_xls_utils import generate_exam_enrollments
 from assessments.views import score_encoding
 from assessments.views.score_encoding import online_encoding_submission
-from assessments.views.upload_xls_utils import UploadValueError, _extract_session_number
 from base.models.enums import exam_enrollment_justification_type
 from base.models.enums import exam_enrollment_state
 from base.models.enums import number_session, academic_calendar_type
 from base.models.exam_enrollment import ExamEnrollment
 from base.tests.factories.academic_calendar import AcademicCalendarFactory
 from base.tests.factories.academic_year import AcademicYearFactory
+from base.tests.factories.exam_enrollment import ExamEnrollmentFactory
+from base.tests.factories.learning_unit_enrollment import LearningUnitEnrollmentFactory
 from base.tests.factories.learning_unit_year import LearningUnitYearFactory
+from base.tests.factories.offer_enrollment import OfferEnrollmentFactory
 from base.tests.factories.offer_year import OfferYearFactory
 from base.tests.factories.offer_year_calendar import OfferYearCalendarFactory
 from base.tests.factories.person import PersonFactory
@@ -79,6 +85,21 @@ class MixinSetupOnlineEncoding(AcademicYearMockMixin, SessionExamCalendarMockMix
         )
         self.mock_session_exam_calendar(current_session_exam=data["session_exam_calendar"])
 
+    def add_enrollments_of_students(self, names):
+        """ Enroll students (last name, first name) to the session exam of the first exam enrollment """
+        session_exam = self.enrollments[0].session_exam
+        for last_name, first_name in names:
+            offer_enrollment = OfferEnrollmentFactory(
+                offer_year=session_exam.offer_year,
+                student=StudentFactory(person=PersonFactory(last_name=last_name, first_name=first_name))
+            )
+            ExamEnrollmentFactory(
+                session_exam=session_exam,
+                learning_unit_enrollment=LearningUnitEnrollmentFactory(learning_unit_year=self.learning_unit_year,
+                                                                       offer_enrollment=offer_enrollment),
+                enrollment_state=exam_enrollment_state.ENROLLED
+            )
+
     def assert_exam_enrollments(self, exam_enrollment, score_draft, score_final, justification_draft,
                                 justification_final):
         exam_enrollment.refresh_from_db()
@@ -199,6 +220,54 @@ class OnlineEncodingTest(MixinSetupOnlineEncoding, TestCase):
         self.assert_exam_enrollments(self.enrollments[0], 15, None, None, None)
         self.assert_exam_enrollments(self.enrollments[1], None, None, None, None)
 
+    @patch("assessments.views.score_encoding.ONLINE_ENCODING_PAGE_SIZE", 1)
+    def test_online_encoding_form_by_page(self):
+        self.client.force_login(self.tutor.person.user)
+        url = reverse('online_encoding_form', args=[self.learning_unit_year.id])
+        expected = score_encoding_list.sort_encodings(self.enrollments)
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['enrollments'], expected[:1])
+        self.assertEqual(response.context['total_exam_enrollments'], 2)
+        self.assertIsNotNone(response.context['next_page_url'])
+
+        response = self.client.get(response.context['next_page_url'])
+        self.assertEqual(response.context['enrollments'], expected[1:])
+        self.assertIsNone(response.context['next_page_url'])
+
+    @patch("assessments.views.score_encoding.ONLINE_ENCODING_PAGE_SIZE", 2)
+    def test_online_encoding_form_by_page_with_accented_and_same_names(self):
+        self.add_enrollments_of_students([
+            ("Élégant", "Zoé"), ("Dupont", "Jean"), ("elegant", "Zoe"), ("De Brouwer", "Anne"),
+            ("Dupont", "Jean"), ("Debrouwer", "Anne"), ("Dupont", "Jean"),
+        ])
+        self.client.force_login(self.tutor.person.user)
+        expected = score_encoding_list.sort_encodings(ExamEnrollment.objects.filter(
+            learning_unit_enrollment__learning_unit_year=self.learning_unit_year
+        ).order_by('pk'))
+
+        enrollments = []
+        next_page_url = reverse('online_encoding_form', args=[self.learning_unit_year.id])
+        while next_page_url:
+            response = self.client.get(next_page_url)
+            self.assertLessEqual(len(response.context['enrollments']), 2)
+            enrollments += response.context['enrollments']
+            next_page_url = response.context['next_page_url']
+
+        self.assertEqual(enrollments, expected)
+
+    def test_export_xls_in_the_order_of_the_online_encoding(self):
+        self.client.force_login(self.tutor.person.user)
+        url = reverse('scores_encoding_download', args=[self.learning_unit_year.id])
+
+        response = self.client.get(url)
+        worksheet = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual(
+            [row[4].value for row in worksheet.iter_rows(min_row=13)],
+            [enrollment.learning_unit_enrollment.student.registration_id
+             for enrollment in score_encoding_list.sort_encodings(self.enrollments)]
+        )
+
     def test_tutor_encoding_final_scores_for_a_student(self):
         self.client.force_login(self.tutor.person.user)
         self.enrollments[0].score_final = 16
@@ -243,6 +312,23 @@ class OnlineEncodingTest(MixinSetupOnlineEncoding, TestCase):
         self.assert_exam_enrollments(self.enrollments[0], 15, None, None, None)
         self.assert_exam_enrollments(self.enrollments[1], 18, None, None, None)
 
+    def test_tutor_double_encoding_only_keeps_differences(self):
+        self.client.force_login(self.tutor.person.user)
+        prepare_exam_enrollment_for_double_encoding_validation(self.enrollments[0])
+        prepare_exam_enrollment_for_double_encoding_validation(self.enrollments[1])
+        url = reverse('online_double_encoding_form', args=[self.learning_unit_year.id])
+        form = self.get_form_with_all_students_filled()
+        form["score_" + str(self.enrollments[0].id)] = "14"
+        response = self.client.post(url, data=form)
+
+        self.assertTemplateUsed(response, "online_double_encoding_validation.html")
+        self.assertEqual([enrollment.id for enrollment in response.context['enrollments']], [self.enrollments[1].id])
+        self.assertEqual(response.context['enrollments'][0].score_reencoded, 18)
+        # The reencoded values are only saved by the validation
+        for enrollment in self.enrollments:
+            enrollment.refresh_from_db()
+            self.assertEqual(enrollment.score_reencoded, 14)
+
     def test_tutor_encoding_with_all_students_and_a_justification(self):
         self.client.force_login(self.tutor.person.user)
         url = reverse('online_encoding_form', args=[self.learning_unit_year.id])
@@ -26,13 +26,16 @@
 import datetime
 from unittest import mock
 
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, User
+from django.db import connection
 from django.http import Http404
 from django.test import TestCase, TransactionTestCase
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
-from assessments.views.upload_xls_utils import _get_score_list_filtered_by_enrolled_state
+from assessments import tasks
+from assessments.business import score_sheet_import
+from assessments.business.score_sheet_import import _get_score_list_filtered_by_enrolled_state
 from attribution.tests.factories.attribution import AttributionFactory
 from base.models.enums import exam_enrollment_state
 from base.models.enums import number_session, academic_calendar_type, exam_enrollment_justification_type
@@ -104,6 +107,18 @@ def generate_exam_enrollments(year, with_different_offer=False):
     return locals()
 
 
+def lock_import_in_another_session(test_case, learning_unit_year_id):
+    """ Try to take the import lock in another database session, like an import running in another process """
+    other_connection = connection.copy()
+    test_case.addCleanup(other_connection.close)
+    with other_connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_try_advisory_lock(%s, %s)",
+            [score_sheet_import.IMPORT_LOCK_NAMESPACE, learning_unit_year_id]
+        )
+        return cursor.fetchone()[0]
+
+
 class MixinTestUploadScoresFile(TestCase, AcademicYearMockMixin):
     @classmethod
     def setUpTestData(cls):
@@ -151,7 +166,7 @@ class MixinTestUploadScoresFile(TestCase, AcademicYearMockMixin):
 
 
 class TestTransactionNonAtomicUploadXls(MixinTestUploadScoresFile, TransactionTestCase):
-    @mock.patch("assessments.views.upload_xls_utils._show_error_messages", side_effect=Http404)
+    @mock.patch("assessments.business.score_sheet_import._show_error_messages", side_effect=Http404)
     def test_when_exception_occured_after_saving_scores(self, mock_method_that_raise_exception):
         SCORE_1 = 16
         SCORE_2 = exam_enrollment_justification_type.ABSENCE_UNJUSTIFIED
@@ -305,6 +320,26 @@ class TestUploadXls(MixinTestUploadScoresFile, TestCase):
                 [("score_draft", 16), ("justification_draft", exam_enrollment_justification_type.ABSENCE_UNJUSTIFIED)]
             )
 
+    def test_refuse_import_when_another_one_is_running(self):
+        lock_import_in_another_session(self, self.learning_unit_year.id)
+        with open("assessments/tests/resources/correct_score_sheet.xlsx", 'rb') as score_sheet:
+            response = self.client.post(self.url, {'file': score_sheet}, follow=True)
+            messages = list(response.context['messages'])
+
+            self.assertEqual(len(messages), 1)
+            self.assertEqual(messages[0].tags, 'error')
+            self.assertEqual(
+                messages[0].message,
+                _("A score sheet is already being imported for this learning unit")
+            )
+            self.assert_enrollments_equal(self.exam_enrollments, [("score_draft", None), ("score_draft", None)])
+
+    def test_release_lock_after_import(self):
+        with open("assessments/tests/resources/correct_score_sheet.xlsx", 'rb') as score_sheet:
+            self.client.post(self.url, {'file': score_sheet}, follow=True)
+
+        self.assertTrue(lock_import_in_another_session(self, self.learning_unit_year.id))
+
     def test_get_score_list_filtered_by_enrolled_state(self):
         enrolled_exam_enrollment = ExamEnrollment.objects.all()
         nb_enrolled_student = len(enrolled_exam_enrollment)
@@ -317,3 +352,119 @@ class TestUploadXls(MixinTestUploadScoresFile, TestCase):
     def _unsubscribe_one_student(self, exam):
         exam.enrollment_state = exam_enrollment_state.NOT_ENROLLED
         exam.save()
+
+
+class TestUploadXlsAsync(MixinTestUploadScoresFile, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.url_async = reverse('upload_encoding_async', kwargs={'learning_unit_year_id': cls.learning_unit_year.id})
+
+    @mock.patch("assessments.views.upload_xls_utils.default_storage.save", return_value="score_sheets/job.xlsx")
+    @mock.patch("assessments.tasks.import_score_sheet.apply_async")
+    def test_launch_import_job(self, mock_apply_async, mock_save):
+        with open("assessments/tests/resources/correct_score_sheet.xlsx", 'rb') as score_sheet:
+            response = self.client.post(self.url_async, {'file': score_sheet})
+
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['job_id']
+        self.assertEqual(
+            response.json()['status_url'],
+            reverse('upload_encoding_status', args=[self.learning_unit_year.id, job_id])
+        )
+        mock_apply_async.assert_called_once_with(
+            args=[self.a_user.pk, self.learning_unit_year.id, "score_sheets/job.xlsx", mock.ANY],
+            task_id=job_id
+        )
+
+    @mock.patch("assessments.tasks.import_score_sheet.apply_async")
+    def test_refuse_import_when_another_one_is_running(self, mock_apply_async):
+        lock_import_in_another_session(self, self.learning_unit_year.id)
+        with open("assessments/tests/resources/correct_score_sheet.xlsx", 'rb') as score_sheet:
+            response = self.client.post(self.url_async, {'file': score_sheet})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(mock_apply_async.called)
+
+    @mock.patch("assessments.views.upload_xls_utils.default_storage")
+    @mock.patch("assessments.tasks.import_score_sheet.apply_async", side_effect=ConnectionError)
+    def test_delete_file_when_job_cannot_be_launched(self, mock_apply_async, mock_storage):
+        mock_storage.save.return_value = "score_sheets/job.xlsx"
+        with open("assessments/tests/resources/correct_score_sheet.xlsx", 'rb') as score_sheet:
+            with self.assertRaises(ConnectionError):
+                self.client.post(self.url_async, {'file': score_sheet})
+
+        mock_storage.delete.assert_called_once_with("score_sheets/job.xlsx")
+
+    def test_with_no_file_uploaded(self):
+        response = self.client.post(self.url_async, {'file': ''})
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch("assessments.business.score_sheet_import.celery_app.AsyncResult")
+    def test_status_of_running_job(self, mock_async_result):
+        mock_async_result.return_value = mock.Mock(
+            state=score_sheet_import.STATE_PROGRESS,
+            info={'user_id': self.a_user.pk, 'current': 50, 'total': 120}
+        )
+        response = self.client.get(reverse('upload_encoding_status', args=[self.learning_unit_year.id, "job"]))
+
+        self.assertEqual(
+            response.json(),
+            {'state': score_sheet_import.STATE_PROGRESS, 'current': 50, 'total': 120}
+        )
+
+    @mock.patch("assessments.business.score_sheet_import.celery_app.AsyncResult")
+    def test_status_of_job_of_another_user(self, mock_async_result):
+        mock_async_result.return_value = mock.Mock(
+            state=score_sheet_import.STATE_SUCCESS,
+            info={'user_id': self.a_user.pk + 1, 'total': 120, 'scores_saved': True, 'messages': []}
+        )
+        response = self.client.get(reverse('upload_encoding_status', args=[self.learning_unit_year.id, "job"]))
+
+        self.assertEqual(response.json(), {'state': score_sheet_import.STATE_PENDING})
+
+    @mock.patch("assessments.tasks.default_storage")
+    @mock.patch("assessments.tasks.import_score_sheet.update_state")
+    def test_import_job(self, mock_update_state, mock_storage):
+        with open("assessments/tests/resources/correct_score_sheet.xlsx", 'rb') as score_sheet:
+            mock_storage.open.return_value = score_sheet
+            result = tasks.import_score_sheet.apply(
+                args=[self.a_user.pk, self.learning_unit_year.id, "score_sheets/job.xlsx", "en"],
+                task_id="job"
+            ).get()
+
+        self.assertTrue(result['scores_saved'])
+        self.assertIn({'level': 'success', 'message': '2 %s' % _('Score saved')}, result['messages'])
+        self.assertTrue(mock_update_state.called)
+        mock_storage.delete.assert_called_once_with("score_sheets/job.xlsx")
+        self.assertTrue(lock_import_in_another_session(self, self.learning_unit_year.id))
+        self.assert_enrollments_equal(
+            self.exam_enrollments,
+            [("score_draft", 16), ("justification_draft", exam_enrollment_justification_type.ABSENCE_UNJUSTIFIED)]
+        )
+
+    @mock.patch("assessments.tasks.default_storage")
+    def test_import_job_refused_when_another_import_is_running(self, mock_storage):
+        lock_import_in_another_session(self, self.learning_unit_year.id)
+        result = tasks.import_score_sheet.apply(
+            args=[self.a_user.pk, self.learning_unit_year.id, "score_sheets/job.xlsx", "en"],
+            task_id="job"
+        ).get()
+
+        self.assertFalse(result['scores_saved'])
+        self.assertEqual(
+            result['messages'],
+            [{'level': 'error', 'message': str(_("A score sheet is already being imported for this learning unit"))}]
+        )
+        self.assertFalse(mock_storage.open.called)
+        mock_storage.delete.assert_called_once_with("score_sheets/job.xlsx")
+
+    @mock.patch("assessments.tasks.default_storage")
+    def test_import_job_of_unknown_user(self, mock_storage):
+        with self.assertRaises(User.DoesNotExist):
+            tasks.import_score_sheet.apply(
+                args=[self.a_user.pk + 1, self.learning_unit_year.id, "score_sheets/job.xlsx", "en"],
+                task_id="job"
+            ).get()
+
+        mock_storage.delete.assert_called_once_with("score_sheets/job.xlsx")
@@ -67,6 +67,10 @@ urlpatterns = [
             score_encoding.export_xls, name='scores_encoding_download'),
         url(r'^upload/(?P<learning_unit_year_id>[0-9]+)/$',
             upload_xls_utils.upload_scores_file, name='upload_encoding'),
+        url(r'^upload/(?P<learning_unit_year_id>[0-9]+)/async/$',
+            upload_xls_utils.upload_scores_file_async, name='upload_encoding_async'),
+        url(r'^upload/(?P<learning_unit_year_id>[0-9]+)/status/(?P<job_id>[0-9a-f-]+)/$',
+            upload_xls_utils.upload_scores_file_status, name='upload_encoding_status'),
     ])),
 
     url(r'^jsi18n/', JavaScriptCatalog.as_view(), js_info_dict),
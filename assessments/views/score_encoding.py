@@ -53,6 +53,8 @@ from osis_common.queue.queue_sender import send_message
 logger = logging.getLogger(settings.DEFAULT_LOGGER)
 queue_exception_logger = logging.getLogger(settings.QUEUE_EXCEPTION_LOGGER)
 
+ONLINE_ENCODING_PAGE_SIZE = 100
+
 
 def _is_inside_scores_encodings_period(user):
     return mdl.session_exam_calendar.current_session_exam()
@@ -226,17 +228,17 @@ def online_encoding_form(request, learning_unit_year_id=None):
 
         updated_enrollments = _update_enrollments(request, scores_list_encoded, updated_enrollments)
 
-        context = _get_common_encoding_context(request, learning_unit_year_id)
         if messages.get_messages(request):
-            context = _preserve_encoded_values(request, context)
+            context = _preserve_encoded_values(request, _get_encoding_form_context(request, learning_unit_year_id))
         else:
+            context = _get_common_encoding_context(request, learning_unit_year_id)
             template_name = "online_encoding.html"
             send_messages_to_notify_encoding_progress(context["enrollments"],
                                                       context["learning_unit_year"],
                                                       context["is_program_manager"],
                                                       updated_enrollments)
     else:
-        context = _get_common_encoding_context(request, learning_unit_year_id)
+        context = _get_encoding_form_context(request, learning_unit_year_id)
     return render(request, template_name, context)
 
 
@@ -248,6 +250,7 @@ def online_encoding_submission(request, learning_unit_year_id):
     scores_list = score_encoding_list.get_scores_encoding_list(user=request.user,
                                                                learning_unit_year_id=learning_unit_year_id)
     submitted_enrollments = []
+    enrollments_to_save = []
     draft_scores_not_sumitted_yet = scores_list.enrollment_draft_not_submitted
     not_submitted_enrollments = set([
         ex for ex in scores_list.enrollments
@@ -263,10 +266,13 @@ def online_encoding_submission(request, learning_unit_year_id):
                 exam_enroll.score_final = exam_enroll.score_draft
             if exam_enroll.justification_draft:
                 exam_enroll.justification_final = exam_enroll.justification_draft
-            exam_enroll.full_clean()
-            with transaction.atomic():
-                exam_enroll.save()
-                mdl.exam_enrollment.create_exam_enrollment_historic(request.user, exam_enroll)
+            exam_enroll.full_clean(exclude=['session_exam', 'learning_unit_enrollment'])
+            enrollments_to_save.append(exam_enroll)
+
+    # The submission is always kept in the history
+    score_encoding_list.bulk_save_enrollments(enrollments_to_save, request.user,
+                                              is_program_manager=mdl.program_manager.is_program_manager(request.user),
+                                              create_history=True)
 
     # Send mail to all the teachers of the submitted learning unit on any submission
     all_encoded = len(not_submitted_enrollments) == 0
@@ -336,9 +342,16 @@ def online_double_encoding_form(request, learning_unit_year_id=None):
             context = _get_double_encoding_context(request, learning_unit_year_id)
             context = _preserve_encoded_values(request, context)
             return online_double_encoding_get_form(request, context, learning_unit_year_id)
-        elif not scores_list:
+        elif not scores_list.enrollments:
             messages.add_message(request, messages.WARNING, _("No double score encoded ; nothing to compare."))
             return online_encoding(request, learning_unit_year_id=learning_unit_year_id)
+
+        is_program_manager = mdl.program_manager.is_program_manager(request.user)
+        scores_list = score_encoding_list.keep_double_encoding_differences(scores_list, is_program_manager)
+        if not scores_list.enrollments:
+            messages.add_message(request, messages.SUCCESS,
+                                 _("The double encoding is identical to the first one ; nothing to validate."))
+            return online_encoding(request, learning_unit_year_id=learning_unit_year_id)
         else:
             context = _get_double_encoding_context(request, learning_unit_year_id)
             context['enrollments'] = scores_list.enrollments
@@ -354,7 +367,9 @@ def online_double_encoding_validation(request, learning_unit_year_id=None):
         updated_enrollments = None
         scores_list_encoded = _get_score_encoding_list_with_only_enrollment_modified(request, learning_unit_year_id)
 
-        updated_enrollments = _update_enrollments(request, scores_list_encoded, updated_enrollments)
+        # All the chosen values are validated together
+        updated_enrollments = _update_enrollments(request, scores_list_encoded, updated_enrollments,
+                                                  update_function=score_encoding_list.bulk_update_enrollments)
 
         if updated_enrollments:
             is_program_manager = mdl.program_manager.is_program_manager(request.user)
@@ -369,9 +384,10 @@ def online_double_encoding_validation(request, learning_unit_year_id=None):
     return HttpResponseRedirect(reverse('online_encoding', args=(learning_unit_year_id,)))
 
 
-def _update_enrollments(request, scores_list_encoded, updated_enrollments):
+def _update_enrollments(request, scores_list_encoded, updated_enrollments,
+                        update_function=score_encoding_list.update_enrollments):
     try:
-        updated_enrollments = score_encoding_list.update_enrollments(
+        updated_enrollments = update_function(
             scores_encoding_list=scores_list_encoded,
             user=request.user)
     except Exception as e:
@@ -390,12 +406,11 @@ def notes_printing_all(request, tutor_id=None, offer_id=None):
 @permission_required('assessments.can_access_scoreencoding', raise_exception=True)
 @user_passes_test(_is_inside_scores_encodings_period, login_url=reverse_lazy('outside_scores_encodings_period'))
 def export_xls(request, learning_unit_year_id):
-    is_program_manager = mdl.program_manager.is_program_manager(request.user)
-    scores_list = score_encoding_list.get_scores_encoding_list(request.user,
-                                                               learning_unit_year_id=learning_unit_year_id)
-    scores_list = score_encoding_list.filter_without_closed_exam_enrollments(scores_list, is_program_manager)
-    if scores_list.enrollments:
-        return score_encoding_export.export_xls(scores_list.enrollments)
+    enrollments = score_encoding_list.find_enrollments_to_export(request.user, learning_unit_year_id)
+    if enrollments.exists():
+        return score_encoding_export.export_xls_streaming(
+            enrollments.iterator(chunk_size=score_encoding_export.EXPORT_CHUNK_SIZE)
+        )
     else:
         messages.add_message(request, messages.WARNING, _("No students to encode by excel"))
         return HttpResponseRedirect(reverse('online_encoding', args=(learning_unit_year_id,)))
@@ -546,6 +561,36 @@ def _get_common_encoding_context(request, learning_unit_year_id):
     return context
 
 
+def _get_encoding_form_context(request, learning_unit_year_id):
+    """ Context of the online encoding form, which only displays (and saves) one page of the enrollments """
+    scores_list = score_encoding_list.get_scores_encoding_list_page(user=request.user,
+                                                                    learning_unit_year_id=learning_unit_year_id,
+                                                                    cursor=request.GET.get('cursor'),
+                                                                    page_size=ONLINE_ENCODING_PAGE_SIZE)
+    score_responsibles = mdl_attr.attribution.find_all_responsibles_by_learning_unit_year(
+        scores_list.learning_unit_year
+    )
+    tutors = mdl.tutor.find_by_learning_unit(scores_list.learning_unit_year) \
+        .exclude(id__in=[score_responsible.id for score_responsible in score_responsibles])
+
+    next_page_url = None
+    if scores_list.next_cursor:
+        query_params = request.GET.copy()
+        query_params['cursor'] = scores_list.next_cursor
+        next_page_url = "{}?{}".format(request.path, query_params.urlencode())
+
+    context = {
+        'section': 'scores_encoding',
+        'is_program_manager': mdl.program_manager.is_program_manager(request.user),
+        'score_responsibles': list(score_responsibles),
+        'tutors': list(tutors),
+        'total_exam_enrollments': scores_list.enrolled_count,
+        'next_page_url': next_page_url,
+    }
+    context.update(scores_list.__dict__)
+    return context
+
+
 def _get_specific_criteria_context(request):
     post_data = request.POST
     registration_id = post_data.get('registration_id')
@@ -42,6 +42,35 @@ def find_attribution_charge_new_by_learning_unit_year_as_dict(learning_unit_year
     return create_attributions_dictionary(attribution_charges)
 
 
+def find_attribution_charge_new_by_learning_unit_years_as_dict(learning_unit_year_ids):
+    """
+    Return the attributions dictionary (see create_attributions_dictionary) of each learning unit year by its id,
+    with the charges, tutors and persons of all the learning unit years fetched at once.
+    """
+    attribution_charges = AttributionChargeNew.objects \
+        .filter(learning_component_year__learning_unit_year_id__in=learning_unit_year_ids) \
+        .select_related('learning_component_year', 'attribution__tutor__person').order_by('attribution__tutor__person')
+    charges_by_learning_unit_year = {learning_unit_year_id: [] for learning_unit_year_id in learning_unit_year_ids}
+    for attribution_charge in attribution_charges:
+        charges_by_learning_unit_year[attribution_charge.learning_component_year.learning_unit_year_id].append(
+            attribution_charge
+        )
+    return {
+        learning_unit_year_id: create_attributions_dictionary(charges)
+        for learning_unit_year_id, charges in charges_by_learning_unit_year.items()
+    }
+
+
+def add_attribution_charge_news(learning_unit_years):
+    """ Set the attributions dictionary of each learning unit year in its attribution_charge_news attribute """
+    attributions = find_attribution_charge_new_by_learning_unit_years_as_dict(
+        {learning_unit_year.id for learning_unit_year in learning_unit_years}
+    )
+    for learning_unit_year in learning_unit_years:
+        learning_unit_year.attribution_charge_news = attributions[learning_unit_year.id]
+    return learning_unit_years
+
+
 def create_attributions_dictionary(attribution_charges):
     attributions = {}
     for attribution_charge in attribution_charges:
@@ -26,7 +26,8 @@
 
 from django.test import TestCase
 
-from attribution.business.attribution_charge_new import find_attribution_charge_new_by_learning_unit_year_as_dict
+from attribution.business.attribution_charge_new import find_attribution_charge_new_by_learning_unit_year_as_dict, \
+    find_attribution_charge_new_by_learning_unit_years_as_dict
 from attribution.tests.factories.attribution_charge_new import AttributionChargeNewFactory
 from base.models.enums import learning_unit_year_subtypes
 from base.tests.factories.academic_year import AcademicYearFactory
@@ -51,3 +52,15 @@ class TestAttributionChargeNew(TestCase):
     def test_find_attribution_charge_new_by_learning_unit_year(self):
         result = find_attribution_charge_new_by_learning_unit_year_as_dict(self.l_unit_1)
         self.assertEqual(len(result), 5)
+
+    def test_find_attribution_charge_new_by_learning_unit_years(self):
+        l_unit_without_attribution = LearningUnitYearFactory(academic_year=self.academic_year)
+        with self.assertNumQueries(1):
+            result = find_attribution_charge_new_by_learning_unit_years_as_dict(
+                [self.l_unit_1.id, l_unit_without_attribution.id]
+            )
+        self.assertEqual(
+            result[self.l_unit_1.id],
+            find_attribution_charge_new_by_learning_unit_year_as_dict(self.l_unit_1)
+        )
+        self.assertEqual(result[l_unit_without_attribution.id], {})
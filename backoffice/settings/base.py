@@ -451,6 +451,12 @@ else:
 
 CACHES = {"default": CACHE_CONFIG}
 
+# Lifetime (in seconds) of the program trees kept in cache ; 0 disables the cache of program trees.
+# The invalidations must be seen by every process : it is only enabled by default with a shared cache (redis).
+PROGRAM_TREE_CACHE_TIMEOUT = int(
+    os.environ.get("PROGRAM_TREE_CACHE_TIMEOUT", 60 * 60 * 24 if BACKEND_CACHE == 'redis' else 0)
+)
+
 
 WAFFLE_FLAG_DEFAULT = os.environ.get("WAFFLE_FLAG_DEFAULT", "False").lower() == 'true'
 
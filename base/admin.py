@@ -34,6 +34,9 @@ admin.site.register(academic_calendar.AcademicCalendar,
 admin.site.register(academic_year.AcademicYear,
                     academic_year.AcademicYearAdmin)
 
+admin.site.register(academic_year_entity_acronym.AcademicYearEntityAcronym,
+                    academic_year_entity_acronym.AcademicYearEntityAcronymAdmin)
+
 admin.site.register(admission_condition.AdmissionCondition,
                     admission_condition.AdmissionConditionAdmin)
 
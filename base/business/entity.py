@@ -39,13 +39,8 @@ def get_entities_ids(entity_acronym, with_entity_subordinated):
         entity_versions = EntityVersion.objects.filter(acronym__iregex=entity_acronym)
         entities_ids = set(entity_versions.values_list('entity', flat=True))
 
-        if with_entity_subordinated and entity_versions:
-            # it is not possible to have the list of descendants
-            # when the entity_version is empty
-            list_descendants = EntityVersion.objects.get_tree(
-                Entity.objects.filter(entityversion__acronym__iregex=entity_acronym)
-            )
-            entities_ids |= {row["entity_id"] for row in list_descendants}
+        if with_entity_subordinated and entities_ids:
+            entities_ids |= entity_version.find_descendant_entity_ids(entities_ids)
 
         return list(entities_ids)
     return []
@@ -34,6 +34,7 @@ from openpyxl.utils import get_column_letter
 
 from attribution.business import attribution_charge_new
 from attribution.models.enums.function import Functions
+from base.business.learning_units.component_volumes import add_component_volumes
 from base.business.xls import get_name_or_username, _get_all_columns_reference
 from base.models.enums.learning_component_year_type import LECTURING, PRACTICAL_EXERCISES
 from base.models.enums.proposal_type import ProposalType
@@ -90,13 +91,17 @@ def learning_unit_titles_part1():
 
 
 def prepare_xls_content(learning_unit_years, with_grp=False, with_attributions=False):
-    qs = annotate_qs(learning_unit_years)
+    qs = learning_unit_years
 
     if with_grp:
         qs = qs.annotate(
             closest_trainings=RawSQL(SQL_RECURSIVE_QUERY_EDUCATION_GROUP_TO_CLOSEST_TRAININGS, ())
         ).prefetch_related('child_leaf__parent')
 
+    qs = add_component_volumes(qs)
+    if with_attributions:
+        attribution_charge_new.add_attribution_charge_news(qs)
+
     result = []
 
     for learning_unit_yr in qs:
@@ -113,7 +118,10 @@ def prepare_xls_content(learning_unit_years, with_grp=False, with_attributions=F
 
 
 def annotate_qs(learning_unit_years):
-    """ Fetch directly in the queryset all volumes data."""
+    """
+    Fetch directly in the queryset all volumes data.
+    The exports use add_component_volumes instead, which fetches the volumes of all the rows in a single query.
+    """
 
     subquery_component = LearningComponentYear.objects.filter(
         learning_unit_year__in=OuterRef('pk')
@@ -284,11 +292,7 @@ def _get_data_part2(learning_unit_yr, with_attributions):
     if with_attributions:
         lu_data_part2.append(
             " \n".join(
-                [_get_attribution_line(value)
-                 for value in attribution_charge_new.find_attribution_charge_new_by_learning_unit_year_as_dict(
-                    learning_unit_yr
-                ).values()
-                ]
+                [_get_attribution_line(value) for value in learning_unit_yr.attribution_charge_news.values()]
             )
         )
     lu_data_part2.append(learning_unit_yr.get_periodicity_display())
@@ -415,7 +419,7 @@ def create_xls_attributions(user, found_learning_units, filters):
 
 def prepare_xls_content_with_attributions(found_learning_units, nb_columns):
     data = []
-    qs = annotate_qs(found_learning_units)
+    qs = attribution_charge_new.add_attribution_charge_news(add_component_volumes(found_learning_units))
     cells_with_top_border = []
     cells_with_white_font = []
     line = 2
@@ -429,8 +433,7 @@ def prepare_xls_content_with_attributions(found_learning_units, nb_columns):
 
         lu_data_part1.extend(lu_data_part2)
 
-        attributions_values = attribution_charge_new.find_attribution_charge_new_by_learning_unit_year_as_dict(
-            learning_unit_yr).values()
+        attributions_values = learning_unit_yr.attribution_charge_news.values()
         if attributions_values:
             for value in attributions_values:
                 data.append(lu_data_part1+_get_attribution_detail(value))
@@ -0,0 +1,94 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+from django.db.models import Max, Q
+
+from base.models.enums.learning_component_year_type import LECTURING, PRACTICAL_EXERCISES
+from base.models.learning_component_year import LearningComponentYear
+
+COMPONENT_FIELDS = {
+    'vol_q1': 'hourly_volume_partial_q1',
+    'vol_q2': 'hourly_volume_partial_q2',
+    'vol_tot': 'hourly_volume_total_annual',
+    'classes': 'planned_classes',
+}
+COMPONENT_PREFIXES = {
+    'pm': LECTURING,
+    'pp': PRACTICAL_EXERCISES,
+}
+
+# Same names as the annotations of base.business.learning_unit_xls.annotate_qs
+VOLUME_COLUMNS = tuple(
+    "{}_{}".format(prefix, column) for prefix in COMPONENT_PREFIXES for column in COMPONENT_FIELDS
+)
+
+
+class ComponentVolumes:
+    """
+    Volumes of the lecturing and practical components of a set of learning unit years.
+
+    The components are fetched with a single query grouping them by learning unit year, with a column by volume
+    and component type. The volumes are kept by column, in the order of learning_unit_year_ids.
+    A learning unit year without component of a type has None as volumes of this type.
+    """
+
+    def __init__(self, learning_unit_year_ids):
+        self.learning_unit_year_ids = list(dict.fromkeys(learning_unit_year_ids))
+        self._positions = {luy_id: position for position, luy_id in enumerate(self.learning_unit_year_ids)}
+        self.columns = {column: [None] * len(self.learning_unit_year_ids) for column in VOLUME_COLUMNS}
+
+        rows = LearningComponentYear.objects.filter(
+            learning_unit_year_id__in=self.learning_unit_year_ids
+        ).order_by().values('learning_unit_year_id').annotate(**_pivot_aggregates())
+        for row in rows:
+            position = self._positions[row['learning_unit_year_id']]
+            for column, values in self.columns.items():
+                values[position] = row[column]
+
+    def get_row(self, learning_unit_year_id):
+        position = self._positions[learning_unit_year_id]
+        return {column: values[position] for column, values in self.columns.items()}
+
+    def add_to(self, learning_unit_years):
+        """ Set the volumes of each learning unit year as its attributes, as annotate_qs would do """
+        for learning_unit_year in learning_unit_years:
+            for column, value in self.get_row(learning_unit_year.id).items():
+                setattr(learning_unit_year, column, value)
+        return learning_unit_years
+
+
+def add_component_volumes(learning_unit_years):
+    learning_unit_years = list(learning_unit_years)
+    return ComponentVolumes(
+        [learning_unit_year.id for learning_unit_year in learning_unit_years]
+    ).add_to(learning_unit_years)
+
+
+def _pivot_aggregates():
+    return {
+        "{}_{}".format(prefix, column): Max(field, filter=Q(type=component_type))
+        for prefix, component_type in COMPONENT_PREFIXES.items()
+        for column, field in COMPONENT_FIELDS.items()
+    }
@@ -36,7 +36,6 @@ from backoffice.settings.base import LANGUAGE_CODE_FR, LANGUAGE_CODE_EN
 from base.business.learning_unit import CMS_LABEL_PEDAGOGY_FR_ONLY, \
     CMS_LABEL_PEDAGOGY, CMS_LABEL_PEDAGOGY_FR_AND_EN
 from base.business.learning_unit import CMS_LABEL_SPECIFICATIONS, get_achievements_group_by_language
-from base.business.learning_unit_xls import annotate_qs
 from base.business.xls import get_name_or_username
 from base.models.person import get_user_interface_language
 from base.models.teaching_material import TeachingMaterial
@@ -110,12 +109,11 @@ def get_html_to_text(text_to_convert):
 
 
 def prepare_xls_educational_information_and_specifications(learning_unit_years, request):
-    qs = annotate_qs(learning_unit_years)
     user_language = get_user_interface_language(request.user)
 
     result = []
 
-    for learning_unit_yr in qs:
+    for learning_unit_yr in learning_unit_years:
         translated_labels_with_text = _get_translated_labels_with_text(learning_unit_yr.id, user_language)
         teaching_materials = TeachingMaterial.objects.filter(learning_unit_year=learning_unit_yr).order_by('order')
 
@@ -0,0 +1,148 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+import hashlib
+import re
+import uuid
+
+from django.core.cache import cache
+from django.http import HttpRequest, QueryDict
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from backoffice.celery import app as celery_app
+
+XLS_STATUS_PARAM = 'xls_status'
+XLS_BACKGROUND_PARAM = 'xls_background'
+
+EXPORT_FILE_PATH = "search_exports/{job_id}.xlsx"
+DEFAULT_EXPORT_FILE_NAME = "export.xlsx"
+
+# An identical export (same user, same search, same parameters) requested within this delay reuses the same job.
+# The generated file is kept longer than this delay so that a reused job always has its file.
+EXPORT_REUSE_KEY = "xls_export_{digest}"
+EXPORT_REUSE_TIMEOUT = 60 * 10
+# Only one of the concurrent requests reusing a failed job launches the job replacing it
+EXPORT_RELAUNCH_KEY = "xls_export_relaunch_{job_id}"
+EXPORT_FILE_LIFETIME = 60 * 60
+
+STATE_PENDING = 'PENDING'
+STATE_SUCCESS = 'SUCCESS'
+STATE_FAILURE = 'FAILURE'
+
+
+def reserve_job(user, view_path, query_dict):
+    """
+    Return the id of the job generating the export and whether it must be launched.
+    The job of an identical export which is running or done is reused, unless it failed.
+    """
+    key = EXPORT_REUSE_KEY.format(digest=_get_export_digest(user, view_path, query_dict))
+    job_id = str(uuid.uuid4())
+    if cache.add(key, job_id, EXPORT_REUSE_TIMEOUT):
+        return job_id, True
+
+    existing_job_id = cache.get(key)
+    if not existing_job_id:
+        # Expired since cache.add
+        cache.set(key, job_id, EXPORT_REUSE_TIMEOUT)
+        return job_id, True
+    if celery_app.AsyncResult(existing_job_id).state != STATE_FAILURE:
+        return existing_job_id, False
+
+    relaunch_key = EXPORT_RELAUNCH_KEY.format(job_id=existing_job_id)
+    if not cache.add(relaunch_key, job_id, EXPORT_REUSE_TIMEOUT):
+        return cache.get(relaunch_key, existing_job_id), False
+    cache.set(key, job_id, EXPORT_REUSE_TIMEOUT)
+    return job_id, True
+
+
+def get_export_query_string(query_dict):
+    """ Snapshot of the search parameters given to the job, without the parameter asking for a background export """
+    query_dict = query_dict.copy()
+    query_dict.pop(XLS_BACKGROUND_PARAM, None)
+    return query_dict.urlencode()
+
+
+def _get_export_digest(user, view_path, query_dict):
+    parameters = sorted(
+        (key, value) for key, values in query_dict.lists() if key != XLS_BACKGROUND_PARAM for value in values
+    )
+    return hashlib.sha1(repr((user.pk, view_path, parameters)).encode()).hexdigest()
+
+
+def get_job_status(job_id, user):
+    """
+    Return the state of the export job and the url of the file once it is generated.
+    A job which is not launched by the user is reported as pending, like an unknown job.
+    """
+    result = celery_app.AsyncResult(job_id)
+    if result.state == STATE_FAILURE:
+        return {'state': STATE_FAILURE}
+    info = result.info if isinstance(result.info, dict) else {}
+    if result.state != STATE_SUCCESS or info.get('user_id') != user.pk:
+        return {'state': STATE_PENDING}
+    return {
+        'state': STATE_SUCCESS,
+        'file_name': info['file_name'],
+        'download_url': reverse('xls_export_download', args=[job_id]),
+    }
+
+
+def get_export_file(job_id, user):
+    """ Return the path and the name of the generated file, or None when the export of the user is not done """
+    result = celery_app.AsyncResult(job_id)
+    info = result.info if isinstance(result.info, dict) else {}
+    if result.state != STATE_SUCCESS or info.get('user_id') != user.pk:
+        return None
+    return info['file_path'], info['file_name']
+
+
+def render_export(user, view_path, query_string, language):
+    """
+    Generate the export as the search view would do it synchronously, by running its excel renderer
+    (see base.utils.search.RenderToExcel) on the filter built from the saved parameters.
+    """
+    view_class = import_string(view_path)
+    request = HttpRequest()
+    request.method = 'GET'
+    request.GET = QueryDict(query_string)
+    request.user = user
+    request.LANGUAGE_CODE = language
+
+    view = view_class()
+    view.setup(request)
+    filterset = view.get_filterset(view.get_filterset_class())
+    context = {
+        'filter': filterset,
+        'form': filterset.form,
+        'object_list': filterset.qs if filterset.is_valid() else filterset.queryset.none(),
+    }
+    render_method = view_class.xls_renderers[request.GET[XLS_STATUS_PARAM]]
+    return render_method(view, context)
+
+
+def get_file_name(response):
+    match = re.search(r'filename="?([^";]+)"?', response.get('Content-Disposition', ''))
+    return match.group(1).strip() if match else DEFAULT_EXPORT_FILE_NAME
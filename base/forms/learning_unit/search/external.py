@@ -28,11 +28,11 @@ from django.db.models import BLANK_CHOICE_DASH, OuterRef, Exists
 from django.utils.translation import gettext_lazy as _, pgettext_lazy
 from django_filters import FilterSet, filters, OrderingFilter
 
-from base.forms.utils.filter_field import filter_field_by_regex
+from base.forms.utils.filter_field import filter_concatenated_fields_by_regex
 from base.models.academic_year import AcademicYear, starting_academic_year
 from base.models.campus import Campus
 from base.models.enums import active_status
-from base.models.learning_unit_year import LearningUnitYear, LearningUnitYearQuerySet
+from base.models.learning_unit_year import LearningUnitYear, LearningUnitYearQuerySet, FULL_TITLE_FIELDS
 from base.models.organization_address import OrganizationAddress
 from base.models.proposal_learning_unit import ProposalLearningUnit
 from base.views.learning_units.search.common import SearchTypes
@@ -185,4 +185,4 @@ class ExternalLearningUnitFilter(FilterSet):
         return qs
 
     def filter_learning_unit_year_field(self, queryset, name, value):
-        return filter_field_by_regex(queryset, name, value)
+        return filter_concatenated_fields_by_regex(queryset, name, value, FULL_TITLE_FIELDS[name])
@@ -28,12 +28,13 @@ from django.db.models import Q, OuterRef, Exists
 from django.utils.translation import gettext_lazy as _, pgettext_lazy
 from django_filters import FilterSet, filters, OrderingFilter
 
+from attribution.models.attribution_charge_new import AttributionChargeNew
 from base.business.entity import get_entities_ids
-from base.forms.utils.filter_field import filter_field_by_regex
+from base.forms.utils.filter_field import filter_concatenated_fields_by_regex
 from base.models.academic_year import AcademicYear, starting_academic_year
 from base.models.enums import quadrimesters, learning_unit_year_subtypes, active_status, learning_container_year_types
 from base.models.enums.learning_container_year_types import LearningContainerYearType
-from base.models.learning_unit_year import LearningUnitYear, LearningUnitYearQuerySet
+from base.models.learning_unit_year import LearningUnitYear, LearningUnitYearQuerySet, FULL_TITLE_FIELDS
 from base.models.proposal_learning_unit import ProposalLearningUnit
 from base.views.learning_units.search.common import SearchTypes
 
@@ -157,13 +158,7 @@ class LearningUnitFilter(FilterSet):
         self.form.fields["academic_year"].initial = starting_academic_year()
 
     def filter_tutor(self, queryset, name, value):
-        for tutor_name in value.split():
-            queryset = queryset.filter(
-                Q(learningcomponentyear__attributionchargenew__attribution__tutor__person__first_name__iregex=tutor_name
-                  ) |
-                Q(learningcomponentyear__attributionchargenew__attribution__tutor__person__last_name__iregex=tutor_name)
-            ).distinct()
-        return queryset
+        return filter_by_tutor(queryset, value)
 
     def filter_container_type(self, queryset, name, value):
         if value == MOBILITY:
@@ -198,7 +193,7 @@ class LearningUnitFilter(FilterSet):
         return queryset
 
     def filter_learning_unit_year_field(self, queryset, name, value):
-        return filter_field_by_regex(queryset, name, value)
+        return filter_concatenated_fields_by_regex(queryset, name, value, FULL_TITLE_FIELDS[name])
 
 
 def filter_by_entities(name, queryset, value, with_subordinated):
@@ -207,3 +202,20 @@ def filter_by_entities(name, queryset, value, with_subordinated):
         entity_ids = get_entities_ids(value, with_subordinated)
         queryset = queryset.filter(**{lookup_expression: entity_ids})
     return queryset
+
+
+def filter_by_tutor(queryset, value):
+    """ Learning unit years with, for each word of value, a tutor whose first or last name matches it """
+    # One EXISTS by word (instead of one join by word followed by a distinct)
+    for index, tutor_name in enumerate(value.split()):
+        has_tutor = "has_tutor_{}".format(index)
+        queryset = queryset.annotate(**{
+            has_tutor: Exists(
+                AttributionChargeNew.objects.filter(
+                    Q(attribution__tutor__person__first_name__iregex=tutor_name) |
+                    Q(attribution__tutor__person__last_name__iregex=tutor_name),
+                    learning_component_year__learning_unit_year=OuterRef('pk'),
+                )
+            )
+        }).filter(**{has_tutor: True})
+    return queryset
@@ -24,12 +24,13 @@
 #
 ##############################################################################
 from django import forms
-from django.db.models import Q, OuterRef, Subquery, Exists
+from django.db.models import OuterRef, Subquery, Exists
 from django.utils.translation import gettext_lazy as _, pgettext_lazy
 from django_filters import FilterSet, filters, OrderingFilter
 
 from base.business import event_perms
 from base.business.entity import get_entities_ids
+from base.forms.learning_unit.search.simple import filter_by_tutor
 from base.models.academic_year import AcademicYear
 from base.models.entity import Entity
 from base.models.entity_version import EntityVersion
@@ -180,17 +181,7 @@ class ProposalLearningUnitFilter(FilterSet):
         return queryset
 
     def filter_tutor(self, queryset, name, value):
-        for tutor_name in value.split():
-            filter_by_first_name = Q(
-                learningcomponentyear__attributionchargenew__attribution__tutor__person__first_name__iregex=tutor_name
-            )
-            filter_by_last_name = Q(
-                learningcomponentyear__attributionchargenew__attribution__tutor__person__last_name__iregex=tutor_name
-            )
-            queryset = queryset.filter(
-                filter_by_first_name | filter_by_last_name
-            ).distinct()
-        return queryset
+        return filter_by_tutor(queryset, value)
 
     @property
     def get_queryset(self):
@@ -23,6 +23,9 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
+import re
+
+from django.db.models import Q
 
 CHARACTER_TO_ESCAPE = [
     '[',
@@ -41,3 +44,21 @@ def filter_field_by_regex(queryset, name, value):
         search_string = r"({})".format(value)
         queryset = queryset.filter(**{filter_field: search_string})
     return queryset
+
+
+# Search values without regex operator, separator nor leading/trailing space
+LITERAL_WORDS_REGEX = re.compile(r"[^\s\-.^$|?*+{}\[\]()\\]+( [^\s\-.^$|?*+{}\[\]()\\]+)*")
+
+
+def filter_concatenated_fields_by_regex(queryset, name, value, fields):
+    """
+    Same as filter_field_by_regex on the annotation `name` which concatenates `fields` with ' - '.
+    When the value cannot match across the separator, the fields themselves are filtered so that their
+    (trigram) indexes can be used.
+    """
+    if value and LITERAL_WORDS_REGEX.fullmatch(value):
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{"{}__iregex".format(field): value})
+        return queryset.filter(condition)
+    return filter_field_by_regex(queryset, name, value)
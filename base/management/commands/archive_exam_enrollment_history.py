@@ -0,0 +1,76 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+import csv
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from base.models.exam_enrollment import ExamEnrollmentHistory
+
+ARCHIVED_FIELDS = ('id', 'exam_enrollment_id', 'person_id', 'score_final', 'justification_final',
+                   'modification_date')
+
+
+class Command(BaseCommand):
+    help = "Archive in a CSV file, then delete, the exam enrollment history older than the retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="CSV file in which the deleted history is archived")
+        parser.add_argument('--keep-years', type=int, default=5, help="Number of years of history to keep")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Number of rows deleted by transaction")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows to archive")
+
+    def handle(self, *args, **options):
+        if options['keep_years'] < 1:
+            raise CommandError("At least one year of history must be kept")
+        limit_date = timezone.now() - datetime.timedelta(days=365 * options['keep_years'])
+        history_to_archive = ExamEnrollmentHistory.objects.filter(modification_date__lt=limit_date)
+
+        if options['dry_run']:
+            self.stdout.write("{} history rows older than {:%Y-%m-%d}".format(history_to_archive.count(), limit_date))
+            return
+
+        archived = 0
+        with open(options['output'], 'w', newline='') as output:
+            writer = csv.DictWriter(output, fieldnames=ARCHIVED_FIELDS)
+            writer.writeheader()
+            while True:
+                with transaction.atomic():
+                    rows = list(history_to_archive.order_by('modification_date', 'id')
+                                .values(*ARCHIVED_FIELDS)[:options['batch_size']])
+                    if not rows:
+                        break
+                    writer.writerows(rows)
+                    # The rows are only deleted once they are written in the archive
+                    output.flush()
+                    ExamEnrollmentHistory.objects.filter(id__in=[row['id'] for row in rows]).delete()
+                archived += len(rows)
+
+        self.stdout.write(
+            self.style.SUCCESS("{} history rows older than {:%Y-%m-%d} archived".format(archived, limit_date))
+        )
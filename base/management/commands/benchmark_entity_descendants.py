@@ -0,0 +1,103 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+import datetime
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from base.models.entity import Entity
+from base.models.entity_version import EntityVersion, EntityVersionHierarchy, find_latest_version
+from base.models.enums import entity_type
+from base.utils.db import rollback_atomic
+
+TYPES_BY_LEVEL = [entity_type.SECTOR, entity_type.FACULTY, entity_type.SCHOOL, entity_type.INSTITUTE]
+
+
+class Command(BaseCommand):
+    """Compare the descendants lookups of the recursive query and of the in-memory hierarchy on an organigram."""
+
+    help = "Benchmark the entity descendants lookups on a generated organigram (rolled back at the end)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entities', type=int, default=5000, help="Number of entities of the organigram")
+        parser.add_argument('--children', type=int, default=10, help="Number of children by entity")
+        parser.add_argument('--samples', type=int, default=50, help="Number of faculties to look up")
+
+    def handle(self, *args, **options):
+        with rollback_atomic():
+            self._run(options['entities'], options['children'], options['samples'])
+
+    def _run(self, nb_entities, nb_children, nb_samples):
+        today = datetime.date.today()
+        faculty_ids = self._create_organigram(nb_entities, nb_children, today)[:nb_samples]
+
+        start = time.perf_counter()
+        for faculty_id in faculty_ids:
+            EntityVersion.objects.get_tree([faculty_id], date=today)
+        query_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hierarchy = EntityVersionHierarchy(find_latest_version(date=today))
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for faculty_id in faculty_ids:
+            hierarchy.get_descendant_entity_ids([faculty_id])
+        lookup_time = time.perf_counter() - start
+
+        self.stdout.write("{} entity versions, {} faculties looked up".format(len(hierarchy), len(faculty_ids)))
+        self.stdout.write("{:<32} {:>12}".format('', 'time (ms)'))
+        self.stdout.write("{:<32} {:>12.2f}".format('recursive query', query_time * 1000))
+        self.stdout.write("{:<32} {:>12.2f}".format('hierarchy build (once per date)', build_time * 1000))
+        self.stdout.write("{:<32} {:>12.2f}".format('hierarchy lookups', lookup_time * 1000))
+
+    @staticmethod
+    def _create_organigram(nb_entities, nb_children, start_date):
+        """ Create the organigram level by level and return the ids of its faculties """
+        entity_ids_by_level = []
+        parent_ids = [None]
+        nb_created = 0
+        while nb_created < nb_entities:
+            level = len(entity_ids_by_level)
+            nb_to_create = min(len(parent_ids) * nb_children if level else 1, nb_entities - nb_created)
+            entities = Entity.objects.bulk_create(
+                Entity(external_id="benchmark_{}".format(uuid.uuid4())) for _ in range(nb_to_create)
+            )
+            EntityVersion.objects.bulk_create(
+                EntityVersion(
+                    entity=entity,
+                    parent_id=parent_ids[index // nb_children] if level else None,
+                    acronym="BENCH{}".format(nb_created + index),
+                    title="Benchmark {}".format(nb_created + index),
+                    entity_type=TYPES_BY_LEVEL[min(level, len(TYPES_BY_LEVEL) - 1)],
+                    start_date=start_date,
+                ) for index, entity in enumerate(entities)
+            )
+            parent_ids = [entity.pk for entity in entities]
+            entity_ids_by_level.append(parent_ids)
+            nb_created += nb_to_create
+        return entity_ids_by_level[1] if len(entity_ids_by_level) > 1 else []
@@ -0,0 +1,166 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.http import QueryDict
+
+from attribution.models.attribution_charge_new import AttributionChargeNew
+from attribution.models.attribution_new import AttributionNew
+from attribution.models.enums.function import HOLDER
+from base.forms.learning_unit.search.simple import LearningUnitFilter
+from base.forms.utils.filter_field import filter_field_by_regex
+from base.models.academic_year import AcademicYear
+from base.models.enums.learning_container_year_types import COURSE
+from base.models.learning_component_year import LearningComponentYear
+from base.models.learning_container import LearningContainer
+from base.models.learning_container_year import LearningContainerYear
+from base.models.learning_unit import LearningUnit
+from base.models.learning_unit_year import LearningUnitYear
+from base.models.person import Person
+from base.models.tutor import Tutor
+from base.utils.db import rollback_atomic
+
+WORDS = ["droit", "economie", "histoire", "chimie", "physique", "biologie", "gestion", "philosophie", "langue",
+         "analyse", "statistique", "informatique", "mathematique", "sociologie", "psychologie", "medecine",
+         "architecture", "finance", "marketing", "geographie", "litterature", "pharmacie", "ethique", "societe"]
+FIRST_NAMES = ["Jean", "Marie", "Pierre", "Sophie", "Luc", "Anne", "Paul", "Julie", "Marc", "Claire"]
+LAST_NAMES = ["Dupont", "Martin", "Lambert", "Dubois", "Peeters", "Janssens", "Maes", "Jacobs", "Mertens", "Willems",
+              "Claes", "Goossens", "Wouters", "Simon", "Laurent", "Lefebvre", "Leroy", "Renard", "Hermans", "Michel"]
+SEARCHES = [
+    {'acronym': 'LBMK0042'},
+    {'title': 'statistique'},
+    {'title': 'droit societe'},
+    {'tutor': 'Lambert'},
+    {'tutor': 'Marie Peeters'},
+]
+
+
+class Command(BaseCommand):
+    """Compare the learning unit searches with the former regex filters on the concatenated title and tutor joins."""
+
+    help = "Benchmark the learning unit search on a generated multi-year dataset (rolled back at the end)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=20, help="Number of academic years")
+        parser.add_argument('--learning-units', type=int, default=5000, help="Number of learning units by year")
+        parser.add_argument('--tutors', type=int, default=3000, help="Number of tutors")
+        parser.add_argument('--repeat', type=int, default=3, help="Number of executions of each search")
+
+    def handle(self, *args, **options):
+        with rollback_atomic():
+            self._run(options['years'], options['learning_units'], options['tutors'], options['repeat'])
+
+    def _run(self, nb_years, nb_learning_units, nb_tutors, repeat):
+        random.seed(0)
+        self._create_dataset(nb_years, nb_learning_units, nb_tutors)
+        with connection.cursor() as cursor:
+            for model in (LearningUnitYear, LearningContainerYear, Person, AttributionChargeNew):
+                cursor.execute("ANALYZE {}".format(model._meta.db_table))
+
+        self.stdout.write("{} learning unit years".format(nb_years * nb_learning_units))
+        self.stdout.write("{:<40} {:>8} {:>14} {:>14}".format('search', 'results', 'index (ms)', 'former (ms)'))
+        for search in SEARCHES:
+            data = QueryDict(mutable=True)
+            data.update(search)
+            count, index_time = self._time(lambda: LearningUnitFilter(data).qs.count(), repeat)
+            _, former_time = self._time(lambda: self._former_search(LearningUnitFilter(data), search).count(), repeat)
+            self.stdout.write("{:<40} {:>8} {:>14.2f} {:>14.2f}".format(
+                str(search), count, index_time * 1000, former_time * 1000
+            ))
+
+    @staticmethod
+    def _time(search, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = search()
+        return result, (time.perf_counter() - start) / repeat
+
+    @staticmethod
+    def _former_search(learning_unit_filter, search):
+        queryset = learning_unit_filter.get_queryset()
+        if 'acronym' in search:
+            queryset = queryset.filter(acronym__iregex=search['acronym'])
+        if 'title' in search:
+            queryset = filter_field_by_regex(queryset, 'full_title', search['title'])
+        for tutor_name in search.get('tutor', '').split():
+            queryset = queryset.filter(
+                Q(learningcomponentyear__attributionchargenew__attribution__tutor__person__first_name__iregex=tutor_name
+                  ) |
+                Q(learningcomponentyear__attributionchargenew__attribution__tutor__person__last_name__iregex=tutor_name)
+            ).distinct()
+        return queryset
+
+    @staticmethod
+    def _create_dataset(nb_years, nb_learning_units, nb_tutors):
+        persons = Person.objects.bulk_create(
+            Person(first_name=random.choice(FIRST_NAMES), last_name=random.choice(LAST_NAMES))
+            for _ in range(nb_tutors)
+        )
+        tutors = Tutor.objects.bulk_create(Tutor(person=person) for person in persons)
+        learning_units = LearningUnit.objects.bulk_create(LearningUnit() for _ in range(nb_learning_units))
+        containers = LearningContainer.objects.bulk_create(LearningContainer() for _ in range(nb_learning_units))
+        titles = [
+            (" ".join(random.sample(WORDS, 2)).capitalize(), " ".join(random.sample(WORDS, 2)).capitalize())
+            for _ in range(nb_learning_units)
+        ]
+
+        first_year = AcademicYear.objects.order_by('year').values_list('year', flat=True).first() or 2000
+        for year in range(first_year - nb_years, first_year):
+            academic_year = AcademicYear.objects.create(year=year)
+            container_years = LearningContainerYear.objects.bulk_create(
+                LearningContainerYear(
+                    academic_year=academic_year,
+                    learning_container=container,
+                    container_type=COURSE,
+                    acronym="LBMK{:04d}".format(index),
+                    common_title=titles[index][0],
+                ) for index, container in enumerate(containers)
+            )
+            learning_unit_years = LearningUnitYear.objects.bulk_create(
+                LearningUnitYear(
+                    academic_year=academic_year,
+                    learning_unit=learning_unit,
+                    learning_container_year=container_years[index],
+                    acronym="LBMK{:04d}".format(index),
+                    specific_title=titles[index][1],
+                ) for index, learning_unit in enumerate(learning_units)
+            )
+            components = LearningComponentYear.objects.bulk_create(
+                LearningComponentYear(learning_unit_year=learning_unit_year)
+                for learning_unit_year in learning_unit_years
+            )
+            attributions = AttributionNew.objects.bulk_create(
+                AttributionNew(learning_container_year=container_year, tutor=random.choice(tutors), function=HOLDER)
+                for container_year in container_years
+            )
+            AttributionChargeNew.objects.bulk_create(
+                AttributionChargeNew(attribution=attribution, learning_component_year=component)
+                for attribution, component in zip(attributions, components)
+            )
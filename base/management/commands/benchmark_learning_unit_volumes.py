@@ -0,0 +1,115 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from base.business.learning_unit_xls import annotate_qs, volume_information
+from base.business.learning_units.component_volumes import add_component_volumes
+from base.models.academic_year import AcademicYear
+from base.models.enums.learning_component_year_type import LECTURING, PRACTICAL_EXERCISES
+from base.models.learning_component_year import LearningComponentYear
+from base.models.learning_unit import LearningUnit
+from base.models.learning_unit_year import LearningUnitYear
+from base.utils.db import rollback_atomic
+
+
+class Command(BaseCommand):
+    """Compare the volumes of the learning unit xls fetched in a single query with the former correlated subqueries."""
+
+    help = "Benchmark the volumes of the learning unit exports on a generated dataset (rolled back at the end)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=5, help="Number of academic years")
+        parser.add_argument('--learning-units', type=int, default=5000, help="Number of learning units by year")
+        parser.add_argument('--repeat', type=int, default=3, help="Number of executions of each approach")
+
+    def handle(self, *args, **options):
+        with rollback_atomic():
+            self._run(options['years'], options['learning_units'], options['repeat'])
+
+    def _run(self, nb_years, nb_learning_units, repeat):
+        random.seed(0)
+        academic_year = self._create_dataset(nb_years, nb_learning_units)
+        with connection.cursor() as cursor:
+            for model in (LearningUnitYear, LearningComponentYear):
+                cursor.execute("ANALYZE {}".format(model._meta.db_table))
+
+        def learning_unit_years():
+            return LearningUnitYear.objects.filter(academic_year=academic_year).order_by('acronym')
+
+        approaches = (
+            ('pivot query', lambda: [volume_information(luy) for luy in add_component_volumes(learning_unit_years())]),
+            ('subqueries', lambda: [volume_information(luy) for luy in annotate_qs(learning_unit_years())]),
+        )
+        results = {}
+        self.stdout.write("{} learning unit years exported".format(nb_learning_units))
+        self.stdout.write("{:<20} {:>10} {:>14}".format('approach', 'queries', 'time (ms)'))
+        for name, export in approaches:
+            with CaptureQueriesContext(connection) as queries:
+                results[name], duration = self._time(export, repeat)
+            self.stdout.write("{:<20} {:>10} {:>14.2f}".format(name, len(queries) // repeat, duration * 1000))
+
+        if results['pivot query'] != results['subqueries']:
+            self.stderr.write("The volumes of both approaches differ")
+
+    @staticmethod
+    def _time(export, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = export()
+        return result, (time.perf_counter() - start) / repeat
+
+    @staticmethod
+    def _create_dataset(nb_years, nb_learning_units):
+        learning_units = LearningUnit.objects.bulk_create(LearningUnit() for _ in range(nb_learning_units))
+
+        first_year = AcademicYear.objects.order_by('year').values_list('year', flat=True).first() or 2000
+        for year in range(first_year - nb_years, first_year):
+            academic_year = AcademicYear.objects.create(year=year)
+            learning_unit_years = LearningUnitYear.objects.bulk_create(
+                LearningUnitYear(
+                    academic_year=academic_year,
+                    learning_unit=learning_unit,
+                    acronym="LBMK{:04d}".format(index),
+                ) for index, learning_unit in enumerate(learning_units)
+            )
+            LearningComponentYear.objects.bulk_create(
+                LearningComponentYear(
+                    learning_unit_year=learning_unit_year,
+                    type=component_type,
+                    hourly_volume_partial_q1=random.randint(0, 30),
+                    hourly_volume_partial_q2=random.randint(0, 30),
+                    hourly_volume_total_annual=random.randint(0, 60),
+                    planned_classes=random.randint(0, 3),
+                )
+                for learning_unit_year in learning_unit_years
+                for component_type in (LECTURING, PRACTICAL_EXERCISES)
+            )
+        return academic_year
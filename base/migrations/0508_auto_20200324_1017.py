@@ -0,0 +1,18 @@
+# Generated by Django 2.2.5 on 2020-03-24 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0507_auto_20200316_1322'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='examenrollmenthistory',
+            name='modification_date',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.5 on 2020-03-25 14:02
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0508_auto_20200324_1017'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='learningcontaineryear',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['common_title'], name='lcy_common_title_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='learningcontaineryear',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['common_title_english'], name='lcy_common_title_en_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='learningunityear',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['acronym'], name='luy_acronym_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='learningunityear',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['specific_title'], name='luy_specific_title_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='learningunityear',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['specific_title_english'], name='luy_specific_title_en_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['first_name'], name='person_first_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['last_name'], name='person_last_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.5 on 2020-03-26 09:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+POPULATE_ACRONYMS = """
+INSERT INTO base_academicyearentityacronym (academic_year_id, entity_id, acronym)
+SELECT DISTINCT ON (ay.id, ev.entity_id) ay.id, ev.entity_id, ev.acronym
+FROM base_academicyear ay
+JOIN base_entityversion ev ON ev.start_date <= ay.start_date
+                          AND (ev.end_date IS NULL OR ev.end_date >= ay.start_date)
+ORDER BY ay.id, ev.entity_id, ev.start_date DESC;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0509_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AcademicYearEntityAcronym',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('acronym', models.CharField(max_length=20)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.AcademicYear')),
+                ('entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='base.Entity')),
+            ],
+            options={
+                'unique_together': {('academic_year', 'entity')},
+            },
+        ),
+        migrations.RunSQL(POPULATE_ACRONYMS, migrations.RunSQL.noop),
+    ]
@@ -1,5 +1,6 @@
 from base.models import academic_calendar
 from base.models import academic_year
+from base.models import academic_year_entity_acronym
 from base.models import admission_condition
 from base.models import authorized_relationship
 from base.models import campus
@@ -0,0 +1,90 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+from django.db import models, transaction
+
+from base.models.academic_year import AcademicYear
+from base.models.entity_version import EntityVersion
+from osis_common.models.osis_model_admin import OsisModelAdmin
+
+
+class AcademicYearEntityAcronymAdmin(OsisModelAdmin):
+    list_display = ('academic_year', 'entity', 'acronym')
+    list_filter = ('academic_year',)
+    raw_id_fields = ('entity',)
+    search_fields = ['acronym']
+
+
+class AcademicYearEntityAcronym(models.Model):
+    """ Acronym of the entity version current at the start of the academic year, kept up to date with them """
+    academic_year = models.ForeignKey('AcademicYear', on_delete=models.CASCADE)
+    entity = models.ForeignKey('Entity', on_delete=models.CASCADE)
+    acronym = models.CharField(max_length=20)
+
+    class Meta:
+        unique_together = ('academic_year', 'entity')
+
+    def __str__(self):
+        return u"%s - %s" % (self.academic_year, self.acronym)
+
+
+def refresh(entity_ids=None, academic_year_ids=None):
+    """
+    Compute again the acronyms of the entities (all of them when entity_ids is None) for the academic years
+    (all of them when academic_year_ids is None). Return the number of acronyms.
+    """
+    academic_years = AcademicYear.objects.filter(start_date__isnull=False)
+    versions = EntityVersion.objects.order_by('entity_id', '-start_date')
+    acronyms = AcademicYearEntityAcronym.objects.all()
+    if entity_ids is not None:
+        versions = versions.filter(entity_id__in=entity_ids)
+        acronyms = acronyms.filter(entity_id__in=entity_ids)
+    if academic_year_ids is not None:
+        academic_years = academic_years.filter(pk__in=academic_year_ids)
+        acronyms = acronyms.filter(academic_year_id__in=academic_year_ids)
+
+    academic_years = list(academic_years.values_list('pk', 'start_date'))
+    if academic_year_ids is not None:
+        # Only read the versions current at the start of one of the academic years
+        dates = [date for _, date in academic_years]
+        versions = versions.filter(start_date__lte=max(dates)).exclude(end_date__lt=min(dates)) if dates \
+            else versions.none()
+    versions = versions.values_list('entity_id', 'acronym', 'start_date', 'end_date')
+    new_acronyms = {}
+    for entity_id, acronym, start_date, end_date in versions:
+        for academic_year_id, date in academic_years:
+            # The latest version wins when several ones are current at the same date
+            key = (academic_year_id, entity_id)
+            if key not in new_acronyms and start_date <= date and (end_date is None or end_date >= date):
+                new_acronyms[key] = acronym
+
+    with transaction.atomic():
+        acronyms.delete()
+        AcademicYearEntityAcronym.objects.bulk_create(
+            (AcademicYearEntityAcronym(academic_year_id=academic_year_id, entity_id=entity_id, acronym=acronym)
+             for (academic_year_id, entity_id), acronym in new_acronyms.items()),
+            batch_size=1000
+        )
+    return len(new_acronyms)
@@ -26,9 +26,13 @@
 import collections
 import datetime
 from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Iterable, List, Set
 
 from django.db import models, connection
-from django.db.models import Q
+from django.db.models import Q, Count, Max
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.timezone import now
@@ -39,6 +43,7 @@ from base.models.entity import Entity
 from base.models.enums import entity_type
 from base.models.enums.entity_type import PEDAGOGICAL_ENTITY_TYPES
 from base.models.enums.organization_type import MAIN
+from base.utils.cache import CacheInvalidation
 from osis_common.models.serializable_model import SerializableModel, SerializableModelAdmin
 from osis_common.utils.datetime import get_tzinfo
 
@@ -51,8 +56,8 @@ PEDAGOGICAL_ENTITY_ADDED_EXCEPTIONS = [
 SQL_RECURSIVE_QUERY = """\
 WITH RECURSIVE under_entity AS (
 
-    SELECT id, acronym, parent_id, entity_id, '{{}}'::INT[] AS parents, '{date}'::DATE AS date, 0 AS level
-    FROM base_entityversion WHERE entity_id IN ({list_entities})
+    SELECT id, acronym, parent_id, entity_id, '{}'::INT[] AS parents, %(date)s::DATE AS date, 0 AS level
+    FROM base_entityversion WHERE entity_id = ANY(%(entity_ids)s)
 
     UNION ALL
 
@@ -135,10 +140,10 @@ class EntityVersionQuerySet(models.QuerySet):
             if isinstance(entity, Entity):
                 entity = entity.pk
 
-            list_entities_id.append(str(entity))
+            list_entities_id.append(entity)
 
         with connection.cursor() as cursor:
-            cursor.execute(SQL_RECURSIVE_QUERY.format(list_entities=','.join(list_entities_id), date=date))
+            cursor.execute(SQL_RECURSIVE_QUERY, {'entity_ids': list_entities_id, 'date': date})
 
             return [
                 {
@@ -327,6 +332,9 @@ class EntityVersion(SerializableModel):
 
 
 def find_parent_of_type_into_entity_structure(entity_version, entities_structure, parent_type):
+    if isinstance(entities_structure, EntityVersionHierarchy):
+        ancestor = entities_structure.get_ancestor_of_type(entity_version.entity_id, parent_type)
+        return ancestor.entity if ancestor else None
     if entity_version.entity_type == parent_type:
         return entity_version.entity
     elif not entities_structure[entity_version.entity_id]['entity_version_parent']:
@@ -457,30 +465,196 @@ def find_all_current_entities_version():
     return find_latest_version(date=now)
 
 
-# TODO Use recursive query instead
-def build_current_entity_version_structure_in_memory(date=None):
-    if date:
-        all_current_entities_version = find_latest_version(date=date)
-    else:
-        all_current_entities_version = find_all_current_entities_version()
-    entity_version_by_entity_id = _build_entity_version_by_entity_id(all_current_entities_version)
-    direct_children_by_entity_version_id = _build_direct_children_by_entity_version_id(entity_version_by_entity_id)
-    all_children_by_entity_version_id = _build_all_children_by_entity_version_id(direct_children_by_entity_version_id)
-
-    entity_versions = {}
-    for entity_version in all_current_entities_version:
-        entity_versions[entity_version.entity_id] = {
-            'entity_version_parent': entity_version_by_entity_id.get(entity_version.parent_id),
-            'direct_children': direct_children_by_entity_version_id.get(entity_version.id, []),
-            'all_children': all_children_by_entity_version_id.get(entity_version.id, []),
-            'entity_version': entity_version
-        }
-    return entity_versions
+class _EntityVersionStructure(Mapping):
+    """
+    Structure of an entity version in an EntityVersionHierarchy, with the keys 'entity_version',
+    'entity_version_parent', 'direct_children' and 'all_children'.
+    The children are computed on first access only.
+    """
+    KEYS = ('entity_version_parent', 'direct_children', 'all_children', 'entity_version')
+
+    def __init__(self, hierarchy: 'EntityVersionHierarchy', entity_version: EntityVersion):
+        self.hierarchy = hierarchy
+        self.entity_version = entity_version
+        self._all_children = None
+
+    def __getitem__(self, key):
+        if key == 'entity_version':
+            return self.entity_version
+        if key == 'entity_version_parent':
+            return self.hierarchy.get_parent(self.entity_version.entity_id)
+        if key == 'direct_children':
+            return self.hierarchy.get_direct_children(self.entity_version.entity_id)
+        if key == 'all_children':
+            if self._all_children is None:
+                self._all_children = self.hierarchy.get_all_children(self.entity_version.entity_id)
+            return self._all_children
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+
+class EntityVersionHierarchy(dict):
+    """
+    In-memory index of the entity versions valid at a date, by entity id (dict keys) and by acronym.
+    Each value is the structure of the entity version (see _EntityVersionStructure).
+    The instances are shared (see get_entity_version_hierarchy) : they must not be modified.
+    """
+
+    def __init__(self, entity_versions):
+        super().__init__()
+        self._entity_version_by_entity_id = _build_entity_version_by_entity_id(entity_versions)
+        # Keyed by parent entity id, even when the parent has no version at the date (as EntityVersion.get_tree)
+        self._direct_children_by_entity_id = {}
+        for entity_version in self._entity_version_by_entity_id.values():
+            self._direct_children_by_entity_id.setdefault(entity_version.parent_id, []).append(entity_version)
+            self[entity_version.entity_id] = _EntityVersionStructure(self, entity_version)
+
+        self._structure_by_acronym = {}
+        for structure in self.values():
+            self._structure_by_acronym.setdefault(structure['entity_version'].acronym, structure)
+
+    def get_by_acronym(self, acronym: str) -> _EntityVersionStructure:
+        return self._structure_by_acronym.get(acronym.upper())
+
+    def get_parent(self, entity_id: int) -> EntityVersion:
+        entity_version = self._entity_version_by_entity_id.get(entity_id)
+        return entity_version and self._entity_version_by_entity_id.get(entity_version.parent_id)
+
+    def get_direct_children(self, entity_id: int) -> list:
+        return self._direct_children_by_entity_id.get(entity_id, [])
+
+    def get_all_children(self, entity_id: int) -> list:
+        all_children = []
+        for entity_version in self.get_direct_children(entity_id):
+            all_children.extend(self[entity_version.entity_id]['all_children'])
+            all_children.append(entity_version)
+        return all_children
+
+    def get_descendant_entity_ids(self, entity_ids: Iterable[int]) -> Set[int]:
+        """
+        Return the given entity ids and the ids of all the entities under them
+        """
+        descendant_entity_ids = set()
+        to_visit = list(entity_ids)
+        while to_visit:
+            entity_id = to_visit.pop()
+            if entity_id in descendant_entity_ids:
+                continue
+            descendant_entity_ids.add(entity_id)
+            to_visit.extend(child.entity_id for child in self.get_direct_children(entity_id))
+        return descendant_entity_ids
+
+    def get_ancestors(self, entity_id: int) -> List[EntityVersion]:
+        """
+        Return the versions of the entities above the entity, from its parent to the top of the organigram
+        """
+        ancestors = []
+        entity_version = self.get_parent(entity_id)
+        while entity_version and entity_version not in ancestors:
+            ancestors.append(entity_version)
+            entity_version = self.get_parent(entity_version.entity_id)
+        return ancestors
+
+    def get_ancestor_of_type(self, entity_id: int, entity_type: str) -> EntityVersion:
+        """
+        Return the entity version itself or its first ancestor of the given type
+        """
+        entity_version = self._entity_version_by_entity_id.get(entity_id)
+        while entity_version and entity_version.entity_type != entity_type:
+            entity_version = self._entity_version_by_entity_id.get(entity_version.parent_id)
+        return entity_version
+
+
+class _EntityVersionHierarchyInvalidation(CacheInvalidation):
+    def __call__(self):
+        _entity_version_hierarchies.clear()
+
+
+MAX_ENTITY_VERSION_HIERARCHIES = 20
+
+# Hierarchies by date, shared by all the requests of the process
+_entity_version_hierarchies = OrderedDict()
+_entity_version_hierarchies_state = None
+
+
+def _get_entity_versions_state() -> tuple:
+    # Changed by any insertion, deletion or save of an entity version, whatever the process which made it
+    return tuple(EntityVersion.objects.aggregate(Count('pk'), Max('pk'), Max('changed')).values())
+
+
+def get_entity_version_hierarchy(date=None) -> EntityVersionHierarchy:
+    """
+    Return the hierarchy of the entity versions valid at the date (today by default).
+    It is built once per date and per process. The hierarchies of the process are built again when the entity
+    versions table has changed, which is checked with a single aggregate query.
+    """
+    global _entity_version_hierarchies_state
+    if date is None:
+        date = datetime.datetime.now(get_tzinfo())
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+
+    if _EntityVersionHierarchyInvalidation.get_pending():
+        # The entity versions have been modified by the current transaction which is not committed
+        return EntityVersionHierarchy(find_latest_version(date=date))
+
+    # Read before building the hierarchy : a change committed meanwhile causes another build on the next call
+    state = _get_entity_versions_state()
+    if state != _entity_version_hierarchies_state:
+        _entity_version_hierarchies.clear()
+        _entity_version_hierarchies_state = state
+
+    hierarchy = _entity_version_hierarchies.get(date)
+    if hierarchy is None:
+        hierarchy = EntityVersionHierarchy(find_latest_version(date=date))
+        _entity_version_hierarchies[date] = hierarchy
+        while len(_entity_version_hierarchies) > MAX_ENTITY_VERSION_HIERARCHIES:
+            _entity_version_hierarchies.popitem(last=False)
+    return hierarchy
+
+
+def invalidate_entity_version_hierarchies():
+    _EntityVersionHierarchyInvalidation().run()
+
+
+@receiver(post_save, sender=EntityVersion)
+@receiver(post_delete, sender=EntityVersion)
+def _entity_version_saved_or_deleted(sender, instance, **kwargs):
+    invalidate_entity_version_hierarchies()
+
+
+def find_descendant_entity_ids(entities: Iterable, date=None) -> Set[int]:
+    """
+    Return the ids of the entities (Entity or id) and of all the entities under them at the date (today by default).
+    Answered from the shared hierarchy of the date (see get_entity_version_hierarchy).
+    """
+    entity_ids = [entity.pk if isinstance(entity, Entity) else entity for entity in entities]
+    return get_entity_version_hierarchy(date).get_descendant_entity_ids(entity_ids)
+
+
+def find_ancestors(entity, date=None) -> List[EntityVersion]:
+    """
+    Return the versions of the entities above the entity (Entity or id) at the date (today by default),
+    from its parent to the top of the organigram.
+    """
+    entity_id = entity.pk if isinstance(entity, Entity) else entity
+    return get_entity_version_hierarchy(date).get_ancestors(entity_id)
+
+
+def build_current_entity_version_structure_in_memory(date=None) -> EntityVersionHierarchy:
+    return get_entity_version_hierarchy(date)
 
 
 def get_structure_of_entity_version(entity_versions: dict, root: str = None) -> dict:
     if not root:
         return entity_versions
+    if isinstance(entity_versions, EntityVersionHierarchy):
+        return entity_versions.get_by_acronym(root)
     for ev in entity_versions:
         if entity_versions[ev]['entity_version'].acronym == root.upper():
             return entity_versions[ev]
@@ -488,6 +662,9 @@ def get_structure_of_entity_version(entity_versions: dict, root: str = None) ->
 
 def get_entity_version_parent_or_itself_from_type(entity_versions: dict, entity: str, entity_type: str)\
         -> EntityVersion:
+    if isinstance(entity_versions, EntityVersionHierarchy):
+        structure = entity_versions.get_by_acronym(entity)
+        return structure and entity_versions.get_ancestor_of_type(structure['entity_version'].entity_id, entity_type)
     entities_version = get_structure_of_entity_version(entity_versions, root=entity)
     if entities_version.get('entity_version') and entities_version.get('entity_version').entity_type == entity_type:
         return entities_version.get('entity_version')
@@ -23,11 +23,14 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
+import datetime
 from decimal import *
 
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models import When, Case, Q, Sum, Count, IntegerField, F
+from django.db.models import When, Case, Q, Sum, Count, IntegerField, F, DateField, ExpressionWrapper, OuterRef, \
+    Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext as _
 
 from attribution.models import attribution
@@ -99,6 +102,20 @@ class ExamEnrollment(models.Model):
                 return False
         return True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The values as stored in database, compared with the saved ones (see assessments.signals.subscribers)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._loaded_values = dict(getattr(self, '_loaded_values', {}), **{
+            field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields
+            if fields is None or field.name in fields or field.attname in fields
+        })
+
     def save(self, *args, **kwargs):
         if not self.justification_valid():
             raise JustificationValueException
@@ -171,26 +188,33 @@ def get_session_exam_deadline(enrollment):
         return session_exam_deadline.get_by_offer_enrollment_nb_session(offer_enrollment, nb_session)
 
 
-def is_deadline_reached(enrollment):
+def get_session_exam_deadline_dates(enrollment):
+    """
+    Return the deadline of the program managers and the one of the tutors.
+    Both are None when the enrollment has no session exam deadline.
+    """
+    if hasattr(enrollment, 'session_exam_deadline_date'):
+        # Annotated by find_for_score_encodings
+        return enrollment.session_exam_deadline_date, enrollment.session_exam_deadline_tutor_date
+
     exam_deadline = get_session_exam_deadline(enrollment)
     if exam_deadline:
-        return exam_deadline.is_deadline_reached
-    return False
+        return exam_deadline.deadline, exam_deadline.deadline_tutor_computed or exam_deadline.deadline
+    return None, None
+
+
+def is_deadline_reached(enrollment):
+    deadline = get_session_exam_deadline_dates(enrollment)[0]
+    return deadline is not None and deadline < datetime.date.today()
 
 
 def is_deadline_tutor_reached(enrollment):
-    exam_deadline = get_session_exam_deadline(enrollment)
-    if exam_deadline:
-        return exam_deadline.is_deadline_tutor_reached
-    return False
+    deadline_tutor = get_session_exam_deadline_dates(enrollment)[1]
+    return deadline_tutor is not None and deadline_tutor < datetime.date.today()
 
 
 def get_deadline(enrollment):
-    exam_deadline = get_session_exam_deadline(enrollment)
-    if exam_deadline:
-        return exam_deadline.deadline_tutor_computed if exam_deadline.deadline_tutor_computed else \
-            exam_deadline.deadline
-    return None
+    return get_session_exam_deadline_dates(enrollment)[1]
 
 
 def is_absence_justification(justification):
@@ -237,16 +261,24 @@ class ExamEnrollmentHistory(models.Model):
     person = models.ForeignKey(person.Person, on_delete=models.PROTECT)
     score_final = models.DecimalField(max_digits=4, decimal_places=2, null=True)
     justification_final = models.CharField(max_length=20, null=True, choices=justification_types.JUSTIFICATION_TYPES)
-    modification_date = models.DateTimeField(auto_now=True)
+    modification_date = models.DateTimeField(auto_now=True, db_index=True)
 
 
 def create_exam_enrollment_historic(user, enrollment):
-    exam_enrollment_history = ExamEnrollmentHistory()
-    exam_enrollment_history.exam_enrollment = enrollment
-    exam_enrollment_history.score_final = enrollment.score_final
-    exam_enrollment_history.justification_final = enrollment.justification_final
-    exam_enrollment_history.person = person.find_by_user(user)
-    exam_enrollment_history.save()
+    bulk_create_exam_enrollment_historic(user, [enrollment])
+
+
+def bulk_create_exam_enrollment_historic(user, enrollments):
+    """ History of the enrollments saved together by the user (the person is only looked up once) """
+    a_person = person.find_by_user(user)
+    ExamEnrollmentHistory.objects.bulk_create(
+        ExamEnrollmentHistory(
+            exam_enrollment=enrollment,
+            score_final=enrollment.score_final,
+            justification_final=enrollment.justification_final,
+            person=a_person
+        ) for enrollment in enrollments
+    )
 
 
 def get_progress_by_learning_unit_years_and_offer_years(user,
@@ -277,19 +309,25 @@ def get_progress_by_learning_unit_years_and_offer_years(user,
     return queryset.values('session_exam', 'learning_unit_enrollment__learning_unit_year',
                            'learning_unit_enrollment__offer_enrollment__offer_year') \
         .annotate(
-        total_exam_enrollments=Count('id'),
         learning_unit_enrollment__learning_unit_year__acronym=
         F('learning_unit_enrollment__learning_unit_year__acronym'),
         learning_unit_enrollment__learning_unit_year__specific_title=
         F('learning_unit_enrollment__learning_unit_year__specific_title'),
         learning_unit_enrollment__learning_unit_year__learning_container_year__common_title=
         F('learning_unit_enrollment__learning_unit_year__learning_container_year__common_title'),
-        exam_enrollments_encoded=Sum(Case(
+        **get_progress_aggregates()
+    )
+
+
+def get_progress_aggregates():
+    return {
+        'total_exam_enrollments': Count('id'),
+        'exam_enrollments_encoded': Sum(Case(
             When(Q(score_final__isnull=False) | Q(justification_final__isnull=False), then=1),
             default=0,
             output_field=IntegerField())
         ),
-        scores_not_yet_submitted=Sum(Case(
+        'scores_not_yet_submitted': Sum(Case(
             When((Q(score_draft__isnull=False) &
                   Q(score_final__isnull=True) &
                   Q(justification_final__isnull=True)) | (Q(justification_draft__isnull=False) &
@@ -297,10 +335,42 @@ def get_progress_by_learning_unit_years_and_offer_years(user,
                                                           Q(justification_final__isnull=True))
                  , then=1),
             default=0,
-            output_field=IntegerField()))
+            output_field=IntegerField())),
+    }
+
+
+def find_double_encoding_differences(reencoded_enrollments, is_program_manager):
+    """
+    Exam enrollments for which the reencoded score/justification differs from the final one (program manager)
+    or the draft one (tutor). The reencoded values are taken from the given enrollments, they are not saved.
+    NULL values are compared as values (IS DISTINCT FROM).
+    """
+    encoding = 'final' if is_program_manager else 'draft'
+    return ExamEnrollment.objects.filter(id__in=[enrollment.id for enrollment in reencoded_enrollments]).annotate(
+        new_score_reencoded=_get_value_by_id(reencoded_enrollments, 'score_reencoded',
+                                             models.DecimalField(max_digits=4, decimal_places=2)),
+        new_justification_reencoded=_get_value_by_id(reencoded_enrollments, 'justification_reencoded',
+                                                     models.CharField()),
+    ).filter(
+        _is_distinct_from('score_' + encoding, 'new_score_reencoded') |
+        _is_distinct_from('justification_' + encoding, 'new_justification_reencoded')
     )
 
 
+def _get_value_by_id(enrollments, field, output_field):
+    return Case(
+        *[When(id=enrollment.id, then=Value(getattr(enrollment, field))) for enrollment in enrollments],
+        default=Value(None),
+        output_field=output_field
+    )
+
+
+def _is_distinct_from(field, other_field):
+    return Q(**{field + '__isnull': True, other_field + '__isnull': False}) | \
+        Q(**{field + '__isnull': False, other_field + '__isnull': True}) | \
+        (Q(**{field + '__isnull': False, other_field + '__isnull': False}) & ~Q(**{field: F(other_field)}))
+
+
 def find_for_score_encodings(session_exam_number,
                              learning_unit_year_id=None,
                              learning_unit_year_ids=None,
@@ -384,11 +454,7 @@ def find_for_score_encodings(session_exam_number,
             learning_unit_enrollment__offer_enrollment__student__person__first_name__icontains=student_first_name)
 
     if with_session_exam_deadline:
-        queryset = queryset.prefetch_related(
-            models.Prefetch('learning_unit_enrollment__offer_enrollment__sessionexamdeadline_set',
-                            queryset=session_exam_deadline.filter_by_nb_session(session_exam_number),
-                            to_attr="session_exam_deadlines")
-        )
+        queryset = _annotate_session_exam_deadline_dates(queryset, session_exam_number)
 
     return queryset.select_related('learning_unit_enrollment__offer_enrollment__offer_year') \
         .select_related('session_exam') \
@@ -396,6 +462,21 @@ def find_for_score_encodings(session_exam_number,
         .select_related('learning_unit_enrollment__learning_unit_year')
 
 
+def _annotate_session_exam_deadline_dates(queryset, session_exam_number):
+    """ Annotate the deadlines used by get_session_exam_deadline_dates """
+    # Both dates come from the same deadline: the first one created, as the unordered prefetch used to return
+    deadlines = session_exam_deadline.filter_by_nb_session(session_exam_number).filter(
+        offer_enrollment=OuterRef('learning_unit_enrollment__offer_enrollment')
+    ).order_by('pk').annotate(
+        deadline_tutor_date=ExpressionWrapper(F('deadline') - Coalesce('deadline_tutor', 0), output_field=DateField())
+    )
+    return queryset.annotate(
+        session_exam_deadline_date=Subquery(deadlines.values('deadline')[:1], output_field=DateField()),
+        session_exam_deadline_tutor_date=Subquery(deadlines.values('deadline_tutor_date')[:1],
+                                                  output_field=DateField()),
+    )
+
+
 def _get_enrolled_enrollments(enrollments):
     if enrollments:
         return list(filter(lambda enrollment: enrollment.enrollment_state == enrollment_states.ENROLLED, enrollments))
@@ -23,6 +23,7 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
@@ -102,6 +103,10 @@ class LearningContainerYear(SerializableModel):
 
     class Meta:
         unique_together = ("learning_container", "academic_year",)
+        indexes = [
+            GinIndex(fields=['common_title'], name='lcy_common_title_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['common_title_english'], name='lcy_common_title_en_trgm', opclasses=['gin_trgm_ops']),
+        ]
         permissions = (
             ("can_access_learningcontaineryear", "Can access learning container year"),
         )
@@ -24,6 +24,7 @@
 #
 ##############################################################################
 
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.db import models
@@ -39,9 +40,9 @@ from reversion.admin import VersionAdmin
 
 from backoffice.settings.base import LANGUAGE_CODE_EN
 from base.business.learning_container_year import get_learning_container_year_warnings
-from base.models import entity_version
 from base.models import group_element_year
 from base.models.academic_year import compute_max_academic_year_adjournment, AcademicYear
+from base.models.academic_year_entity_acronym import AcademicYearEntityAcronym
 from base.models.entity_version import get_entity_version_parent_or_itself_from_type
 from base.models.enums import active_status, learning_container_year_types
 from base.models.enums import learning_unit_year_subtypes, internship_subtypes, \
@@ -58,6 +59,12 @@ from osis_common.models.serializable_model import SerializableModel, Serializabl
 
 AUTHORIZED_REGEX_CHARS = "$*+.^"
 REGEX_ACRONYM_CHARSET = "[A-Z0-9" + AUTHORIZED_REGEX_CHARS + "]+"
+
+# Fields concatenated (with ' - ') by LearningUnitYearQuerySet.annotate_full_title_class_method
+FULL_TITLE_FIELDS = {
+    'full_title': ('learning_container_year__common_title', 'specific_title'),
+    'full_title_en': ('learning_container_year__common_title_english', 'specific_title_english'),
+}
 MINIMUM_CREDITS = 0.0
 MAXIMUM_CREDITS = 500
 
@@ -155,10 +162,13 @@ class LearningUnitYearQuerySet(SerializableQuerySet):
 
     @classmethod
     def annotate_entity_requirement_acronym(cls, queryset):
-        entity_requirement = entity_version.EntityVersion.objects.filter(
+        # Unique index lookup instead of a date range search in the entity versions. PostgreSQL runs this correlated
+        # subquery as one probe of the (academic_year, entity) index by row, like the nested loop of a join. A join
+        # is not available here: FilteredRelation does not support the nested relation to the acronyms in Django 2.2
+        # and a ForeignObject would add a field to the serialized LearningContainerYear model.
+        entity_requirement = AcademicYearEntityAcronym.objects.filter(
             entity=OuterRef('learning_container_year__requirement_entity'),
-        ).current(
-            OuterRef('academic_year__start_date')
+            academic_year=OuterRef('academic_year'),
         ).values('acronym')[:1]
         return queryset.annotate(
             entity_requirement=Subquery(entity_requirement)
@@ -166,10 +176,10 @@ class LearningUnitYearQuerySet(SerializableQuerySet):
 
     @classmethod
     def annotate_entity_allocation_acronym(cls, queryset):
-        entity_allocation = entity_version.EntityVersion.objects.filter(
+        # Same lookup as annotate_entity_requirement_acronym
+        entity_allocation = AcademicYearEntityAcronym.objects.filter(
             entity=OuterRef('learning_container_year__allocation_entity'),
-        ).current(
-            OuterRef('academic_year__start_date')
+            academic_year=OuterRef('academic_year'),
         ).values('acronym')[:1]
 
         return queryset.annotate(
@@ -253,6 +263,13 @@ class LearningUnitYear(SerializableModel):
         unique_together = (('learning_unit', 'academic_year'), ('acronym', 'academic_year'))
         ordering = ('academic_year', 'acronym')
         verbose_name = _("Learning unit year")
+        # Trigram indexes used by the (case insensitive) regex searches
+        indexes = [
+            GinIndex(fields=['acronym'], name='luy_acronym_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['specific_title'], name='luy_specific_title_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['specific_title_english'], name='luy_specific_title_en_trgm',
+                     opclasses=['gin_trgm_ops']),
+        ]
         permissions = (
             ("can_receive_emails_about_automatic_postponement", "Can receive emails about automatic postponement"),
         )
@@ -161,3 +161,18 @@ def remove_from_pgm_managers_group(sender, instance, **kwargs):
     if instance.person.user and not mdl.program_manager.find_by_user(instance.person.user):
         pgm_managers_group = Group.objects.get(name='program_managers')
         instance.person.user.groups.remove(pgm_managers_group)
+
+
+@receiver(post_save, sender=mdl.entity_version.EntityVersion)
+@receiver(post_delete, sender=mdl.entity_version.EntityVersion)
+def refresh_entity_acronyms(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        mdl.academic_year_entity_acronym.refresh(entity_ids=[instance.entity_id])
+
+
+@receiver(post_save, sender=mdl.academic_year.AcademicYear)
+def refresh_academic_year_entity_acronyms(sender, instance, **kwargs):
+    # The acronyms of every entity are computed again for the saved academic year (its start date may have changed).
+    # Only the entity versions current at this date are read, and academic years are seldom saved.
+    if not kwargs.get('raw'):
+        mdl.academic_year_entity_acronym.refresh(academic_year_ids=[instance.pk])
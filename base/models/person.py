@@ -27,6 +27,7 @@ from datetime import date
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ImproperlyConfigured
 from django.db import models
 from django.db.models import Q
@@ -177,6 +178,11 @@ class Person(SerializableModel):
             ("can_manage_attribution", "Can manage attribution"),
             ('can_read_persons_roles', 'Can read persons roles'),
         )
+        # Trigram indexes used by the tutor searches
+        indexes = [
+            GinIndex(fields=['first_name'], name='person_first_name_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['last_name'], name='person_last_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
     def is_linked_to_entity_in_charge_of_learning_unit_year(self, learning_unit_year):
         requirement_entity = learning_unit_year.learning_container_year.requirement_entity
@@ -28,7 +28,6 @@ from django.utils.functional import cached_property
 from reversion.admin import VersionAdmin
 
 from base.models import entity_version
-from base.models.entity_version import EntityVersion
 from osis_common.models.osis_model_admin import OsisModelAdmin
 
 
@@ -64,4 +63,4 @@ class PersonEntity(models.Model):
             return {self.entity.id}
 
         # Create a set of all entity under the parent
-        return set(row['entity_id'] for row in EntityVersion.objects.get_tree(self.entity))
+        return entity_version.find_descendant_entity_ids([self.entity_id])
@@ -116,6 +116,22 @@ def find_deliberation_date(nb_session, offer_year):
     return None
 
 
+def find_deliberation_dates(nb_session, offer_year_ids):
+    """
+    :return the deliberation dates of find_deliberation_date by offer year id (the offer years without deliberation
+    date are not in the dict)
+    """
+    offer_year_cals = offer_year_calendar.OfferYearCalendar.objects.filter(
+        offer_year_id__in=offer_year_ids,
+        academic_calendar__in=SessionExamCalendar.objects.filter(
+            number_session=nb_session,
+            academic_calendar__reference=academic_calendar_type.DELIBERATION
+        ).values('academic_calendar_id')
+    ).order_by('-pk')
+    # Like .first(), the calendar with the lowest pk is kept
+    return {offer_year_cal.offer_year_id: offer_year_cal.start_date for offer_year_cal in offer_year_cals}
+
+
 # FIXME: Only used in tests
 def find_by_session_and_academic_year(nb_session, an_academic_year):
     return SessionExamCalendar.objects.filter(
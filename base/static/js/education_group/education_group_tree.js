@@ -86,7 +86,17 @@ $(document).ready(function () {
     $documentTree.jstree({
             "core": {
                 "check_callback": true,
-                "data": tree,
+                "data": function (node, callback) {
+                    // The deeper levels of the tree are loaded when their parent node is opened
+                    if (node.id === "#") {
+                        callback.call(this, tree);
+                    } else {
+                        let instance = this;
+                        $.getJSON(node.a_attr.children_url, function (children) {
+                            callback.call(instance, children);
+                        });
+                    }
+                },
             },
             "plugins": [
                 "contextmenu",
@@ -1,3 +1,5 @@
+const XLS_EXPORT_POLLING_DELAY = 2000;
+
 function addOnClickEventOnPrepareXls(e) {
     document.dispatchEvent(new CustomEvent("prepareXls:onClick", {
         "detail": $(e.target)
@@ -9,6 +11,38 @@ function prepare_xls(e, action_value){
     addOnClickEventOnPrepareXls(e);
     let status = $("#xls_status");
     status.val(action_value);
-    $("#search_form").submit();
+    let form = $("#search_form");
+    let parameters = form.serialize() + "&xls_background=1";
     status.val('');
+    show_xls_export_status("info", gettext("The excel file is being generated"));
+    $.getJSON(form.attr("action") || window.location.pathname, parameters).done(function (job) {
+        poll_xls_export(job.status_url);
+    }).fail(xls_export_failed);
+}
+
+function poll_xls_export(status_url) {
+    $.getJSON(status_url).done(function (job) {
+        if (job.state === "SUCCESS") {
+            $("#xls_export_status").remove();
+            window.location.href = job.download_url;
+        } else if (job.state === "FAILURE") {
+            xls_export_failed();
+        } else {
+            setTimeout(function () {
+                poll_xls_export(status_url);
+            }, XLS_EXPORT_POLLING_DELAY);
+        }
+    }).fail(xls_export_failed);
+}
+
+function xls_export_failed() {
+    show_xls_export_status("danger", gettext("The excel file could not be generated"));
+}
+
+function show_xls_export_status(level, message) {
+    let status = $("#xls_export_status");
+    if (!status.length) {
+        status = $("<div>", {"id": "xls_export_status", "role": "alert"}).prependTo("#main");
+    }
+    status.attr("class", "alert alert-" + level).text(message);
 }
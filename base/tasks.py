@@ -1,8 +1,13 @@
 from datetime import datetime
 
 from celery.schedules import crontab
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import translation
 
 from backoffice.celery import app as celery_app
+from base.business import xls_export_job
 from base.business.education_groups.automatic_postponement import EducationGroupAutomaticPostponementToN6, \
     ReddotEducationGroupAutomaticPostponement
 from base.business.learning_units.automatic_postponement import LearningUnitAutomaticPostponementToN6
@@ -52,3 +57,26 @@ def check_academic_calendar() -> dict:
         return {"Copy of Reddot data": process.serialize_postponement_results()}
 
     return {}
+
+
+@celery_app.task(bind=True)
+def generate_search_xls(self, user_id, view_path, query_string, language) -> dict:
+    user = User.objects.get(pk=user_id)
+    with translation.override(language):
+        response = xls_export_job.render_export(user, view_path, query_string, language)
+
+    file_path = default_storage.save(
+        xls_export_job.EXPORT_FILE_PATH.format(job_id=self.request.id),
+        ContentFile(response.content)
+    )
+    delete_search_xls.apply_async(args=[file_path], countdown=xls_export_job.EXPORT_FILE_LIFETIME)
+    return {
+        'user_id': user_id,
+        'file_path': file_path,
+        'file_name': xls_export_job.get_file_name(response),
+    }
+
+
+@celery_app.task
+def delete_search_xls(file_path):
+    default_storage.delete(file_path)
@@ -0,0 +1,78 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+from django.test import TestCase
+
+from base.business.learning_unit_xls import annotate_qs
+from base.business.learning_units.component_volumes import ComponentVolumes, VOLUME_COLUMNS, add_component_volumes
+from base.models.enums.learning_component_year_type import LECTURING, PRACTICAL_EXERCISES
+from base.models.learning_unit_year import LearningUnitYear
+from base.tests.factories.learning_component_year import LearningComponentYearFactory
+from base.tests.factories.learning_unit_year import LearningUnitYearFactory
+
+
+class TestComponentVolumes(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.luy_with_components = LearningUnitYearFactory()
+        LearningComponentYearFactory(
+            learning_unit_year=cls.luy_with_components,
+            type=LECTURING,
+            hourly_volume_total_annual=30,
+            hourly_volume_partial_q1=20,
+            hourly_volume_partial_q2=10,
+            planned_classes=2
+        )
+        LearningComponentYearFactory(
+            learning_unit_year=cls.luy_with_components,
+            type=PRACTICAL_EXERCISES,
+            hourly_volume_total_annual=15,
+            hourly_volume_partial_q1=15,
+            hourly_volume_partial_q2=0,
+            planned_classes=1
+        )
+        cls.luy_without_component = LearningUnitYearFactory()
+
+    def test_volumes_by_column(self):
+        with self.assertNumQueries(1):
+            volumes = ComponentVolumes([self.luy_with_components.id, self.luy_without_component.id])
+
+        self.assertEqual(volumes.columns['pm_vol_tot'], [30, None])
+        self.assertEqual(volumes.columns['pp_classes'], [1, None])
+        self.assertEqual(
+            volumes.get_row(self.luy_with_components.id),
+            {
+                'pm_vol_q1': 20, 'pm_vol_q2': 10, 'pm_vol_tot': 30, 'pm_classes': 2,
+                'pp_vol_q1': 15, 'pp_vol_q2': 0, 'pp_vol_tot': 15, 'pp_classes': 1,
+            }
+        )
+
+    def test_same_volumes_as_annotations(self):
+        queryset = LearningUnitYear.objects.filter(
+            pk__in=[self.luy_with_components.pk, self.luy_without_component.pk]
+        ).order_by('pk')
+        for luy, annotated_luy in zip(add_component_volumes(queryset), annotate_qs(queryset)):
+            for column in VOLUME_COLUMNS:
+                self.assertEqual(getattr(luy, column), getattr(annotated_luy, column))
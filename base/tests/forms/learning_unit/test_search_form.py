@@ -29,6 +29,7 @@ from django.http import QueryDict
 from django.test import TestCase
 from django.utils.translation import gettext_lazy as _
 
+from attribution.tests.factories.attribution_charge_new import AttributionChargeNewFactory
 from base.forms.learning_unit.search.borrowed import BorrowedLearningUnitSearch, filter_is_borrowed_learning_unit_year
 from base.forms.learning_unit.search.educational_information import LearningUnitDescriptionFicheFilter
 from base.forms.learning_unit.search.external import ExternalLearningUnitFilter
@@ -185,6 +186,41 @@ class TestSearchForm(TestCase):
         self.assertTrue(learning_unit_filter.is_valid())
         self.assertEqual(learning_unit_filter.qs.count(), 1)
 
+    def test_search_on_title_across_common_and_specific_title(self):
+        LearningUnitYearFactory(
+            academic_year=self.academic_years[0],
+            learning_container_year__common_title="Droit",
+            specific_title="Introduction",
+        )
+
+        for title in ("Introduction", "Droit - Intro"):
+            self.data.update({
+                "academic_year_id": str(self.academic_years[0].id),
+                "title": title
+            })
+            learning_unit_filter = LearningUnitFilter(self.data)
+            self.assertTrue(learning_unit_filter.is_valid())
+            self.assertEqual(learning_unit_filter.qs.count(), 1)
+
+    def test_search_on_tutor(self):
+        luy = LearningUnitYearFactory(academic_year=self.academic_years[0])
+        for first_name, last_name in (("Jean", "Dupont"), ("Marcel", "Martin")):
+            AttributionChargeNewFactory(
+                learning_component_year__learning_unit_year=luy,
+                attribution__tutor__person__first_name=first_name,
+                attribution__tutor__person__last_name=last_name,
+            )
+        LearningUnitYearFactory(academic_year=self.academic_years[0])
+
+        for tutor, expected in (("Jean Marcel", [luy]), ("jean dupont", [luy]), ("Jean Durand", [])):
+            self.data.update({
+                "academic_year_id": str(self.academic_years[0].id),
+                "tutor": tutor
+            })
+            learning_unit_filter = LearningUnitFilter(self.data)
+            self.assertTrue(learning_unit_filter.is_valid())
+            self.assertCountEqual(learning_unit_filter.qs, expected)
+
 
 class TestFilterIsBorrowedLearningUnitYear(TestCase):
     @classmethod
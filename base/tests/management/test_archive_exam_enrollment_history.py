@@ -0,0 +1,70 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+import csv
+import datetime
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from base.models.exam_enrollment import ExamEnrollmentHistory
+from base.tests.factories.exam_enrollment import ExamEnrollmentFactory
+from base.tests.factories.person import PersonFactory
+
+
+class TestArchiveExamEnrollmentHistory(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        person = PersonFactory()
+        enrollment = ExamEnrollmentFactory(score_final=12)
+        cls.old_history = ExamEnrollmentHistory.objects.create(exam_enrollment=enrollment, person=person,
+                                                               score_final=10)
+        cls.recent_history = ExamEnrollmentHistory.objects.create(exam_enrollment=enrollment, person=person,
+                                                                  score_final=12)
+        ExamEnrollmentHistory.objects.filter(pk=cls.old_history.pk).update(
+            modification_date=timezone.now() - datetime.timedelta(days=365 * 6)
+        )
+
+    def setUp(self):
+        output_file, self.output = tempfile.mkstemp(suffix='.csv')
+        os.close(output_file)
+        self.addCleanup(os.remove, self.output)
+
+    def test_archive_history_older_than_retention(self):
+        call_command('archive_exam_enrollment_history', self.output, keep_years=5, stdout=io.StringIO())
+
+        self.assertQuerysetEqual(ExamEnrollmentHistory.objects.all(), [self.recent_history], transform=lambda h: h)
+        with open(self.output, newline='') as archive:
+            rows = list(csv.DictReader(archive))
+        self.assertEqual([int(row['id']) for row in rows], [self.old_history.pk])
+
+    def test_dry_run_does_not_delete(self):
+        call_command('archive_exam_enrollment_history', self.output, dry_run=True, stdout=io.StringIO())
+
+        self.assertEqual(ExamEnrollmentHistory.objects.count(), 2)
@@ -0,0 +1,91 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+import datetime
+
+from django.test import TestCase
+
+from base.models import academic_year_entity_acronym
+from base.models.academic_year import AcademicYear
+from base.models.academic_year_entity_acronym import AcademicYearEntityAcronym
+from base.models.learning_unit_year import LearningUnitYear, LearningUnitYearQuerySet
+from base.tests.factories.academic_year import AcademicYearFactory
+from base.tests.factories.entity_version import EntityVersionFactory
+from base.tests.factories.learning_unit_year import LearningUnitYearFactory
+
+
+class TestAcademicYearEntityAcronym(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.academic_year_2017 = AcademicYearFactory(year=2017)
+        cls.academic_year_2018 = AcademicYearFactory(year=2018)
+        cls.old_version = EntityVersionFactory(acronym='OLD', start_date=datetime.date(2010, 1, 1),
+                                               end_date=datetime.date(2018, 1, 1))
+        cls.new_version = EntityVersionFactory(entity=cls.old_version.entity, acronym='NEW',
+                                               start_date=datetime.date(2018, 1, 2))
+
+    def assert_acronyms(self, expected):
+        self.assertDictEqual(
+            {
+                row.academic_year.year: row.acronym
+                for row in AcademicYearEntityAcronym.objects.filter(entity=self.old_version.entity)
+            },
+            expected
+        )
+
+    def test_kept_up_to_date_with_entity_versions(self):
+        self.assert_acronyms({2017: 'OLD', 2018: 'NEW'})
+
+        self.new_version.acronym = 'RENAMED'
+        self.new_version.save()
+        self.assert_acronyms({2017: 'OLD', 2018: 'RENAMED'})
+
+        self.new_version.delete()
+        self.assert_acronyms({2017: 'OLD'})
+
+    def test_kept_up_to_date_with_academic_years(self):
+        academic_year = AcademicYear.objects.get(pk=self.academic_year_2018.pk)
+        academic_year.start_date = datetime.date(2017, 12, 31)
+        academic_year.save()
+
+        self.assert_acronyms({2017: 'OLD', 2018: 'OLD'})
+
+    def test_refresh_all(self):
+        AcademicYearEntityAcronym.objects.all().delete()
+
+        academic_year_entity_acronym.refresh()
+
+        self.assert_acronyms({2017: 'OLD', 2018: 'NEW'})
+
+    def test_annotate_entity_requirement_acronym(self):
+        luy = LearningUnitYearFactory(
+            academic_year=self.academic_year_2017,
+            learning_container_year__academic_year=self.academic_year_2017,
+            learning_container_year__requirement_entity=self.old_version.entity,
+        )
+        queryset = LearningUnitYearQuerySet.annotate_entity_requirement_acronym(
+            LearningUnitYear.objects.filter(pk=luy.pk)
+        )
+        self.assertEqual(queryset.get().entity_requirement, 'OLD')
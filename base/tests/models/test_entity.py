@@ -30,7 +30,7 @@ import factory.fuzzy
 from django.test import TestCase
 from django.utils import timezone
 
-from base.models import entity
+from base.models import entity, entity_version
 from base.models.entity import find_versions_from_entites
 from base.models.entity_version import EntityVersion
 from base.models.enums import entity_type
@@ -116,6 +116,30 @@ class EntityTest(TestCase):
         entities_with_descendants = EntityVersion.objects.get_tree([self.parent, parent_2], date=self.date_in_2015)
         self.assertEqual(len(entities_with_descendants), 8)  # 5 for parent + 3 for parent_2
 
+    def test_find_descendant_entity_ids(self):
+        self.assertSetEqual(
+            entity_version.find_descendant_entity_ids([self.parent], date=self.date_in_2015),
+            {self.parent.id, *(child.id for child in self.children)}
+        )
+        self.assertSetEqual(
+            entity_version.find_descendant_entity_ids([self.parent.id], date=self.date_in_2017),
+            {self.parent.id}
+        )
+
+    def test_find_descendant_entity_ids_same_as_get_tree(self):
+        tree = EntityVersion.objects.get_tree([self.parent], date=self.date_in_2015)
+        self.assertSetEqual(
+            entity_version.find_descendant_entity_ids([self.parent], date=self.date_in_2015),
+            {row['entity_id'] for row in tree}
+        )
+
+    def test_find_ancestors(self):
+        self.assertEqual(
+            [ancestor.entity for ancestor in entity_version.find_ancestors(self.children[0], date=self.date_in_2015)],
+            [self.parent]
+        )
+        self.assertEqual(entity_version.find_ancestors(self.parent, date=self.date_in_2015), [])
+
     def test_most_recent_acronym(self):
         most_recent_year = 2018
         for year in range(2016, most_recent_year + 1):
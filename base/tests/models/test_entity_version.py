@@ -27,12 +27,13 @@ import datetime
 
 import factory
 import factory.fuzzy
-from django.test import TestCase
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
 from django.utils import timezone
 
 from base.business.learning_units.perms import find_last_requirement_entity_version
 from base.models import entity_version
-from base.models.entity_version import build_current_entity_version_structure_in_memory, \
+from base.models.entity_version import EntityVersion, build_current_entity_version_structure_in_memory, \
     find_parent_of_type_into_entity_structure, get_structure_of_entity_version, \
     get_entity_version_parent_or_itself_from_type
 from base.models.enums import organization_type
@@ -595,6 +596,28 @@ class EntityVersionLoadInMemoryTest(TestCase):
                                                                         entity_type=case.get('entity_type'))
                 self.assertEqual(case.get('expected_result'), to_test)
 
+    def test_get_structure_of_entity_version_by_acronym_ignores_case(self):
+        structure = entity_version.build_current_entity_version_structure_in_memory()
+        self.assertEqual(get_structure_of_entity_version(structure, 'loci')['entity_version'], self.LOCI)
+        self.assertIsNone(get_structure_of_entity_version(structure, 'UNKNOWN'))
+
+    def test_hierarchy_children(self):
+        hierarchy = entity_version.get_entity_version_hierarchy()
+        self.assertEqual(hierarchy[self.SC.entity_id]['entity_version_parent'], self.root)
+        self.assertCountEqual(hierarchy[self.SC.entity_id]['direct_children'], [self.MATH, self.PHYS])
+        self.assertCountEqual(
+            hierarchy[self.root.entity_id]['all_children'],
+            [self.SC, self.MATH, self.PHYS, self.LOCI, self.URBA, self.BARC]
+        )
+
+    def test_find_parent_of_type_into_hierarchy(self):
+        hierarchy = entity_version.get_entity_version_hierarchy()
+        self.assertEqual(
+            find_parent_of_type_into_entity_structure(self.URBA, hierarchy, FACULTY),
+            self.LOCI.entity
+        )
+        self.assertIsNone(find_parent_of_type_into_entity_structure(self.SC, hierarchy, SCHOOL))
+
 
 class TestFindLastEntityVersionByLearningUnitYearId(TestCase):
     def test_when_entity_version(self):
@@ -616,3 +639,37 @@ class TestFindLastEntityVersionByLearningUnitYearId(TestCase):
             learning_unit_year_id=learning_unit_year.id,
         )
         self.assertEqual(an_entity_version, actual_entity_version)
+
+
+class TestEntityVersionHierarchyCache(TransactionTestCase):
+    def setUp(self):
+        self.start_date = datetime.date.today() - datetime.timedelta(days=10)
+        self.root = EntityVersionFactory(parent=None, start_date=self.start_date, end_date=None)
+
+    def test_hierarchy_shared_for_same_date(self):
+        hierarchy = entity_version.get_entity_version_hierarchy()
+        self.assertIs(hierarchy, entity_version.get_entity_version_hierarchy(datetime.date.today()))
+        self.assertIn(self.root.entity_id, hierarchy)
+
+    def test_hierarchy_invalidated_when_entity_version_saved(self):
+        hierarchy = entity_version.get_entity_version_hierarchy()
+        child = EntityVersionFactory(parent=self.root.entity, start_date=self.start_date, end_date=None)
+
+        new_hierarchy = entity_version.get_entity_version_hierarchy()
+        self.assertIsNot(hierarchy, new_hierarchy)
+        self.assertEqual(new_hierarchy[self.root.entity_id]['direct_children'], [child])
+
+    def test_hierarchy_invalidated_when_entity_version_changed_by_another_process(self):
+        hierarchy = entity_version.get_entity_version_hierarchy()
+        # A queryset update does not send the signals, like a change made by another process
+        EntityVersion.objects.filter(pk=self.root.pk).update(acronym="NEWROOT", changed=timezone.now())
+
+        new_hierarchy = entity_version.get_entity_version_hierarchy()
+        self.assertIsNot(hierarchy, new_hierarchy)
+        self.assertEqual(new_hierarchy[self.root.entity_id]['entity_version'].acronym, "NEWROOT")
+
+    def test_hierarchy_not_shared_within_transaction_modifying_entity_versions(self):
+        with transaction.atomic():
+            EntityVersionFactory(parent=self.root.entity, start_date=self.start_date, end_date=None)
+            hierarchy = entity_version.get_entity_version_hierarchy()
+            self.assertIsNot(hierarchy, entity_version.get_entity_version_hierarchy())
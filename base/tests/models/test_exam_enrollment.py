@@ -28,6 +28,7 @@ import datetime
 from django.test import TestCase
 
 from base.models import exam_enrollment, exceptions
+from base.models.enums import exam_enrollment_justification_type as justification_types
 from base.models.enums import exam_enrollment_state as enrollment_states
 from base.tests.factories.academic_year import create_current_academic_year
 from base.tests.factories.exam_enrollment import ExamEnrollmentFactory
@@ -147,6 +148,39 @@ class ExamEnrollmentTest(TestCase):
                                    offer_enrollment=self.offer_enrollment)
         self.assertTrue(exam_enrollment.is_deadline_tutor_reached(self.exam_enrollment))
 
+    def test_find_for_score_encodings_annotate_deadlines(self):
+        deadline = datetime.date.today() + datetime.timedelta(days=3)
+        SessionExamDeadlineFactory(deadline=deadline,
+                                   deadline_tutor=5,
+                                   number_session=self.session_exam.number_session,
+                                   offer_enrollment=self.offer_enrollment)
+        enrollments = {enrollment.pk: enrollment for enrollment in
+                       exam_enrollment.find_for_score_encodings(session_exam_number=1)}
+
+        with self.assertNumQueries(0):
+            enrollment = enrollments[self.exam_enrollment.pk]
+            self.assertEqual(exam_enrollment.get_deadline(enrollment), deadline - datetime.timedelta(days=5))
+            self.assertFalse(exam_enrollment.is_deadline_reached(enrollment))
+            self.assertTrue(exam_enrollment.is_deadline_tutor_reached(enrollment))
+
+            enrollment_without_deadline = enrollments[self.exam_enrollment_2.pk]
+            self.assertIsNone(exam_enrollment.get_deadline(enrollment_without_deadline))
+            self.assertFalse(exam_enrollment.is_deadline_reached(enrollment_without_deadline))
+
+    def test_find_for_score_encodings_annotate_dates_of_first_deadline(self):
+        deadline = datetime.date.today() + datetime.timedelta(days=3)
+        for deadline_tutor in (5, None):
+            SessionExamDeadlineFactory(deadline=deadline,
+                                       deadline_tutor=deadline_tutor,
+                                       number_session=self.session_exam.number_session,
+                                       offer_enrollment=self.offer_enrollment)
+        enrollment = exam_enrollment.find_for_score_encodings(session_exam_number=1).get(pk=self.exam_enrollment.pk)
+
+        self.assertEqual(
+            exam_enrollment.get_session_exam_deadline_dates(enrollment),
+            (deadline, deadline - datetime.timedelta(days=5))
+        )
+
     def test_find_for_score_encodings_for_all_enrollement_state(self):
         self.assertCountEqual(exam_enrollment.find_for_score_encodings(
             session_exam_number=1,
@@ -157,3 +191,24 @@ class ExamEnrollmentTest(TestCase):
             session_exam_number=1,
             only_enrolled=True
         ), [self.exam_enrollment])
+
+    def test_find_double_encoding_differences(self):
+        identical = ExamEnrollmentFactory(score_final=12)
+        different_score = ExamEnrollmentFactory(score_final=12, score_reencoded=12)
+        score_without_reencoding = ExamEnrollmentFactory(score_final=12)
+        different_justification = ExamEnrollmentFactory(justification_final=justification_types.ABSENCE_UNJUSTIFIED)
+        # The reencoded values are not saved
+        identical.score_reencoded = 12
+        different_score.score_reencoded = 13
+        score_without_reencoding.score_reencoded = None
+        different_justification.score_reencoded = 12
+        reencoded_enrollments = [identical, different_score, score_without_reencoding, different_justification]
+
+        self.assertCountEqual(
+            exam_enrollment.find_double_encoding_differences(reencoded_enrollments, is_program_manager=True),
+            [different_score, score_without_reencoding, different_justification]
+        )
+        self.assertCountEqual(
+            exam_enrollment.find_double_encoding_differences(reencoded_enrollments, is_program_manager=False),
+            [identical, different_score, different_justification]
+        )
@@ -1,7 +1,9 @@
 from django.db.models import F
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
 
 import base.utils.db
+from base.models.academic_year import AcademicYear
+from base.tests.factories.academic_year import AcademicYearFactory
 
 
 class TestConvertOrderByStringsToExpressions(SimpleTestCase):
@@ -34,4 +36,11 @@ class TestConvertOrderByStringsToExpressions(SimpleTestCase):
         self.assertEqual(
             result,
             (F("acronym"), F("academic_year").desc(), F("title"))
-        )
\ No newline at end of file
+        )
+
+class TestRollbackAtomic(TestCase):
+    def test_changes_are_rolled_back(self):
+        with base.utils.db.rollback_atomic():
+            AcademicYearFactory(year=1900)
+            self.assertTrue(AcademicYear.objects.filter(year=1900).exists())
+        self.assertFalse(AcademicYear.objects.filter(year=1900).exists())
@@ -23,14 +23,21 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
+from unittest import mock
 
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.test import TestCase
 from django.urls import reverse
 
+from base import tasks
+from base.business import xls_export_job
+from base.models.learning_unit_year import LearningUnitYear
 from base.tests.factories.academic_year import AcademicYearFactory
 from base.tests.factories.learning_unit_year import LearningUnitYearFactory
 from base.tests.factories.person import PersonWithPermissionsFactory
 from base.tests.views.learning_units.search.search_test_mixin import TestRenderToExcelMixin
+from base.utils.search import SearchPaginator
 
 
 class TestExcelGeneration(TestRenderToExcelMixin, TestCase):
@@ -56,3 +63,179 @@ class TestExcelGeneration(TestRenderToExcelMixin, TestCase):
     def setUp(self):
         self.client.force_login(self.person.user)
 
+
+class TestExcelBackgroundGeneration(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.academic_years = AcademicYearFactory.produce()
+        cls.luys = LearningUnitYearFactory.create_batch(4)
+        cls.url = reverse("learning_units")
+        cls.get_data = {
+            "academic_year": str(cls.luys[0].academic_year.id),
+            "xls_status": "xls",
+            "xls_background": "1",
+        }
+        cls.person = PersonWithPermissionsFactory("can_access_learningunit")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.person.user)
+
+    @mock.patch("base.tasks.generate_search_xls.apply_async")
+    def test_launch_export_job(self, mock_apply_async):
+        response = self.client.get(self.url, data=self.get_data)
+
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['job_id']
+        self.assertEqual(response.json()['status_url'], reverse('xls_export_status', args=[job_id]))
+        user_id, view_path, query_string, _ = mock_apply_async.call_args[1]['args']
+        self.assertEqual(user_id, self.person.user.pk)
+        self.assertEqual(view_path, "base.views.learning_units.search.simple.LearningUnitSearch")
+        self.assertNotIn("xls_background", query_string)
+
+    @mock.patch("base.business.xls_export_job.celery_app.AsyncResult")
+    @mock.patch("base.tasks.generate_search_xls.apply_async")
+    def test_reuse_job_of_identical_export(self, mock_apply_async, mock_async_result):
+        mock_async_result.return_value = mock.Mock(state=xls_export_job.STATE_PENDING)
+        first_response = self.client.get(self.url, data=self.get_data)
+        second_response = self.client.get(self.url, data=self.get_data)
+
+        self.assertEqual(first_response.json()['job_id'], second_response.json()['job_id'])
+        self.assertEqual(mock_apply_async.call_count, 1)
+
+    @mock.patch("base.business.xls_export_job.celery_app.AsyncResult")
+    @mock.patch("base.tasks.generate_search_xls.apply_async")
+    def test_relaunch_failed_job_of_identical_export(self, mock_apply_async, mock_async_result):
+        mock_async_result.return_value = mock.Mock(state=xls_export_job.STATE_FAILURE)
+        first_response = self.client.get(self.url, data=self.get_data)
+        second_response = self.client.get(self.url, data=self.get_data)
+
+        self.assertNotEqual(first_response.json()['job_id'], second_response.json()['job_id'])
+        self.assertEqual(mock_apply_async.call_count, 2)
+
+    @mock.patch("base.business.xls_export_job.celery_app.AsyncResult")
+    @mock.patch("base.tasks.generate_search_xls.apply_async")
+    def test_only_one_request_relaunches_failed_job(self, mock_apply_async, mock_async_result):
+        mock_async_result.return_value = mock.Mock(state=xls_export_job.STATE_FAILURE)
+        failed_job_id = self.client.get(self.url, data=self.get_data).json()['job_id']
+        # A concurrent request is relaunching the failed job
+        cache.add(xls_export_job.EXPORT_RELAUNCH_KEY.format(job_id=failed_job_id), "1234abcd")
+
+        response = self.client.get(self.url, data=self.get_data)
+
+        self.assertEqual(response.json()['job_id'], "1234abcd")
+        self.assertEqual(mock_apply_async.call_count, 1)
+
+    @mock.patch("base.tasks.delete_search_xls.apply_async")
+    @mock.patch("base.tasks.default_storage")
+    @mock.patch("base.views.learning_units.search.common.create_xls")
+    def test_export_job(self, mock_create_xls, mock_storage, mock_delete):
+        xls_response = HttpResponse(b"content")
+        xls_response['Content-Disposition'] = 'attachment; filename="learning_units.xlsx"'
+        mock_create_xls.return_value = xls_response
+        mock_storage.save.return_value = "search_exports/job.xlsx"
+
+        result = tasks.generate_search_xls.apply(
+            args=[
+                self.person.user.pk,
+                "base.views.learning_units.search.simple.LearningUnitSearch",
+                "academic_year={}&xls_status=xls".format(self.luys[0].academic_year.id),
+                "en"
+            ],
+            task_id="job"
+        ).get()
+
+        self.assertEqual(
+            result,
+            {'user_id': self.person.user.pk, 'file_path': "search_exports/job.xlsx", 'file_name': "learning_units.xlsx"}
+        )
+        self.assertEqual(mock_create_xls.call_args[0][0], self.person.user)
+        self.assertIn(self.luys[0], mock_create_xls.call_args[0][1])
+        self.assertTrue(mock_delete.called)
+
+    @mock.patch("base.business.xls_export_job.celery_app.AsyncResult")
+    def test_status_of_done_job(self, mock_async_result):
+        mock_async_result.return_value = mock.Mock(
+            state=xls_export_job.STATE_SUCCESS,
+            info={'user_id': self.person.user.pk, 'file_path': "search_exports/job.xlsx", 'file_name': "lu.xlsx"}
+        )
+        response = self.client.get(reverse('xls_export_status', args=["1234abcd"]))
+
+        self.assertEqual(
+            response.json(),
+            {
+                'state': xls_export_job.STATE_SUCCESS,
+                'file_name': "lu.xlsx",
+                'download_url': reverse('xls_export_download', args=["1234abcd"])
+            }
+        )
+
+    @mock.patch("base.business.xls_export_job.celery_app.AsyncResult")
+    def test_status_and_download_of_job_of_another_user(self, mock_async_result):
+        mock_async_result.return_value = mock.Mock(
+            state=xls_export_job.STATE_SUCCESS,
+            info={'user_id': self.person.user.pk + 1, 'file_path': "search_exports/job.xlsx", 'file_name': "lu.xlsx"}
+        )
+        response = self.client.get(reverse('xls_export_status', args=["1234abcd"]))
+        self.assertEqual(response.json(), {'state': xls_export_job.STATE_PENDING})
+
+        response = self.client.get(reverse('xls_export_download', args=["1234abcd"]))
+        self.assertEqual(response.status_code, 404)
+
+
+class TestSearchPagination(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.academic_year = AcademicYearFactory()
+        cls.luys = LearningUnitYearFactory.create_batch(3, academic_year=cls.academic_year)
+        cls.url = reverse("learning_units")
+        cls.person = PersonWithPermissionsFactory("can_access_learningunit")
+
+    def setUp(self):
+        self.client.force_login(self.person.user)
+
+    def test_count_on_queryset_with_annotations(self):
+        queryset = LearningUnitYear.objects.filter(academic_year=self.academic_year).annotate_full_title()
+        paginator = SearchPaginator(queryset, 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 3)
+
+    def test_json_pages_by_cursor(self):
+        data = {"academic_year": str(self.academic_year.id), "paginator_size": 2, "cursor": ""}
+        response = self.client.get(self.url, data=data, HTTP_ACCEPT="application/json")
+        first_page = response.json()
+        self.assertEqual(len(first_page['object_list']), 2)
+        self.assertNotIn('total', first_page)
+
+        data['cursor'] = first_page['next_cursor']
+        response = self.client.get(self.url, data=data, HTTP_ACCEPT="application/json")
+        second_page = response.json()
+        self.assertEqual(len(second_page['object_list']), 1)
+        self.assertIsNone(second_page['next_cursor'])
+
+    def test_json_pages_by_cursor_not_shifted_by_results_added_before(self):
+        data = {"academic_year": str(self.academic_year.id), "paginator_size": 2, "cursor": ""}
+        first_page = self.client.get(self.url, data=data, HTTP_ACCEPT="application/json").json()
+        LearningUnitYearFactory(academic_year=self.academic_year, acronym="A0000")
+
+        data['cursor'] = first_page['next_cursor']
+        second_page = self.client.get(self.url, data=data, HTTP_ACCEPT="application/json").json()
+        self.assertListEqual(
+            [result['acronym'] for result in first_page['object_list'] + second_page['object_list']],
+            sorted(luy.acronym for luy in self.luys)
+        )
+
+    def test_json_pages_by_cursor_on_key_with_null_values(self):
+        data = {
+            "academic_year": str(self.academic_year.id),
+            "paginator_size": 1,
+            "ordering": "-requirement_entity",
+            "cursor": "",
+        }
+        acronyms = []
+        for _ in range(len(self.luys)):
+            page = self.client.get(self.url, data=data, HTTP_ACCEPT="application/json").json()
+            acronyms += [result['acronym'] for result in page['object_list']]
+            data['cursor'] = page['next_cursor']
+        self.assertIsNone(data['cursor'])
+        self.assertCountEqual(acronyms, [luy.acronym for luy in self.luys])
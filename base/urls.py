@@ -50,7 +50,7 @@ from attribution.views.learning_unit.update import UpdateAttributionView
 from base.views import learning_achievement, search, education_groups, user_list
 from base.views import learning_unit, offer, common, institution, organization, academic_calendar, \
     my_osis, entity, student, notifications
-from base.views import teaching_material
+from base.views import teaching_material, xls_export
 from base.views.education_groups import urls as education_groups_urls
 from base.views.filter import filter_cities_by_country, filter_campus_by_city
 from base.views.learning_units.detail import DetailLearningUnitYearView
@@ -143,6 +143,11 @@ urlpatterns = [
         url(r'^mandates/$', institution.mandates, name='mandates'),
     ])),
 
+    url(r'^xls_export/(?P<job_id>[0-9a-f-]+)/', include([
+        url(r'^status/$', xls_export.xls_export_status, name='xls_export_status'),
+        url(r'^download/$', xls_export.xls_export_download, name='xls_export_download'),
+    ])),
+
     url(r'^learning_units/', include([
         url(r'^by_activity/', base.views.learning_units.search.simple.LearningUnitSearch.as_view(),
             name='learning_units'),
@@ -30,6 +30,7 @@ from functools import wraps
 
 from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
 from django.http import QueryDict
 
 CACHE_FILTER_TIMEOUT = None
@@ -91,6 +92,28 @@ class OsisCache(abc.ABC):
         cache.delete(self.key)
 
 
+class CacheInvalidation(abc.ABC):
+    """
+    Invalidation run immediately and once again when the current transaction is committed, so that data loaded by
+    another process before the commit is not kept.
+    While it is pending (transaction not committed yet), the data it invalidates must not be put in cache.
+    """
+
+    @abc.abstractmethod
+    def __call__(self):
+        pass
+
+    def run(self):
+        self()
+        transaction.on_commit(self)
+
+    @classmethod
+    def get_pending(cls) -> list:
+        # Django removes the callbacks of rolled back transactions (or savepoints) from run_on_commit
+        connection = transaction.get_connection()
+        return [func for _, func in connection.run_on_commit if isinstance(func, cls)]
+
+
 class RequestCache(OsisCache):
     PREFIX_KEY = 'cache_filter'
 
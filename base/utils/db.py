@@ -23,6 +23,9 @@
 #    see http://www.gnu.org/licenses/.
 #
 ############################################################################
+from contextlib import contextmanager
+
+from django.db import transaction
 from django.db.models import F
 
 
@@ -35,3 +38,12 @@ def convert_order_by_strings_to_expressions(order_by):
         return expression
 
     return tuple(_convert_field_to_expression(field) for field in order_by)
+
+
+
+@contextmanager
+def rollback_atomic(using=None):
+    """ Atomic block whose changes are always rolled back, e.g. the data generated by a benchmark """
+    with transaction.atomic(using=using):
+        yield
+        transaction.set_rollback(True, using=using)
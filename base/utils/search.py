@@ -23,18 +23,56 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
+import json
 import urllib
+from typing import List
 
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet, F, Q
 from django.http import JsonResponse, QueryDict
+from django.urls import reverse
+from django.utils import translation
+from django.utils.functional import cached_property
 from django_filters.views import FilterView
 
+from base import tasks
+from base.business import xls_export_job
 from base.templatetags import pagination
 from base.utils.cache import SearchParametersCache
 
+CURSOR_PARAM = 'cursor'
+CURSOR_SALT = 'search_page'
+
+
+class SearchPaginator(Paginator):
+    """
+        Paginator which counts the results on the ids of the queryset only, without its annotations,
+        ordering and related objects which are only needed to display a page.
+    """
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+        return self.object_list.order_by().values('pk').count()
+
+
+class _CursorSerializer:
+    """ JSON serializer of the cursors, which also accepts the dates and decimals of the sort keys """
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'), cls=DjangoJSONEncoder).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
+
 
 class SearchMixin:
     """
         Search Mixin to return FilterView filter result as json when accept header is of type application/json.
+        When the cursor parameter is given, the json gives the cursor of the next page instead of the total,
+        so that the results are not counted. The cursor holds the sort keys of the last result of the page.
         Implements method to return number of items per page.
         Add possibility to cache search parameters
 
@@ -42,18 +80,67 @@ class SearchMixin:
     """
     serializer_class = None
     cache_search = True
+    paginator_class = SearchPaginator
 
-    def render_to_response(self, context, **response_kwargs):
-        if "application/json" in self.request.headers.get("Accept", ""):
-            serializer = self.serializer_class(
-                context["page_obj"],
-                context={
-                    'request': self.request,
-                    'language': self.request.LANGUAGE_CODE
+    def get(self, request, *args, **kwargs):
+        if self._is_json_request() and CURSOR_PARAM in request.GET:
+            return self._render_cursor_page()
+        return super().get(request, *args, **kwargs)
+
+    def _is_json_request(self):
+        return "application/json" in self.request.headers.get("Accept", "")
+
+    def _render_cursor_page(self):
+        filterset = self.get_filterset(self.get_filterset_class())
+        if not filterset.is_bound or filterset.is_valid() or not self.get_strict():
+            queryset = filterset.qs
+        else:
+            queryset = filterset.queryset.none()
+
+        page_size = int(self.get_paginate_by(queryset))
+        keys = _get_cursor_keys(queryset)
+        queryset = queryset.annotate(
+            **{_get_cursor_alias(index): F(key.lstrip('-')) for index, key in enumerate(keys + ['pk'])}
+        )
+        try:
+            cursor = signing.loads(self.request.GET[CURSOR_PARAM], salt=CURSOR_SALT, serializer=_CursorSerializer)
+        except signing.BadSignature:
+            cursor = None
+        # A cursor of another ordering restarts from the first page
+        if isinstance(cursor, dict) and cursor.get('keys') == keys:
+            queryset = queryset.filter(_get_keyset_filter(keys, cursor['values']))
+        # One more result is fetched to know whether there is a next page
+        results = list(queryset[:page_size + 1])
+        next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            next_cursor = signing.dumps(
+                {
+                    'keys': keys,
+                    'values': [getattr(results[-1], _get_cursor_alias(index)) for index in range(len(keys) + 1)],
                 },
-                many=True)
+                salt=CURSOR_SALT,
+                serializer=_CursorSerializer
+            )
+        return JsonResponse({
+            'object_list': self._serialize(results),
+            'next_cursor': next_cursor,
+        })
+
+    def _serialize(self, results):
+        serializer = self.serializer_class(
+            results,
+            context={
+                'request': self.request,
+                'language': self.request.LANGUAGE_CODE
+            },
+            many=True)
+        return serializer.data
+
+    def render_to_response(self, context, **response_kwargs):
+        if self._is_json_request():
             return JsonResponse({
-                'object_list': serializer.data,
+                'object_list': self._serialize(context["page_obj"]),
                 'total': context['paginator'].count,
             })
         return super().render_to_response(context, **response_kwargs)
@@ -70,9 +157,45 @@ class SearchMixin:
         return pagination.get_paginator_size(self.request)
 
 
+def _get_cursor_keys(queryset: QuerySet) -> List[str]:
+    """ Names of the fields or annotations the queryset is ordered by ; the pk is the last key of the cursor """
+    keys = list(queryset.query.order_by or queryset.model._meta.ordering)
+    if not all(isinstance(key, str) and key != '?' for key in keys):
+        raise ImproperlyConfigured("The search results can only be paged by cursor when ordered by field names")
+    return keys
+
+
+def _get_cursor_alias(index: int) -> str:
+    return 'cursor_key_{}'.format(index)
+
+
+def _get_keyset_filter(keys: List[str], values: list) -> Q:
+    """
+        Results after the values of the cursor, in the order of the keys then the pk.
+        As with PostgreSQL, the null values come last in ascending order and first in descending order.
+    """
+    *sort_values, pk = values
+    keyset_filter = Q(**{_get_cursor_alias(len(keys)) + '__gt': pk})
+    for index, (key, value) in reversed(list(enumerate(zip(keys, sort_values)))):
+        alias = _get_cursor_alias(index)
+        descending = key.startswith('-')
+        if value is None:
+            keyset_filter = Q(**{alias + '__isnull': True}) & keyset_filter
+            if descending:
+                keyset_filter |= Q(**{alias + '__isnull': False})
+        else:
+            keyset_filter = Q(**{alias + ('__lt' if descending else '__gt'): value}) | \
+                (Q(**{alias: value}) & keyset_filter)
+            if not descending:
+                keyset_filter |= Q(**{alias + '__isnull': True})
+    return keyset_filter
+
+
 class RenderToExcel:
     """
         View Mixin to generate excel when xls_status parameter is set.
+        When the xls_background parameter is set too, the excel is generated by a job
+        and the response gives the url to follow its progress (see base.business.xls_export_job).
 
         name: value of xls_status so as to generate the excel
         render_method: function to generate the excel.
@@ -83,9 +206,38 @@ class RenderToExcel:
         self.render_method = render_method
 
     def __call__(self, filter_class: FilterView):
+        # A view decorated several times keeps the path of the view as it is declared in its module
+        xls_view_path = vars(filter_class).get('xls_view_path') or \
+            "{}.{}".format(filter_class.__module__, filter_class.__qualname__)
+        xls_renderers = dict(getattr(filter_class, 'xls_renderers', {}), **{self.name: self.render_method})
+
         class Wrapped(filter_class):
+            def get(obj, request, *args, **kwargs):
+                if request.GET.get(xls_export_job.XLS_STATUS_PARAM) == self.name and \
+                        request.GET.get(xls_export_job.XLS_BACKGROUND_PARAM):
+                    return self._start_export(request, xls_view_path)
+                return super().get(request, *args, **kwargs)
+
             def render_to_response(obj, context, **response_kwargs):
                 if obj.request.GET.get('xls_status') == self.name:
                     return self.render_method(obj, context, **response_kwargs)
                 return super().render_to_response(context, **response_kwargs)
+
+        Wrapped.xls_view_path = xls_view_path
+        Wrapped.xls_renderers = xls_renderers
         return Wrapped
+
+    @staticmethod
+    def _start_export(request, view_path):
+        job_id, launch = xls_export_job.reserve_job(request.user, view_path, request.GET)
+        if launch:
+            tasks.generate_search_xls.apply_async(
+                args=[
+                    request.user.pk,
+                    view_path,
+                    xls_export_job.get_export_query_string(request.GET),
+                    translation.get_language()
+                ],
+                task_id=job_id
+            )
+        return JsonResponse({'job_id': job_id, 'status_url': reverse('xls_export_status', args=[job_id])}, status=202)
@@ -0,0 +1,48 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from base.business import xls_export_job
+
+
+@login_required
+@require_http_methods(["GET"])
+def xls_export_status(request, job_id):
+    """ Return the state of the export job, then the url of the file once it is generated """
+    return JsonResponse(xls_export_job.get_job_status(job_id, request.user))
+
+
+@login_required
+@require_http_methods(["GET"])
+def xls_export_download(request, job_id):
+    export_file = xls_export_job.get_export_file(job_id, request.user)
+    if export_file is None or not default_storage.exists(export_file[0]):
+        raise Http404
+    file_path, file_name = export_file
+    return FileResponse(default_storage.open(file_path, 'rb'), as_attachment=True, filename=file_name)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ProgramManagementConfig(AppConfig):
     name = 'program_management'
+
+    def ready(self):
+        # Register the signals which invalidate the cache of program trees
+        from program_management.models import models_signals
@@ -37,8 +37,9 @@ from openpyxl.writer.excel import save_virtual_workbook
 
 from attribution.business import attribution_charge_new
 from base.business.learning_unit import CMS_LABEL_PEDAGOGY, CMS_LABEL_PEDAGOGY_FR_AND_EN, CMS_LABEL_SPECIFICATIONS
-from base.business.learning_unit_xls import volume_information, annotate_qs, PROPOSAL_LINE_STYLES, \
+from base.business.learning_unit_xls import volume_information, PROPOSAL_LINE_STYLES, \
     prepare_proposal_legend_ws_data
+from base.business.learning_units.component_volumes import add_component_volumes
 from base.business.learning_units.xls_generator import hyperlinks_to_string
 from base.models.education_group_year import EducationGroupYear
 from base.models.enums.proposal_type import ProposalType
@@ -181,6 +182,13 @@ def _build_excel_lines_ues(custom_xls_form: CustomXlsForm, qs: QuerySet, hierarc
     colored_cells = defaultdict(list)
     idx = 1
 
+    if optional_data_needed['has_volume'] or optional_data_needed['has_teacher_list']:
+        qs = list(qs)
+    if optional_data_needed['has_volume']:
+        add_component_volumes([gey.child_leaf for gey in qs])
+    if optional_data_needed['has_teacher_list']:
+        attribution_charge_new.add_attribution_charge_news([gey.child_leaf for gey in qs])
+
     for gey in qs:
         luy = gey.child_leaf
         content.append(_get_optional_data(_fix_data(gey, luy, hierarchy), luy, optional_data_needed, gey))
@@ -308,12 +316,9 @@ def _get_optional_data(data, luy, optional_data_needed, gey):
     if optional_data_needed['has_session_derogation']:
         data.append(luy.get_session_display() or '')
     if optional_data_needed['has_volume']:
-        luys = annotate_qs(LearningUnitYear.objects.filter(id=luy.id))
-        data.extend(volume_information(luys[0]))
+        data.extend(volume_information(luy))
     if optional_data_needed['has_teacher_list']:
-        attribution_values = attribution_charge_new.find_attribution_charge_new_by_learning_unit_year_as_dict(
-                    luy
-                ).values()
+        attribution_values = luy.attribution_charge_news.values()
         data.append(
             ";".join(
                 [_get_attribution_line(value.get('person'))
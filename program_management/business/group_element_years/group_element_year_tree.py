@@ -21,11 +21,15 @@
 #  at the root of the source code of this program.  If not,                              #
 #  see http://www.gnu.org/licenses/.                                                     #
 # ########################################################################################
+from typing import List
+
 from django.conf import settings
 from django.db.models import OuterRef, Exists
 from django.templatetags.static import static
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django.utils.html import escape
+from django.utils.http import urlencode
 from django.utils.translation import gettext_lazy as _
 from waffle import switch_is_active
 
@@ -44,9 +48,16 @@ from base.models.proposal_learning_unit import ProposalLearningUnit
 from program_management.business.group_element_years import attach
 from program_management.business.group_element_years.management import EDUCATION_GROUP_YEAR, LEARNING_UNIT_YEAR
 
+# The path of a node is the id of the root followed by the ids of the links down to the node
+NODE_PATH_SEPARATOR = '_'
+
 
 class EducationGroupHierarchy:
-    """ Use to generate json from a list of education group years compatible with jstree """
+    """ Use to generate json from a list of education group years compatible with jstree
+
+    With a depth, only the given number of levels is built: the children of each node are loaded from the database
+    (one query per node) and the deeper nodes are sent to jstree as lazy nodes (see group_element_year_children).
+    """
     element_type = EDUCATION_GROUP_YEAR
 
     _cache_hierarchy = None
@@ -58,7 +69,10 @@ class EducationGroupHierarchy:
                  max_block: int = 0,
                  cache_structure=None,
                  cache_entity_parent_root: str = None,
-                 exclude_options: bool = False):
+                 exclude_options: bool = False,
+                 depth: int = None,
+                 permission_context: LinkActionPermissionContext = None,
+                 path: str = None):
 
         self.children = []
         self.included_group_element_years = []
@@ -74,15 +88,19 @@ class EducationGroupHierarchy:
         self.pdf_content = pdf_content
         self.max_block = max_block
         self.exclude_options = exclude_options
-
-        if not self.pdf_content or \
-                (not (self.group_element_year and
-                      self.group_element_year.child.type == GroupType.MINOR_LIST_CHOICE.name)):
+        self.depth = depth
+        self._permission_context = permission_context
+        # Stable id of the node in jstree, whose state plugin restores the opened nodes by id
+        self.path = path or self._get_default_path()
+
+        if self.depth != 0 and (not self.pdf_content or
+                                (not (self.group_element_year and
+                                      self.group_element_year.child.type == GroupType.MINOR_LIST_CHOICE.name))):
             self.generate_children()
 
-        self.modification_perm = ModificationPermission(self.root, self.group_element_year)
-        self.attach_perm = AttachPermission(self.root, self.group_element_year)
-        self.detach_perm = DetachPermission(self.root, self.group_element_year)
+        self.modification_perm = ModificationPermission(self.root, self.group_element_year, self.permission_context)
+        self.attach_perm = AttachPermission(self.root, self.group_element_year, self.permission_context)
+        self.detach_perm = DetachPermission(self.root, self.group_element_year, self.permission_context)
 
     @property
     def cache_hierarchy(self):
@@ -96,6 +114,12 @@ class EducationGroupHierarchy:
             self._cache_structure = build_current_entity_version_structure_in_memory()
         return self._cache_structure
 
+    @property
+    def permission_context(self) -> 'LinkActionPermissionContext':
+        if self._permission_context is None:
+            self._permission_context = LinkActionPermissionContext(self.root)
+        return self._permission_context
+
     @property
     def cache_entity_parent_root(self) -> EntityVersion:
         if self._cache_entity_parent_root is None:
@@ -107,24 +131,42 @@ class EducationGroupHierarchy:
                                                 self.get_queryset(),
                                                 self.exclude_options) or {}
 
+    @property
+    def is_lazy(self) -> bool:
+        return self.depth is not None
+
+    def _get_children_group_element_years(self):
+        if self.is_lazy:
+            has_children = GroupElementYear.objects.filter(parent=OuterRef("child_branch__id"))
+            return self.get_queryset().filter(parent=self.education_group_year)\
+                .annotate(has_children=Exists(has_children))
+        return self.cache_hierarchy.get(self.education_group_year.id) or []
+
     def generate_children(self):
+        # A lazy node must not load the whole subtree in the cache of the hierarchy
+        cache_hierarchy = self._cache_hierarchy if self.is_lazy else self.cache_hierarchy
 
-        for group_element_year in self.cache_hierarchy.get(self.education_group_year.id) or []:
+        for group_element_year in self._get_children_group_element_years():
             self._check_max_block(group_element_year.block)
             if group_element_year.child_branch and group_element_year.child_branch != self.root:
                 node = EducationGroupHierarchy(self.root, group_element_year,
-                                               cache_hierarchy=self.cache_hierarchy,
+                                               cache_hierarchy=cache_hierarchy,
                                                tab_to_show=self.tab_to_show,
                                                pdf_content=self.pdf_content,
                                                max_block=self.max_block,
                                                cache_structure=self.cache_structure,
-                                               cache_entity_parent_root=self.cache_entity_parent_root)
+                                               cache_entity_parent_root=self.cache_entity_parent_root,
+                                               depth=self.depth - 1 if self.is_lazy else None,
+                                               permission_context=self.permission_context,
+                                               path=self._get_child_path(group_element_year))
                 self._check_max_block(node.max_block)
                 self.included_group_element_years.extend(node.included_group_element_years)
             elif group_element_year.child_leaf:
-                node = NodeLeafJsTree(self.root, group_element_year, cache_hierarchy=self.cache_hierarchy,
+                node = NodeLeafJsTree(self.root, group_element_year, cache_hierarchy=cache_hierarchy,
                                       tab_to_show=self.tab_to_show, cache_structure=self.cache_structure,
-                                      cache_entity_parent_root=self.cache_entity_parent_root)
+                                      cache_entity_parent_root=self.cache_entity_parent_root,
+                                      permission_context=self.permission_context,
+                                      path=self._get_child_path(group_element_year))
 
             else:
                 continue
@@ -132,6 +174,14 @@ class EducationGroupHierarchy:
             self.children.append(node)
             self.included_group_element_years.append(group_element_year)
 
+    def _get_default_path(self) -> str:
+        if self.group_element_year is None:
+            return str(self.root.pk)
+        return NODE_PATH_SEPARATOR.join([str(self.root.pk), str(self.group_element_year.pk)])
+
+    def _get_child_path(self, group_element_year: GroupElementYear) -> str:
+        return NODE_PATH_SEPARATOR.join([self.path, str(group_element_year.pk)])
+
     def get_queryset(self):
         has_prerequisite = PrerequisiteItem.objects.filter(
             prerequisite__education_group_year__id=self.root.id,
@@ -167,9 +217,10 @@ class EducationGroupHierarchy:
 
     def to_json(self):
         return {
+            'id': self.path,
             'text': self._get_acronym(),
             'icon': self.icon,
-            'children': [child.to_json() for child in self.children],
+            'children': self._get_children_json(),
             'a_attr': {
                 'href': self.get_url(),
                 'root': self.root.pk,
@@ -191,9 +242,30 @@ class EducationGroupHierarchy:
                 'modification_disabled': not self.modification_perm.is_permitted(),
                 'modification_msg': escape(self.modification_perm.errors[0]) if self.modification_perm.errors else "",
                 'search_url': self._get_search_url(),
+                'children_url': self._get_children_url(),
             },
         }
 
+    def _get_children_json(self):
+        if self._has_children_to_load():
+            # jstree loads the children when the node is opened
+            return True
+        return [child.to_json() for child in self.children]
+
+    def _has_children_to_load(self) -> bool:
+        return self.depth == 0 and getattr(self.group_element_year, 'has_children', False)
+
+    def _get_children_url(self):
+        if not self._has_children_to_load():
+            return None
+        url = reverse('group_element_year_children', args=[
+            self.root.pk, self.education_group_year.pk, self.group_element_year.pk
+        ])
+        query = {'path': self.path}
+        if self.tab_to_show:
+            query['tab_to_show'] = self.tab_to_show
+        return url + "?" + urlencode(query)
+
     def _get_search_url(self):
         if attach.can_attach_learning_units(self.education_group_year):
             return reverse('quick_search_learning_unit', args=[self.root.pk, self.education_group_year.pk])
@@ -366,6 +438,7 @@ class NodeLeafJsTree(EducationGroupHierarchy):
 
     def to_json(self):
         return {
+            'id': self.path,
             'text': self._get_acronym(),
             'icon': self.icon,
             'a_attr': {
@@ -460,15 +533,37 @@ class NodeLeafJsTree(EducationGroupHierarchy):
         return
 
 
+class LinkActionPermissionContext:
+    """ Facts shared by the permissions of all the links of a tree: they are evaluated once per tree """
+    def __init__(self, root: EducationGroupYear):
+        self.root = root
+
+    # FIXME :: DEPRECATED - Use MinimumEditableYearValidator
+    @cached_property
+    def year_is_editable_errors(self) -> List[str]:
+        if education_group_perms._is_year_editable(self.root, False):
+            return []
+        return [
+            str(_("Cannot perform action on a education group before %(limit_year)s") % {
+                "limit_year": settings.YEAR_LIMIT_EDG_MODIFICATION
+            })
+        ]
+
+
 class LinkActionPermission:
-    def __init__(self, root: EducationGroupYear, link: GroupElementYear):
+    def __init__(self, root: EducationGroupYear, link: GroupElementYear,
+                 context: LinkActionPermissionContext = None):
         self.root = root
         self.link = link
+        self.context = context or LinkActionPermissionContext(root)
         self.errors = []
 
     def is_permitted(self):
         return len(self.errors) == 0
 
+    def _check_year_is_editable(self):
+        self.errors.extend(self.context.year_is_editable_errors)
+
 
 class AttachPermission(LinkActionPermission):
     def is_permitted(self):
@@ -476,15 +571,6 @@ class AttachPermission(LinkActionPermission):
         self._check_if_leaf()
         return super().is_permitted()
 
-    # FIXME :: DEPRECATED - Use MinimumEditableYearValidator
-    def _check_year_is_editable(self):
-        if not education_group_perms._is_year_editable(self.root, False):
-            self.errors.append(
-                str(_("Cannot perform action on a education group before %(limit_year)s") % {
-                    "limit_year": settings.YEAR_LIMIT_EDG_MODIFICATION
-                })
-            )
-
     # FIXME :: DEPRECATED - Use ParentIsNotLeafValidator
     def _check_if_leaf(self):
         if self.link and self.link.child_leaf:
@@ -500,15 +586,6 @@ class DetachPermission(LinkActionPermission):
         self._check_if_prerequisites()
         return super().is_permitted()
 
-    # FIXME :: DEPRECATED - Use MinimumEditableYearValidator
-    def _check_year_is_editable(self):
-        if not education_group_perms._is_year_editable(self.root, False):
-            self.errors.append(
-                str(_("Cannot perform action on a education group before %(limit_year)s") % {
-                    "limit_year": settings.YEAR_LIMIT_EDG_MODIFICATION
-                })
-            )
-
     # FIXME :: DEPRECATED - Use DetachRootForbiddenValidator
     def _check_if_root(self):
         if self.link is None:
@@ -529,15 +606,6 @@ class ModificationPermission(LinkActionPermission):
         self._check_if_root()
         return super().is_permitted()
 
-    # FIXME :: DEPRECATED - Use MinimumEditableYearValidator
-    def _check_year_is_editable(self):
-        if not education_group_perms._is_year_editable(self.root, False):
-            self.errors.append(
-                str(_("Cannot perform action on a education group before %(limit_year)s") % {
-                    "limit_year": settings.YEAR_LIMIT_EDG_MODIFICATION
-                })
-            )
-
     def _check_if_root(self):
         if self.link is None:
             self.errors.append(
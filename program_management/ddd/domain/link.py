@@ -29,6 +29,21 @@ from base.models.enums.quadrimesters import DerogationQuadrimesterEnum
 from program_management.ddd.business_types import *
 from program_management.models.enums.node_type import NodeType
 
+# Attributes of a link which are persisted with it
+LINK_ATTRIBUTES = (
+    'relative_credits',
+    'min_credits',
+    'max_credits',
+    'is_mandatory',
+    'block',
+    'access_condition',
+    'comment',
+    'comment_english',
+    'own_comment',
+    'quadrimester_derogation',
+    'link_type',
+)
+
 
 class Link:
 
@@ -53,6 +68,9 @@ class Link:
     def is_reference(self):
         return self.link_type == LinkTypes.REFERENCE
 
+    def get_attributes(self) -> dict:
+        return {attribute: getattr(self, attribute) for attribute in LINK_ATTRIBUTES}
+
 
 class LinkWithChildLeaf(Link):
     def __init__(self, *args, **kwargs):
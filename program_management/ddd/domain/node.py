@@ -50,9 +50,7 @@ factory = NodeFactory()
 
 
 class Node:
-
-    acronym = None
-    year = None
+    __slots__ = ('node_id', 'children', 'node_type', 'end_date', 'acronym', 'title', 'year', 'proposal_type')
 
     def __init__(
             self,
@@ -148,7 +146,7 @@ class Node:
         self.children.append(child)
 
     def detach_child(self, node_id: int):
-        self.children = [link for link in self.children if link.child.pk == node_id]
+        self.children = [link for link in self.children if link.child.pk != node_id]
 
 
 def _get_descendents(root_node: Node, current_path: 'Path' = None) -> Dict['Path', 'Node']:
@@ -166,16 +164,22 @@ def _get_descendents(root_node: Node, current_path: 'Path' = None) -> Dict['Path
 
 
 class NodeEducationGroupYear(Node):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
 
 class NodeGroupYear(Node):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
 
 class NodeLearningUnitYear(Node):
+    __slots__ = ('prerequisite', 'is_prerequisite_of')
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.prerequisite = None  # FIXME : Should be of type Prerequisite?
@@ -198,6 +202,8 @@ class NodeLearningUnitYear(Node):
 
 
 class NodeLearningClassYear(Node):
+    __slots__ = ()
+
     def __init__(self, node_id: int, year: int, children: List['Link'] = None):
         super().__init__(node_id, children)
         self.year = year
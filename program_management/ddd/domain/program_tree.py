@@ -23,7 +23,8 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
-from typing import List, Set
+from collections import namedtuple
+from typing import List, Set, Dict, Tuple
 
 from base.models.enums.education_group_types import EducationGroupTypesEnum, TrainingType
 from program_management.ddd.business_types import *
@@ -32,9 +33,17 @@ from program_management.ddd.validators.validators_by_business_action import Atta
 
 PATH_SEPARATOR = '|'
 Path = str  # Example : "root|node1|node2|child_leaf"
+LinkIdentity = Tuple[int, int, bool]  # (parent node_id, child node_id, child is a learning unit year)
+
+# added and changed contain Link objects, removed contains LinkIdentity
+LinkChanges = namedtuple('LinkChanges', ['added', 'changed', 'removed'])
 
 
 class ProgramTree:
+    """
+    Nodes are indexed by path (and paths by node_id) when first needed ; the index is then maintained by attach_node
+    and detach_node, so any change of the structure of the tree must be done through these methods.
+    """
 
     root_node = None
     authorized_relationships = None
@@ -42,6 +51,55 @@ class ProgramTree:
     def __init__(self, root_node: 'Node', authorized_relationships: AuthorizedRelationshipList = None):
         self.root_node = root_node
         self.authorized_relationships = authorized_relationships
+        self._persisted_links = None
+        self._nodes_by_path = None
+        self._paths_by_node_id = None
+
+    @property
+    def has_persisted_links(self) -> bool:
+        return self._persisted_links is not None
+
+    def set_persisted_links(self, persisted_links: Dict[LinkIdentity, dict] = None):
+        """
+        Keep the state of the links as stored in database ; it is the reference used by get_link_changes.
+        Must be called once the tree is loaded or saved.
+        :param persisted_links: [Optional] Attributes of the persisted links by LinkIdentity.
+        By default, the current links of the tree are considered as persisted.
+        """
+        if persisted_links is None:
+            persisted_links = {_get_link_identity(link): link.get_attributes() for link in self.get_all_links()}
+        self._persisted_links = persisted_links
+
+    def get_link_changes(self) -> LinkChanges:
+        """
+        Return the links added, changed or removed since the last call of set_persisted_links.
+        Only the links of the parents still present in the tree can be removed.
+        """
+        from program_management.ddd.domain import node
+        persisted_links = self._persisted_links or {}
+        current_links = {_get_link_identity(link): link for link in self.get_all_links()}
+        parent_ids = set(
+            link.child.pk for link in current_links.values() if not isinstance(link.child, node.NodeLearningUnitYear)
+        ) | {self.root_node.pk}
+        return LinkChanges(
+            added=[link for identity, link in current_links.items() if identity not in persisted_links],
+            changed=[
+                link for identity, link in current_links.items()
+                if identity in persisted_links and link.get_attributes() != persisted_links[identity]
+            ],
+            removed=[
+                identity for identity in persisted_links
+                if identity not in current_links and identity[0] in parent_ids
+            ],
+        )
+
+    def get_all_links(self) -> List['Link']:
+        """
+        Return a flat list of all links present in the tree.
+        The structure is walked instead of using the index, in order to also get links added directly on nodes.
+        :return: list of Link
+        """
+        return _links_from_root(self.root_node, visited_nodes=set())
 
     def __eq__(self, other):
         return self.root_node == other.root_node
@@ -59,12 +117,10 @@ class ProgramTree:
 
     def get_parents(self, path: Path) -> List['Node']:
         result = []
-        str_nodes = path.split(PATH_SEPARATOR)
-        if len(str_nodes) > 1:
-            str_nodes = str_nodes[:-1]
-            path = '{}'.format(PATH_SEPARATOR).join(str_nodes)
-            result.append(self.get_node(path))
-            result += self.get_parents(PATH_SEPARATOR.join(str_nodes))
+        str_nodes = path.split(PATH_SEPARATOR)[:-1]
+        while str_nodes:
+            result.append(self.get_node(PATH_SEPARATOR.join(str_nodes)))
+            str_nodes.pop()
         return result
 
     def get_node(self, path: Path) -> 'Node':
@@ -74,20 +130,34 @@ class ProgramTree:
         :return: Node
         """
         try:
-            return {
-                str(self.root_node.pk): self.root_node,
-                **self.root_node.descendents
-            }[path]
+            return self._get_nodes_by_path()[path]
         except KeyError:
-            from program_management.ddd.domain import node
-            raise node.NodeNotFoundException
+            # The structure could have been changed without attach_node / detach_node : rebuild the index once
+            self._build_index()
+            try:
+                return self._nodes_by_path[path]
+            except KeyError:
+                from program_management.ddd.domain import node
+                raise node.NodeNotFoundException
+
+    def get_node_paths(self, tree_node: 'Node') -> List[Path]:
+        """
+        Return all paths where the node is used in the tree
+        :param tree_node: Node
+        :return: list of Path
+        """
+        self._get_nodes_by_path()
+        return [
+            path for path in self._paths_by_node_id.get(tree_node.pk, [])
+            if self._nodes_by_path[path] is tree_node
+        ]
 
     def get_all_nodes(self, types: Set[EducationGroupTypesEnum] = None) -> Set['Node']:
         """
         Return a flat set of all nodes present in the tree
         :return: list of Node
         """
-        all_nodes = set([self.root_node] + _nodes_from_root(self.root_node))
+        all_nodes = set(self._get_nodes_by_path().values())
         if types:
             return set(n for n in all_nodes if n.node_type in types)
         return all_nodes
@@ -107,7 +177,10 @@ class ProgramTree:
         path = path or str(self.root_node.node_id)
         is_valid, messages = self.clean_attach_node(node_to_attach, path)
         if is_valid:
+            parent_paths = self.get_node_paths(parent)
             parent.add_child(node_to_attach, **link_attributes)
+            for parent_path in parent_paths:
+                self._add_to_index(node_to_attach, build_path_from_parent(parent_path, node_to_attach))
         return messages
 
     def clean_attach_node(self, node_to_attach: 'Node', path: Path):
@@ -124,15 +197,58 @@ class ProgramTree:
         parent = self.get_node(parent_path)
         if not node_id:
             raise Exception("You cannot detach root node")
-        parent.detach_child(node_id)
+        node_to_detach = self.get_node(path)
+        parent_paths = self.get_node_paths(parent)
+        parent.detach_child(node_to_detach.pk)
+        for parent_path in parent_paths:
+            self._remove_from_index(node_to_detach, build_path_from_parent(parent_path, node_to_detach))
+
+    def _get_nodes_by_path(self) -> Dict[Path, 'Node']:
+        if self._nodes_by_path is None:
+            self._build_index()
+        return self._nodes_by_path
+
+    def _build_index(self):
+        self._nodes_by_path = {}
+        self._paths_by_node_id = {}
+        self._add_to_index(self.root_node, str(self.root_node.pk))
+
+    def _add_to_index(self, tree_node: 'Node', path: Path):
+        self._nodes_by_path[path] = tree_node
+        self._paths_by_node_id.setdefault(tree_node.pk, []).append(path)
+        for link in tree_node.children:
+            self._add_to_index(link.child, build_path_from_parent(path, link.child))
+
+    def _remove_from_index(self, tree_node: 'Node', path: Path):
+        if self._nodes_by_path.pop(path, None) is None:
+            return
+        node_paths = self._paths_by_node_id[tree_node.pk]
+        node_paths.remove(path)
+        if not node_paths:
+            del self._paths_by_node_id[tree_node.pk]
+        for link in tree_node.children:
+            self._remove_from_index(link.child, build_path_from_parent(path, link.child))
+
+
+def _links_from_root(root: 'Node', visited_nodes: Set[int]) -> List['Link']:
+    links = []
+    for link in root.children:
+        links.append(link)
+        if id(link.child) not in visited_nodes:
+            visited_nodes.add(id(link.child))
+            links.extend(_links_from_root(link.child, visited_nodes))
+    return links
 
 
-def _nodes_from_root(root: 'Node'):
-    nodes = [root]
-    for link in root.children:
-        nodes.extend(_nodes_from_root(link.child))
-    return nodes
+def _get_link_identity(link: 'Link') -> LinkIdentity:
+    # A group and a learning unit year can have the same id
+    from program_management.ddd.domain import node
+    return link.parent.pk, link.child.pk, isinstance(link.child, node.NodeLearningUnitYear)
 
 
 def build_path(*nodes):
     return '{}'.format(PATH_SEPARATOR).join((str(n.node_id) for n in nodes))
+
+
+def build_path_from_parent(parent_path: Path, child_node: 'Node') -> Path:
+    return PATH_SEPARATOR.join([parent_path, str(child_node.pk)])
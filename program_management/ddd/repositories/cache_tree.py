@@ -0,0 +1,170 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+import uuid
+from typing import List, Dict, Tuple, Iterable, Set
+
+from django.conf import settings
+from django.core.cache import cache
+
+from base.models.group_element_year import GroupElementYear
+from base.utils.cache import CacheInvalidation
+from program_management.ddd.business_types import *
+
+PREFIX_TREE_KEY = 'program_tree_{root_id}_{version}'
+PREFIX_VERSION_KEY = 'program_tree_version_{root_id}'
+GLOBAL_VERSION_KEY = 'program_tree_version'
+HITS_KEY = 'program_tree_cache_hits'
+MISSES_KEY = 'program_tree_cache_misses'
+
+RootId = int
+Version = str
+
+
+def is_enabled() -> bool:
+    return bool(settings.PROGRAM_TREE_CACHE_TIMEOUT)
+
+
+def get_many(tree_root_ids: List[RootId]) -> Tuple[Dict[RootId, 'ProgramTree'], Dict[RootId, Version]]:
+    """
+    Return the cached trees and the current version of every root.
+    The versions must be read before loading the missing trees from database and given back to set_many :
+    a tree invalidated in the meantime is thus stored under an outdated version and never read.
+    :return: (trees found by root id, versions by root id)
+    """
+    versions = _get_versions(tree_root_ids)
+    tree_keys = {_get_tree_key(root_id, version): root_id for root_id, version in versions.items()}
+    cached_trees = {tree_keys[key]: tree for key, tree in cache.get_many(list(tree_keys)).items()}
+    _increment_counter(HITS_KEY, len(cached_trees))
+    _increment_counter(MISSES_KEY, len(set(tree_root_ids)) - len(cached_trees))
+    return cached_trees, versions
+
+
+def set_many(trees: Iterable['ProgramTree'], versions: Dict[RootId, Version]) -> None:
+    """
+    Store the trees, except those invalidated by the current transaction : they contain uncommitted data.
+    """
+    pending_invalidations = _Invalidation.get_pending()
+    if any(invalidation.tree_root_ids is None for invalidation in pending_invalidations):
+        return
+    uncommitted_root_ids = set().union(*(invalidation.tree_root_ids for invalidation in pending_invalidations))
+    cache.set_many(
+        {
+            _get_tree_key(tree.root_node.pk, versions[tree.root_node.pk]): tree
+            for tree in trees if tree.root_node.pk not in uncommitted_root_ids
+        },
+        timeout=settings.PROGRAM_TREE_CACHE_TIMEOUT
+    )
+
+
+def invalidate(tree_root_ids: Iterable[RootId]) -> None:
+    """
+    Invalidate the trees now and once the current transaction is committed, so that a tree loaded by another process
+    before the commit is not kept.
+    """
+    tree_root_ids = set(tree_root_ids)
+    if tree_root_ids:
+        _Invalidation(tree_root_ids).run()
+
+
+def invalidate_all() -> None:
+    _Invalidation().run()
+
+
+def invalidate_elements(child_branch_ids: List[int] = None, child_leaf_ids: List[int] = None) -> None:
+    """
+    Invalidate all trees containing one of the elements : the elements themselves and all their ascendants.
+    """
+    child_branch_ids = list(child_branch_ids or [])
+    child_leaf_ids = list(child_leaf_ids or [])
+    ascendant_ids = [
+        row['parent_id'] for row in GroupElementYear.objects.get_reverse_adjacency_list(
+            child_branch_ids=child_branch_ids,
+            child_leaf_ids=child_leaf_ids,
+        )
+    ]
+    invalidate(child_branch_ids + ascendant_ids)
+
+
+class _Invalidation(CacheInvalidation):
+    """
+    Give a new version to the trees (or to all trees when tree_root_ids is None).
+    """
+    def __init__(self, tree_root_ids: Set[RootId] = None):
+        self.tree_root_ids = tree_root_ids
+
+    def __call__(self):
+        if self.tree_root_ids is None:
+            cache.set(GLOBAL_VERSION_KEY, _new_version(), timeout=None)
+        else:
+            _set_new_versions(self.tree_root_ids)
+
+
+def get_statistics() -> Dict[str, int]:
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
+
+
+def _get_tree_key(root_id: RootId, version: Version) -> str:
+    return PREFIX_TREE_KEY.format(root_id=root_id, version=version)
+
+
+def _get_versions(tree_root_ids: List[RootId]) -> Dict[RootId, Version]:
+    """
+    The version of a tree is made of its own version and of the global version (shared by all trees).
+    """
+    version_keys = {PREFIX_VERSION_KEY.format(root_id=root_id): root_id for root_id in tree_root_ids}
+    versions = cache.get_many(list(version_keys) + [GLOBAL_VERSION_KEY])
+    for key in (version_keys.keys() | {GLOBAL_VERSION_KEY}) - versions.keys():
+        # A random version avoids to read an entry stored under a version which has been evicted from the cache
+        cache.add(key, _new_version(), timeout=None)
+        versions[key] = cache.get(key)
+    global_version = versions[GLOBAL_VERSION_KEY]
+    return {
+        root_id: '_'.join([versions[key], global_version]) for key, root_id in version_keys.items()
+    }
+
+
+def _set_new_versions(tree_root_ids: Iterable[RootId]) -> None:
+    cache.set_many(
+        {PREFIX_VERSION_KEY.format(root_id=root_id): _new_version() for root_id in tree_root_ids},
+        timeout=None
+    )
+
+
+def _new_version() -> Version:
+    return uuid.uuid4().hex
+
+
+def _increment_counter(key: str, value: int) -> None:
+    if value:
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, value)
+        except ValueError:
+            # Counter evicted between add and incr
+            cache.set(key, value, timeout=None)
@@ -23,10 +23,9 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
-from typing import List
+from typing import Iterable, Iterator, List, Union
 
-from django.contrib.postgres.aggregates import ArrayAgg
-from django.db.models import F, Value, Case, When, IntegerField, CharField, QuerySet
+from django.db.models import QuerySet
 
 from base.models.education_group_year import EducationGroupYear
 from base.models.group_element_year import GroupElementYear
@@ -34,6 +33,11 @@ from base.models.learning_unit_year import LearningUnitYear
 from program_management.ddd.domain import node
 from program_management.models.enums.node_type import NodeType
 
+# Ids or a queryset of ids (used as subquery)
+NodeIds = Union[Iterable[int], QuerySet]
+
+ITERATOR_CHUNK_SIZE = 2000
+
 
 def load_by_type(type: NodeType, element_id: int) -> node.Node:
     if type == NodeType.EDUCATION_GROUP:
@@ -44,81 +48,61 @@ def load_by_type(type: NodeType, element_id: int) -> node.Node:
 
 def load_node_education_group_year(node_id: int) -> node.Node:
     try:
-        node_data = __load_multiple_node_education_group_year([node_id])[0]
-        return node.factory.get_node(**__convert_string_to_enum(node_data))
-    except IndexError:
+        return next(iter_node_education_group_years([node_id]))
+    except StopIteration:
         raise node.NodeNotFoundException
 
 
+def load_node_education_group_years(node_ids: List[int]) -> List[node.Node]:
+    return list(iter_node_education_group_years(node_ids))
+
+
 def load_node_learning_unit_year(node_id: int) -> node.Node:
     try:
-        node_data = __load_multiple_node_learning_unit_year([node_id])[0]
-        return node.factory.get_node(**__convert_string_to_enum(node_data))
-    except IndexError:
+        return next(iter_node_learning_unit_years([node_id]))
+    except StopIteration:
         raise node.NodeNotFoundException
 
 
 def load_multiple(element_ids: List[int]) -> List[node.Node]:
-    aggregate_qs = GroupElementYear.objects.filter(pk__in=element_ids)\
-        .annotate(
-            node_type=Case(
-                When(child_branch_id__isnull=False, then=Value(NodeType.EDUCATION_GROUP.name)),
-                When(child_leaf_id__isnull=False, then=Value(NodeType.LEARNING_UNIT.name)),
-                default=Value('Unknown'),
-                output_field=CharField()
-            ),
-            node_id=Case(
-                When(child_branch_id__isnull=False, then=F('child_branch_id')),
-                When(child_leaf_id__isnull=False, then=F('child_leaf_id')),
-                default=Value(-1),
-                output_field=IntegerField()
-            ),
-        ).values('node_type').annotate(node_ids=ArrayAgg('node_id')).exclude(node_type='Unknown')
-
-    union_qs = None
-    for result_aggregate in aggregate_qs:
-        qs_function = {
-            NodeType.EDUCATION_GROUP.name: __load_multiple_node_education_group_year,
-            NodeType.LEARNING_UNIT.name: __load_multiple_node_learning_unit_year,
-        }[result_aggregate['node_type']]
-        qs = qs_function(result_aggregate['node_ids'])
-
-        union_qs = qs if union_qs is None else union_qs.union(qs)
-
-    if union_qs is not None:
-        return [
-            node.factory.get_node(**__convert_string_to_enum(node_data)) for node_data in union_qs
-        ]
-    return []
-
-
-def __convert_string_to_enum(node_data: dict) -> dict:
-    # TODO Enum.choices should return tuple((enum, enum.value) for enum in cls) ?
-    node_data['type'] = NodeType[node_data['type']]
-    return node_data
-
-
-def __load_multiple_node_education_group_year(node_group_year_ids: List[int]) -> QuerySet:
-    return EducationGroupYear.objects.filter(pk__in=node_group_year_ids).annotate(
-        node_id=F('pk'),
-        type=Value(NodeType.EDUCATION_GROUP.name, output_field=CharField()),
-        node_acronym=F('acronym'),
-        node_title=F('title'),
-        year=F('academic_year__year'),
-        proposal_type=Value(None, output_field=CharField())
-    ).values('node_id', 'type', 'year', 'proposal_type', 'node_acronym', 'node_title')\
-     .annotate(title=F('node_title'), acronym=F('node_acronym'))\
-     .values('node_id', 'type', 'year', 'proposal_type', 'acronym', 'title')
-
-
-def __load_multiple_node_learning_unit_year(node_learning_unit_year_ids: List[int]):
-    return LearningUnitYear.objects.filter(pk__in=node_learning_unit_year_ids).annotate_full_title().annotate(
-        node_id=F('pk'),
-        type=Value(NodeType.LEARNING_UNIT.name, output_field=CharField()),
-        node_acronym=F('acronym'),
-        node_title=F('full_title'),
-        year=F('academic_year__year'),
-        proposal_type=F('proposallearningunit__type')
-    ).values('node_id', 'type', 'year', 'proposal_type', 'node_acronym', 'node_title')\
-     .annotate(title=F('node_title'), acronym=F('node_acronym'))\
-     .values('node_id', 'type', 'year', 'proposal_type', 'acronym', 'title')
+    """ Load the child nodes of the links (GroupElementYear ids) """
+    links = GroupElementYear.objects.filter(pk__in=element_ids)
+    return [
+        *iter_node_education_group_years(links.filter(child_branch__isnull=False).values('child_branch_id')),
+        *iter_node_learning_unit_years(links.filter(child_leaf__isnull=False).values('child_leaf_id')),
+    ]
+
+
+def iter_node_education_group_years(node_ids: NodeIds) -> Iterator[node.Node]:
+    """ Stream the education group year nodes from one flat query """
+    rows = EducationGroupYear.objects.filter(pk__in=node_ids).values_list(
+        'pk', 'acronym', 'title', 'academic_year__year'
+    )
+    for node_id, acronym, title, year in rows.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        yield node.NodeEducationGroupYear(node_id=node_id, acronym=acronym, title=title, year=year)
+
+
+def iter_node_learning_unit_years(node_ids: NodeIds) -> Iterator[node.Node]:
+    """ Stream the learning unit year nodes from one flat query """
+    rows = LearningUnitYear.objects.filter(pk__in=node_ids).values_list(
+        'pk', 'acronym', 'specific_title', 'learning_container_year__common_title', 'academic_year__year',
+        'proposallearningunit__type'
+    )
+    for node_id, acronym, specific_title, common_title, year, proposal_type in \
+            rows.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        yield node.NodeLearningUnitYear(
+            node_id=node_id,
+            acronym=acronym,
+            title=_get_full_title(common_title, specific_title),
+            year=year,
+            proposal_type=proposal_type
+        )
+
+
+def _get_full_title(common_title: str, specific_title: str) -> str:
+    # Same as LearningUnitYearQuerySet.annotate_full_title
+    if not common_title:
+        return specific_title
+    if not specific_title:
+        return common_title
+    return '{} - {}'.format(common_title, specific_title)
@@ -46,8 +46,22 @@ def load_has_prerequisite(tree_root_id: int, node_ids: List[int]) -> dict:
     :param node_ids: List of id node which we want to check data
     :return:
     """
+    return load_has_prerequisite_multiple([tree_root_id], node_ids).get(tree_root_id, {})
+
+
+def load_has_prerequisite_multiple(tree_root_ids: List[int], node_ids: List[int]) -> dict:
+    """
+    Same as load_has_prerequisite for several trees in one single query, grouped by tree_root_id
+    Ex: {
+       tree_root_id: {node_id: Prerequisite, ...},
+       ... : {...},
+    }
+    :param tree_root_ids: Root nodes of the trees
+    :param node_ids: List of id node which we want to check data
+    :return:
+    """
     prerequisite_item_qs = PrerequisiteItem.objects.filter(
-        prerequisite__education_group_year_id=tree_root_id,
+        prerequisite__education_group_year_id__in=tree_root_ids,
         prerequisite__learning_unit_year_id__in=node_ids
     ).annotate(
         acronym=Subquery(
@@ -58,15 +72,20 @@ def load_has_prerequisite(tree_root_id: int, node_ids: List[int]) -> dict:
         ),
         year=F('prerequisite__learning_unit_year__academic_year__year'),
         main_operator=F('prerequisite__main_operator'),
-        learning_unit_year_id=F('prerequisite__learning_unit_year_id')
-    ).order_by('learning_unit_year_id', 'group_number', 'position')\
-     .values('learning_unit_year_id', 'main_operator', 'group_number', 'position', 'acronym', 'year')
+        learning_unit_year_id=F('prerequisite__learning_unit_year_id'),
+        tree_root_id=F('prerequisite__education_group_year_id'),
+    ).order_by('tree_root_id', 'learning_unit_year_id', 'group_number', 'position')\
+     .values('tree_root_id', 'learning_unit_year_id', 'main_operator', 'group_number', 'position', 'acronym', 'year')
 
-    prerequisites_dict = {}
-    for node_id, prequisite_items in itertools.groupby(prerequisite_item_qs, key=lambda p: p['learning_unit_year_id']):
+    prerequisites_by_root = {}
+    for (tree_root_id, node_id), prequisite_items in itertools.groupby(
+            prerequisite_item_qs,
+            key=lambda p: (p['tree_root_id'], p['learning_unit_year_id'])
+    ):
         prequisite_items = list(prequisite_items)
 
         preq = prerequisite.Prerequisite(main_operator=prequisite_items[0]['main_operator'])
+        prerequisites_dict = prerequisites_by_root.setdefault(tree_root_id, {})
         prerequisites_dict.setdefault(node_id, preq)
         for _, p_items in itertools.groupby(prequisite_items, key=lambda p: p['group_number']):
             operator_item = prerequisite_operator.OR if preq.main_operator == prerequisite_operator.AND else \
@@ -78,7 +97,7 @@ def load_has_prerequisite(tree_root_id: int, node_ids: List[int]) -> dict:
                 ]
             )
             prerequisites_dict[node_id].add_prerequisite_item_group(p_group_items)
-    return prerequisites_dict
+    return prerequisites_by_root
 
 
 def load_is_prerequisite(tree_root_id: int, node_ids: List[int]) -> dict:
@@ -92,13 +111,32 @@ def load_is_prerequisite(tree_root_id: int, node_ids: List[int]) -> dict:
     :param node_ids: List of id node
     :return:
     """
+    return load_is_prerequisite_multiple([tree_root_id], node_ids).get(tree_root_id, {})
+
+
+def load_is_prerequisite_multiple(tree_root_ids: List[int], node_ids: List[int]) -> dict:
+    """
+    Same as load_is_prerequisite for several trees in one single query, grouped by tree_root_id
+        Ex: {
+           tree_root_id: {node_id: [node_id, node_id, ...], ...},
+           ... : {...},
+        }
+    :param tree_root_ids: Root nodes of the trees
+    :param node_ids: List of id node
+    :return:
+    """
     qs = PrerequisiteItem.objects.filter(
-        prerequisite__education_group_year_id=tree_root_id,
+        prerequisite__education_group_year_id__in=tree_root_ids,
         learning_unit__learningunityear__pk__in=node_ids
-    ).values('learning_unit__learningunityear__pk')\
+    ).values('prerequisite__education_group_year_id', 'learning_unit__learningunityear__pk')\
      .annotate(
+        tree_root_id=F('prerequisite__education_group_year_id'),
         node_id=F('learning_unit__learningunityear__pk'),
         is_a_prerequisite_of=ArrayAgg('prerequisite__learning_unit_year_id'),
      )
 
-    return {result['node_id']: result['is_a_prerequisite_of'] for result in qs}
+    is_prerequisite_by_root = {}
+    for result in qs:
+        is_prerequisite_by_root.setdefault(result['tree_root_id'], {})[result['node_id']] = \
+            result['is_a_prerequisite_of']
+    return is_prerequisite_by_root
@@ -29,13 +29,14 @@ from typing import List, Dict, Any
 
 from django.db.models import Case, F, When, IntegerField
 
+from base.models.authorized_relationship import AuthorizedRelationshipList
 from base.models.enums.link_type import LinkTypes
 from base.models.group_element_year import GroupElementYear
 from program_management.ddd.business_types import *
 from program_management.ddd.domain import node, link
 from program_management.ddd.domain.program_tree import ProgramTree
 from program_management.ddd.repositories import load_node, load_prerequisite, \
-    load_authorized_relationship
+    load_authorized_relationship, cache_tree
 
 # Typing
 GroupElementYearColumnName = str
@@ -45,14 +46,57 @@ TreeStructure = List[Dict[GroupElementYearColumnName, Any]]
 
 
 def load(tree_root_id: int) -> 'ProgramTree':
-    root_node = load_node.load_node_education_group_year(tree_root_id)
+    return load_many([tree_root_id])[0]
+
+
+def load_many(tree_root_ids: List[int]) -> List['ProgramTree']:
+    """
+    Load several trees with a fixed number of queries, whatever the number of trees.
+    Node and link data is fetched once for all the trees; every tree receives its own instances because
+    prerequisites depend on the root of the tree.
+    :param tree_root_ids: List of root node ids
+    :return: List of ProgramTree, in the same order as tree_root_ids
+    """
+    if not tree_root_ids:
+        return []
+    if not cache_tree.is_enabled():
+        return __load_many_from_database(tree_root_ids)
+
+    trees_by_root, versions = cache_tree.get_many(tree_root_ids)
+    missing_root_ids = [root_id for root_id in dict.fromkeys(tree_root_ids) if root_id not in trees_by_root]
+    if missing_root_ids:
+        loaded_trees = __load_many_from_database(missing_root_ids)
+        cache_tree.set_many(loaded_trees, versions)
+        trees_by_root.update({tree.root_node.pk: tree for tree in loaded_trees})
+    return [trees_by_root[root_id] for root_id in tree_root_ids]
+
 
-    structure = GroupElementYear.objects.get_adjacency_list([tree_root_id])
+def __load_many_from_database(tree_root_ids: List[int]) -> List['ProgramTree']:
+    root_nodes = {n.pk: n for n in load_node.load_node_education_group_years(tree_root_ids)}
+    if any(root_id not in root_nodes for root_id in tree_root_ids):
+        raise node.NodeNotFoundException
+
+    structure = GroupElementYear.objects.get_adjacency_list(list(root_nodes))
     nodes = __load_tree_nodes(structure)
-    nodes.update({root_node.pk: root_node})
+    nodes.update(root_nodes)
     links = __load_tree_links(structure)
-    prerequisites = __load_tree_prerequisites(tree_root_id, nodes)
-    return __build_tree(root_node, structure, nodes, links, prerequisites)
+    prerequisites_by_root = __load_trees_prerequisites(list(root_nodes), nodes)
+    authorized_relationships = load_authorized_relationship.load()
+
+    structure_by_root = {root_id: [] for root_id in root_nodes}
+    for child_structure in structure:
+        structure_by_root[child_structure['starting_node_id']].append(child_structure)
+
+    return [
+        __build_tree(
+            root_id,
+            structure_by_root[root_id],
+            nodes,
+            links,
+            prerequisites_by_root[root_id],
+            authorized_relationships
+        ) for root_id in tree_root_ids
+    ]
 
 
 def load_trees_from_children(
@@ -81,8 +125,7 @@ def load_trees_from_children(
         parent_id for parent_id in all_parents
         if not parent_by_child_branch.get(parent_id)
     )
-    # TODO :: performance (get all trees in one single query)
-    return [load(root_id) for root_id in root_ids]
+    return load_many(list(root_ids))
 
 
 def __load_tree_nodes(tree_structure: TreeStructure) -> Dict[NodePk, 'Node']:
@@ -105,6 +148,7 @@ def __load_tree_links(tree_structure: TreeStructure) -> Dict[LinkKey, 'Link']:
         'max_credits',
         'is_mandatory',
         'block',
+        'access_condition',
         'comment',
         'comment_english',
         'own_comment',
@@ -124,59 +168,78 @@ def __load_tree_links(tree_structure: TreeStructure) -> Dict[LinkKey, 'Link']:
     return tree_links
 
 
-def __load_tree_prerequisites(tree_root_id: int, nodes: dict):
+def __load_trees_prerequisites(tree_root_ids: List[int], nodes: dict) -> Dict[NodePk, dict]:
     node_leaf_ids = [n.pk for n in nodes.values() if isinstance(n, node.NodeLearningUnitYear)]
-    has_prerequisite_dict = load_prerequisite.load_has_prerequisite(tree_root_id, node_leaf_ids)
-    is_prerequisite_dict = {
-        main_node_id: [nodes[id] for id in node_ids]
-        for main_node_id, node_ids in load_prerequisite.load_is_prerequisite(tree_root_id, node_leaf_ids).items()
+    has_prerequisite_by_root = load_prerequisite.load_has_prerequisite_multiple(tree_root_ids, node_leaf_ids)
+    is_prerequisite_by_root = load_prerequisite.load_is_prerequisite_multiple(tree_root_ids, node_leaf_ids)
+    return {
+        tree_root_id: {
+            'has_prerequisite_dict': has_prerequisite_by_root.get(tree_root_id, {}),
+            'is_prerequisite_dict': is_prerequisite_by_root.get(tree_root_id, {}),
+        } for tree_root_id in tree_root_ids
     }
-    return {'has_prerequisite_dict': has_prerequisite_dict, 'is_prerequisite_dict': is_prerequisite_dict}
 
 
 def __build_tree(
-        root_node: 'Node',
+        tree_root_id: int,
         tree_structure: TreeStructure,
         nodes: Dict[NodePk, 'Node'],
         links: Dict[LinkKey, 'Link'],
-        prerequisites
+        prerequisites,
+        authorized_relationships: AuthorizedRelationshipList
 ) -> 'ProgramTree':
-    root_node.children = __build_children(str(root_node.pk), tree_structure, nodes, links, prerequisites)
-    tree = ProgramTree(root_node, authorized_relationships=load_authorized_relationship.load())
+    tree_nodes = __copy_tree_nodes(tree_root_id, tree_structure, nodes)
+    __build_children(tree_structure, tree_nodes, links)
+    __set_prerequisites(tree_nodes, prerequisites)
+    tree = ProgramTree(tree_nodes[tree_root_id], authorized_relationships=authorized_relationships)
+    tree.set_persisted_links()
     return tree
 
 
+def __copy_tree_nodes(
+        tree_root_id: int,
+        tree_structure: TreeStructure,
+        nodes: Dict[NodePk, 'Node']
+) -> Dict[NodePk, 'Node']:
+    tree_node_ids = {tree_root_id} | {child_structure['child_id'] for child_structure in tree_structure}
+    tree_nodes = {}
+    for node_id in tree_node_ids:
+        tree_node = copy.copy(nodes[node_id])
+        tree_node.children = []
+        tree_nodes[node_id] = tree_node
+    return tree_nodes
+
+
 def __build_children(
-        root_path: 'Path',
         tree_structure: TreeStructure,
         nodes: Dict[NodePk, 'Node'],
         links: Dict[LinkKey, 'Link'],
-        prerequisites
-) -> List['Link']:
-    children = []
-
-    childs_structure = [
-        structure for structure in tree_structure
-        if structure['path'] == "|".join([root_path, str(structure['child_id'])])
-    ]
-    for child_structure in childs_structure:
-        child_node = copy.deepcopy(nodes[child_structure['child_id']])
-        child_node.children = __build_children(
-            "|".join([root_path, str(child_node.pk)]),
-            tree_structure,
-            nodes,
-            links,
-            prerequisites
-        )
-
-        if isinstance(child_node, node.NodeLearningUnitYear):
-            child_node.prerequisite = prerequisites['has_prerequisite_dict'].get(child_node.pk, [])
-            child_node.is_prerequisite_of = prerequisites['is_prerequisite_dict'].get(child_node.pk, [])
-
-        link_node = copy.deepcopy(
+) -> None:
+    """
+    Assemble all links of the tree in one single pass over the adjacency list.
+    The children of a node are the same whatever the path used to reach it, so a single instance of each node
+    (and of each link) is shared by all paths of the tree instead of being copied.
+    The adjacency list is ordered by level and order, so the first occurrence of each link keeps the children order.
+    """
+    built_link_ids = set()
+    for child_structure in tree_structure:
+        if child_structure['id'] in built_link_ids:
+            continue
+        built_link_ids.add(child_structure['id'])
+
+        parent_node = nodes[child_structure['parent_id']]
+        link_node = copy.copy(
             links['_'.join([str(child_structure['parent_id']), str(child_structure['child_id'])])]
         )
-        link_node.parent = copy.deepcopy(nodes[child_structure['parent_id']])
-        link_node.child = child_node
-        children.append(link_node)
-    return children
+        link_node.parent = parent_node
+        link_node.child = nodes[child_structure['child_id']]
+        parent_node.children.append(link_node)
+
+
+def __set_prerequisites(nodes: Dict[NodePk, 'Node'], prerequisites) -> None:
+    for tree_node in nodes.values():
+        if isinstance(tree_node, node.NodeLearningUnitYear):
+            tree_node.prerequisite = prerequisites['has_prerequisite_dict'].get(tree_node.pk, [])
+            tree_node.is_prerequisite_of = [
+                nodes[node_id] for node_id in prerequisites['is_prerequisite_dict'].get(tree_node.pk, [])
+            ]
@@ -23,50 +23,139 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
+import functools
+import operator
+from typing import Dict, List
+
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Q, Max
+from django.utils import timezone
 
+from base.models.education_group_year import EducationGroupYear
 from base.models.group_element_year import GroupElementYear
+from base.models.learning_unit_year import LearningUnitYear
+from program_management.ddd.business_types import *
 from program_management.ddd.domain import program_tree
-from program_management.ddd.domain.node import Node, NodeEducationGroupYear, NodeLearningUnitYear
+from program_management.ddd.domain.link import LINK_ATTRIBUTES
+from program_management.ddd.domain.node import NodeLearningUnitYear
+from program_management.ddd.repositories import cache_tree
 
 
 @transaction.atomic
 def persist(tree: program_tree.ProgramTree) -> None:
-    __update_or_create_links(tree.root_node)
-    __delete_links(tree.root_node)
+    """
+    Save only the links added, changed or removed since the tree was loaded (or last saved).
+    """
+    if not tree.has_persisted_links:
+        tree.set_persisted_links(__load_persisted_links(tree))
+    changes = tree.get_link_changes()
+    __delete_links(changes.removed)
+    __update_links(changes.changed)
+    __create_links(changes.added)
+    tree.set_persisted_links()
+    __invalidate_cache(changes)
+
+
+def __invalidate_cache(changes: program_tree.LinkChanges):
+    # Bulk operations do not send model signals
+    parent_ids = set(link.parent.pk for link in changes.added + changes.changed) | \
+        set(parent_id for parent_id, _, _ in changes.removed)
+    if parent_ids:
+        cache_tree.invalidate_elements(child_branch_ids=list(parent_ids))
+
+
+def __load_persisted_links(tree: program_tree.ProgramTree) -> Dict[program_tree.LinkIdentity, dict]:
+    parent_ids = [n.pk for n in tree.get_all_nodes() if not isinstance(n, NodeLearningUnitYear)]
+    qs = GroupElementYear.objects.filter(parent_id__in=parent_ids).values(
+        'parent_id', 'child_branch_id', 'child_leaf_id', *LINK_ATTRIBUTES
+    )
+    return {__get_link_identity(gey_dict): gey_dict for gey_dict in qs}
+
+
+def __get_link_identity(group_element_year: dict) -> program_tree.LinkIdentity:
+    parent_id = group_element_year.pop('parent_id')
+    child_branch_id = group_element_year.pop('child_branch_id')
+    child_leaf_id = group_element_year.pop('child_leaf_id')
+    return parent_id, child_leaf_id or child_branch_id, child_leaf_id is not None
+
+
+def __link_filter(parent_id: int, child_id: int, is_leaf: bool) -> Q:
+    # A group and a learning unit year can have the same id
+    if is_leaf:
+        return Q(parent_id=parent_id, child_leaf_id=child_id)
+    return Q(parent_id=parent_id, child_branch_id=child_id)
 
 
-def __update_or_create_links(node: Node):
-    for link in node.children:
-        # methode update_or_create doesn't work with outer-join on PostgreSQL
-        group_element_year, _ = GroupElementYear.objects.get_or_create(
-            parent_id=link.parent.pk,
-            child_branch_id=link.child.pk if isinstance(link.child, NodeEducationGroupYear) else None,
-            child_leaf_id=link.child.pk if isinstance(link.child, NodeLearningUnitYear) else None,
+def __delete_links(removed: List[program_tree.LinkIdentity]):
+    if removed:
+        GroupElementYear.objects.filter(
+            functools.reduce(operator.or_, (__link_filter(*identity) for identity in removed))
+        ).delete()
+
+
+def __update_links(changed: List['Link']):
+    if not changed:
+        return
+    links_by_identity = {
+        (link.parent.pk, link.child.pk, isinstance(link.child, NodeLearningUnitYear)): link for link in changed
+    }
+    group_element_years = GroupElementYear.objects.filter(
+        functools.reduce(operator.or_, (__link_filter(*identity) for identity in links_by_identity))
+    ).select_related('parent__academic_year', 'child_branch__academic_year', 'child_leaf')
+    now = timezone.now()
+    to_update = []
+    for group_element_year in group_element_years:
+        link = links_by_identity.get((
+            group_element_year.parent_id,
+            group_element_year.child_leaf_id or group_element_year.child_branch_id,
+            group_element_year.child_leaf_id is not None
+        ))
+        if link:
+            __set_link_attributes(group_element_year, link)
+            __clean(group_element_year, link)
+            group_element_year.changed = now
+            to_update.append(group_element_year)
+    GroupElementYear.objects.bulk_update(to_update, fields=LINK_ATTRIBUTES + ('changed',))
+
+
+def __create_links(added: List['Link']):
+    if not added:
+        return
+    max_order_by_parent = dict(
+        GroupElementYear.objects.filter(
+            parent_id__in=set(link.parent.pk for link in added)
+        ).values('parent_id').annotate(max_order=Max('order')).values_list('parent_id', 'max_order')
+    )
+    education_group_years = EducationGroupYear.objects.select_related('academic_year').in_bulk(
+        set(link.parent.pk for link in added) |
+        set(link.child.pk for link in added if not isinstance(link.child, NodeLearningUnitYear))
+    )
+    learning_unit_years = LearningUnitYear.objects.in_bulk(
+        set(link.child.pk for link in added if isinstance(link.child, NodeLearningUnitYear))
+    )
+    to_create = []
+    for link in added:
+        order = max_order_by_parent.get(link.parent.pk)
+        max_order_by_parent[link.parent.pk] = 0 if order is None else order + 1
+        is_leaf = isinstance(link.child, NodeLearningUnitYear)
+        group_element_year = GroupElementYear(
+            parent=education_group_years[link.parent.pk],
+            child_branch=None if is_leaf else education_group_years[link.child.pk],
+            child_leaf=learning_unit_years[link.child.pk] if is_leaf else None,
+            order=max_order_by_parent[link.parent.pk],
         )
-        group_element_year.relative_credits = link.relative_credits
-        group_element_year.min_credits = link.min_credits
-        group_element_year.max_credits = link.max_credits
-        group_element_year.is_mandatory = link.is_mandatory
-        group_element_year.block = link.block
-        group_element_year.access_condition = link.access_condition
-        group_element_year.comment = link.comment
-        group_element_year.comment_english = link.comment_english
-        group_element_year.own_comment = link.own_comment
-        group_element_year.quadrimester_derogation = link.quadrimester_derogation
-        group_element_year.link_type = link.link_type
-        group_element_year.save()
-
-        __update_or_create_links(link.child)
-
-
-def __delete_links(node: Node):
-    child_ids = [link.child.pk for link in node.children]
-
-    GroupElementYear.objects.filter(parent_id=node.pk).exclude(
-        Q(child_branch_id__in=child_ids) | Q(child_leaf_id__in=child_ids)   # TODO: Quick fix before migration
-    ).delete()
-
-    for link in node.children:
-        __delete_links(link.child)
+        __set_link_attributes(group_element_year, link)
+        __clean(group_element_year, link)
+        to_create.append(group_element_year)
+    GroupElementYear.objects.bulk_create(to_create)
+
+
+def __clean(group_element_year: GroupElementYear, link: 'Link'):
+    # The bulk operations skip GroupElementYear.save(), which validates the link and can change its type
+    group_element_year.clean()
+    link.link_type = group_element_year.link_type
+
+
+def __set_link_attributes(group_element_year: GroupElementYear, link: 'Link'):
+    for attribute in LINK_ATTRIBUTES:
+        setattr(group_element_year, attribute, getattr(link, attribute))
@@ -0,0 +1,89 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from base.models import academic_year
+from base.models.education_group_year import EducationGroupYear
+from base.models.enums import education_group_categories
+from base.models.group_element_year import GroupElementYear
+from program_management.ddd.repositories import load_tree
+
+
+class Command(BaseCommand):
+    """
+    Measure the loading time of program trees against their size (number of links).
+    The cold time is measured with the cache of the trees disabled, the warm time once the tree is in the cache.
+    """
+
+    help = "Benchmark program_management load_tree.load() on existing trees, sorted by tree size."
+
+    def add_arguments(self, parser):
+        parser.add_argument('root_ids', nargs='*', type=int, help="Root education group year ids to load")
+        parser.add_argument('--limit', type=int, default=20, help="Number of trainings to load when no id is given")
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Number of cold and warm loads per tree (best time is kept)")
+
+    def handle(self, *args, **options):
+        root_ids = options['root_ids'] or self._get_training_ids(options['limit'])
+        results = []
+        for root_id in root_ids:
+            tree_size = len(GroupElementYear.objects.get_adjacency_list([root_id]))
+            with override_settings(PROGRAM_TREE_CACHE_TIMEOUT=0):
+                cold_time, cold_queries = self._time_load(root_id, options['repeat'])
+            load_tree.load(root_id)
+            warm_time, warm_queries = self._time_load(root_id, options['repeat'])
+            results.append((tree_size, root_id, cold_time, cold_queries, warm_time, warm_queries))
+
+        self.stdout.write("{:>8} {:>10} {:>12} {:>8} {:>12} {:>8}".format(
+            'links', 'root_id', 'cold (ms)', 'queries', 'warm (ms)', 'queries'
+        ))
+        for tree_size, root_id, cold_time, cold_queries, warm_time, warm_queries in sorted(results):
+            self.stdout.write("{:>8} {:>10} {:>12.2f} {:>8} {:>12.2f} {:>8}".format(
+                tree_size, root_id, cold_time * 1000, cold_queries, warm_time * 1000, warm_queries
+            ))
+
+    @staticmethod
+    def _time_load(root_id, repeat):
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                load_tree.load(root_id)
+                timings.append(time.perf_counter() - start)
+        return min(timings), len(queries)
+
+    @staticmethod
+    def _get_training_ids(limit):
+        return list(
+            EducationGroupYear.objects.filter(
+                academic_year=academic_year.current_academic_year(),
+                education_group_type__category=education_group_categories.TRAINING,
+            ).order_by('acronym').values_list('pk', flat=True)[:limit]
+        )
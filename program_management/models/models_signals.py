@@ -0,0 +1,97 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from base.models.authorized_relationship import AuthorizedRelationship
+from base.models.education_group_year import EducationGroupYear
+from base.models.group_element_year import GroupElementYear
+from base.models.learning_container_year import LearningContainerYear
+from base.models.learning_unit_year import LearningUnitYear
+from base.models.prerequisite import Prerequisite
+from base.models.prerequisite_item import PrerequisiteItem
+from base.models.proposal_learning_unit import ProposalLearningUnit
+from program_management.ddd.repositories import cache_tree
+
+
+@receiver(post_save, sender=GroupElementYear)
+@receiver(post_delete, sender=GroupElementYear)
+def invalidate_program_trees_of_link(sender, instance, **kwargs):
+    if cache_tree.is_enabled() and instance.parent_id:
+        cache_tree.invalidate_elements(child_branch_ids=[instance.parent_id])
+
+
+@receiver(post_save, sender=EducationGroupYear)
+@receiver(post_delete, sender=EducationGroupYear)
+def invalidate_program_trees_of_education_group_year(sender, instance, **kwargs):
+    if cache_tree.is_enabled():
+        cache_tree.invalidate_elements(child_branch_ids=[instance.pk])
+
+
+@receiver(post_save, sender=LearningUnitYear)
+@receiver(post_delete, sender=LearningUnitYear)
+def invalidate_program_trees_of_learning_unit_year(sender, instance, **kwargs):
+    if cache_tree.is_enabled():
+        cache_tree.invalidate_elements(child_leaf_ids=[instance.pk])
+
+
+@receiver(post_save, sender=LearningContainerYear)
+def invalidate_program_trees_of_learning_container_year(sender, instance, **kwargs):
+    # The title of the learning unit years depends on the common title of their container
+    if cache_tree.is_enabled():
+        learning_unit_year_ids = list(instance.learningunityear_set.values_list('pk', flat=True))
+        if learning_unit_year_ids:
+            cache_tree.invalidate_elements(child_leaf_ids=learning_unit_year_ids)
+
+
+@receiver(post_save, sender=ProposalLearningUnit)
+@receiver(post_delete, sender=ProposalLearningUnit)
+def invalidate_program_trees_of_proposal(sender, instance, **kwargs):
+    if cache_tree.is_enabled():
+        cache_tree.invalidate_elements(child_leaf_ids=[instance.learning_unit_year_id])
+
+
+@receiver(post_save, sender=Prerequisite)
+@receiver(post_delete, sender=Prerequisite)
+def invalidate_program_tree_of_prerequisite(sender, instance, **kwargs):
+    if cache_tree.is_enabled():
+        cache_tree.invalidate([instance.education_group_year_id])
+
+
+@receiver(post_save, sender=PrerequisiteItem)
+@receiver(post_delete, sender=PrerequisiteItem)
+def invalidate_program_tree_of_prerequisite_item(sender, instance, **kwargs):
+    if cache_tree.is_enabled():
+        cache_tree.invalidate(
+            Prerequisite.objects.filter(pk=instance.prerequisite_id).values_list('education_group_year_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=AuthorizedRelationship)
+@receiver(post_delete, sender=AuthorizedRelationship)
+def invalidate_all_program_trees(sender, instance, **kwargs):
+    if cache_tree.is_enabled():
+        cache_tree.invalidate_all()
@@ -25,6 +25,7 @@
 ##############################################################################
 import datetime
 import json
+from unittest import mock
 
 from django.templatetags.static import static
 from django.test import TestCase
@@ -245,6 +246,61 @@ class TestBuildTree(TestCase):
             ) + "?group_to_parent={}".format(self.group_element_year_2_1.pk)
         )
 
+    def test_init_tree_with_depth(self):
+        node = EducationGroupHierarchy(self.parent, depth=1)
+
+        self.assertEqual(
+            [child.group_element_year for child in node.children],
+            [self.group_element_year_1, self.group_element_year_2]
+        )
+        self.assertEqual(node.children[0].children, [])
+        self.assertEqual(node.children[1].children, [])
+
+    def test_tree_to_json_with_depth(self):
+        json = EducationGroupHierarchy(self.parent, depth=1).to_json()
+
+        child_json = json['children'][0]
+        self.assertIs(child_json['children'], True)
+        self.assertEqual(
+            child_json['a_attr']['children_url'],
+            reverse('group_element_year_children', args=[
+                self.parent.pk, self.group_element_year_1.child_branch.pk, self.group_element_year_1.pk
+            ]) + "?path={}_{}".format(self.parent.pk, self.group_element_year_1.pk)
+        )
+        self.assertIsNone(json['a_attr']['children_url'])
+
+    def test_tree_to_json_ids_are_the_paths_of_the_nodes(self):
+        json = EducationGroupHierarchy(self.parent).to_json()
+
+        self.assertEqual(json['id'], str(self.parent.pk))
+        self.assertEqual(json['children'][1]['id'], "{}_{}".format(self.parent.pk, self.group_element_year_2.pk))
+        self.assertEqual(
+            json['children'][1]['children'][0]['id'],
+            "{}_{}_{}".format(self.parent.pk, self.group_element_year_2.pk, self.group_element_year_2_1.pk)
+        )
+
+    def test_tree_to_json_with_depth_of_node_without_children(self):
+        group_element_year = GroupElementYearFactory(
+            parent=self.parent,
+            child_branch=EducationGroupYearFactory(academic_year=self.academic_year)
+        )
+        json = EducationGroupHierarchy(self.parent, depth=1).to_json()
+
+        child_json = next(child for child in json['children']
+                          if child['a_attr']['group_element_year'] == group_element_year.pk)
+        self.assertEqual(child_json['children'], [])
+        self.assertIsNone(child_json['a_attr']['children_url'])
+
+    @mock.patch('base.business.education_groups.perms._is_year_editable', return_value=False)
+    def test_tree_to_json_evaluates_year_editable_once(self, mock_is_year_editable):
+        node = EducationGroupHierarchy(self.parent)
+
+        json = node.to_json()
+        self.assertEqual(mock_is_year_editable.call_count, 1)
+        self.assertTrue(json['a_attr']['attach_disabled'])
+        self.assertTrue(json['children'][1]['children'][0]['a_attr']['detach_disabled'])
+        self.assertIs(node.children[1].children[0].detach_perm.context, node.permission_context)
+
     def test_tree_get_url(self):
         test_cases = [
             {'name': 'with tab',
@@ -229,3 +229,82 @@ class TestGetAllNodes(SimpleTestCase):
             result,
             {link_with_root.parent, link_with_root.child, link_with_child.child}
         )
+
+
+class TestGetLinkChanges(SimpleTestCase):
+    def setUp(self):
+        self.link_with_root = LinkFactory(relative_credits=5)
+        self.link_with_child = LinkFactory(parent=self.link_with_root.child)
+        self.tree = ProgramTreeFactory(root_node=self.link_with_root.parent)
+        self.tree.set_persisted_links()
+
+    def test_when_nothing_changed(self):
+        changes = self.tree.get_link_changes()
+        self.assertEqual(changes, ([], [], []))
+
+    def test_when_link_added(self):
+        new_link = LinkFactory(parent=self.link_with_child.child)
+        changes = self.tree.get_link_changes()
+        self.assertListEqual(changes.added, [new_link])
+        self.assertListEqual(changes.changed, [])
+        self.assertListEqual(changes.removed, [])
+
+    def test_when_link_attribute_changed(self):
+        self.link_with_root.relative_credits = 10
+        changes = self.tree.get_link_changes()
+        self.assertListEqual(changes.added, [])
+        self.assertListEqual(changes.changed, [self.link_with_root])
+
+    def test_when_link_removed_should_not_remove_links_of_detached_node(self):
+        self.link_with_root.parent.children = []
+        changes = self.tree.get_link_changes()
+        self.assertListEqual(changes.removed, [(self.link_with_root.parent.pk, self.link_with_root.child.pk, False)])
+
+    def test_when_persisted_links_are_given(self):
+        self.tree.set_persisted_links({})
+        changes = self.tree.get_link_changes()
+        self.assertCountEqual(changes.added, [self.link_with_root, self.link_with_child])
+
+
+class TestNodeIndexProgramTree(SimpleTestCase, ValidatorPatcherMixin):
+    def setUp(self):
+        self.link_with_root = LinkFactory()
+        self.link_with_child = LinkFactory(parent=self.link_with_root.child)
+        self.tree = ProgramTreeFactory(root_node=self.link_with_root.parent)
+        self.path_child = "|".join([str(self.link_with_root.parent.pk), str(self.link_with_root.child.pk)])
+
+    def test_get_node_paths_when_node_used_in_multiple_paths(self):
+        another_link = LinkFactory(parent=self.link_with_root.parent)
+        LinkFactory(parent=another_link.child, child=self.link_with_root.child)
+        expected_paths = [
+            self.path_child,
+            "|".join([str(n.pk) for n in (self.link_with_root.parent, another_link.child, self.link_with_root.child)])
+        ]
+        self.assertCountEqual(self.tree.get_node_paths(self.link_with_root.child), expected_paths)
+
+    def test_attach_node_index_children_of_attached_node(self):
+        self.mock_validator(AttachNodeValidatorList, ['Success msg'], level=MessageLevel.SUCCESS)
+        self.tree.get_all_nodes()
+        link_to_attach = LinkFactory()
+
+        self.tree.attach_node(link_to_attach.parent, path=self.path_child)
+
+        path_attached = "|".join([self.path_child, str(link_to_attach.parent.pk)])
+        self.assertEqual(self.tree.get_node(path_attached), link_to_attach.parent)
+        self.assertEqual(
+            self.tree.get_node("|".join([path_attached, str(link_to_attach.child.pk)])),
+            link_to_attach.child
+        )
+        self.assertIn(link_to_attach.child, self.tree.get_all_nodes())
+
+    def test_detach_node_remove_node_and_its_children_from_index(self):
+        self.tree.detach_node(self.path_child)
+
+        self.assertSetEqual(self.tree.get_all_nodes(), {self.link_with_root.parent})
+        with self.assertRaises(node.NodeNotFoundException):
+            self.tree.get_node("|".join([self.path_child, str(self.link_with_child.child.pk)]))
+
+    def test_detach_node_keep_other_children(self):
+        another_link = LinkFactory(parent=self.link_with_root.parent)
+        self.tree.detach_node(self.path_child)
+        self.assertListEqual(self.tree.root_node.children, [another_link])
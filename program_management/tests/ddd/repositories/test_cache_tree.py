@@ -0,0 +1,117 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from base.models.learning_unit_year import LearningUnitYear
+from base.tests.factories.academic_year import AcademicYearFactory
+from base.tests.factories.group_element_year import GroupElementYearFactory
+from base.tests.factories.learning_unit_year import LearningUnitYearFactory
+from program_management.ddd.repositories import load_tree, cache_tree
+
+
+@override_settings(PROGRAM_TREE_CACHE_TIMEOUT=60)
+class TestCacheTree(TransactionTestCase):
+    def setUp(self):
+        self.academic_year = AcademicYearFactory(year=2020)
+        self.link_level_1 = GroupElementYearFactory(
+            parent__academic_year=self.academic_year,
+            child_branch__academic_year=self.academic_year
+        )
+        self.link_level_2 = GroupElementYearFactory(
+            parent=self.link_level_1.child_branch,
+            child_branch=None,
+            child_leaf=LearningUnitYearFactory(academic_year=self.academic_year)
+        )
+        self.root_id = self.link_level_1.parent.pk
+        cache.clear()
+
+    def test_second_load_is_read_from_cache(self):
+        load_tree.load(self.root_id)
+        self.assertDictEqual(cache_tree.get_statistics(), {'hits': 0, 'misses': 1})
+
+        tree = load_tree.load(self.root_id)
+        self.assertDictEqual(cache_tree.get_statistics(), {'hits': 1, 'misses': 1})
+        self.assertEqual(tree.root_node.children[0].child.children[0].child.pk, self.link_level_2.child_leaf.pk)
+
+    def test_cached_trees_are_independent_copies(self):
+        tree = load_tree.load(self.root_id)
+        tree.root_node.children = []
+        self.assertEqual(len(load_tree.load(self.root_id).root_node.children), 1)
+
+    def test_link_creation_invalidates_trees_using_the_parent(self):
+        load_tree.load(self.root_id)
+        GroupElementYearFactory(
+            parent=self.link_level_1.child_branch,
+            child_branch__academic_year=self.academic_year
+        )
+
+        tree = load_tree.load(self.root_id)
+        self.assertEqual(len(tree.root_node.children[0].child.children), 2)
+        self.assertEqual(cache_tree.get_statistics()['hits'], 0)
+
+    def test_learning_unit_year_update_invalidates_trees_using_it(self):
+        load_tree.load(self.root_id)
+        learning_unit_year = self.link_level_2.child_leaf
+        learning_unit_year.acronym = 'LDROI1001'
+        learning_unit_year.save()
+
+        tree = load_tree.load(self.root_id)
+        self.assertEqual(tree.root_node.children[0].child.children[0].child.acronym, 'LDROI1001')
+
+    def test_invalidation_bypasses_cached_tree(self):
+        load_tree.load(self.root_id)
+        # Update without signal, as the bulk operations of persist_tree
+        LearningUnitYear.objects.filter(pk=self.link_level_2.child_leaf.pk).update(acronym='LDROI1001')
+        self.assertNotEqual(self._get_leaf_acronym(), 'LDROI1001')
+
+        cache_tree.invalidate([self.root_id])
+
+        self.assertEqual(self._get_leaf_acronym(), 'LDROI1001')
+
+    def _get_leaf_acronym(self):
+        return load_tree.load(self.root_id).root_node.children[0].child.children[0].child.acronym
+
+    def test_tree_is_not_cached_when_invalidated_by_current_transaction(self):
+        with transaction.atomic():
+            GroupElementYearFactory(parent=self.link_level_1.child_branch)
+            load_tree.load(self.root_id)
+            load_tree.load(self.root_id)
+        self.assertEqual(cache_tree.get_statistics()['hits'], 0)
+
+    def test_update_of_another_tree_keeps_cache(self):
+        load_tree.load(self.root_id)
+        GroupElementYearFactory(parent__academic_year=self.academic_year)
+
+        load_tree.load(self.root_id)
+        self.assertEqual(cache_tree.get_statistics()['hits'], 1)
+
+    @override_settings(PROGRAM_TREE_CACHE_TIMEOUT=0)
+    def test_when_cache_is_disabled(self):
+        load_tree.load(self.root_id)
+        load_tree.load(self.root_id)
+        self.assertDictEqual(cache_tree.get_statistics(), {'hits': 0, 'misses': 0})
@@ -0,0 +1,84 @@
+##############################################################################
+#
+#    OSIS stands for Open Student Information System. It's an application
+#    designed to manage the core business of higher education institutions,
+#    such as universities, faculties, institutes and professional schools.
+#    The core business involves the administration of students, teachers,
+#    courses, programs and so on.
+#
+#    Copyright (C) 2015-2020 Université catholique de Louvain (http://www.uclouvain.be)
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    A copy of this license - GNU General Public License - is available
+#    at the root of the source code of this program.  If not,
+#    see http://www.gnu.org/licenses/.
+#
+##############################################################################
+from django.test import SimpleTestCase, TestCase
+
+from base.models.enums.proposal_type import ProposalType
+from base.tests.factories.group_element_year import GroupElementYearFactory
+from base.tests.factories.learning_unit_year import LearningUnitYearFactory
+from base.tests.factories.proposal_learning_unit import ProposalLearningUnitFactory
+from program_management.ddd.domain import node
+from program_management.ddd.repositories import load_node
+
+
+class TestLoadMultiple(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.link_branch = GroupElementYearFactory()
+        cls.link_leaf = GroupElementYearFactory(
+            parent=cls.link_branch.child_branch,
+            child_branch=None,
+            child_leaf=LearningUnitYearFactory(
+                learning_container_year__common_title="Common",
+                specific_title="Specific",
+            )
+        )
+        ProposalLearningUnitFactory(
+            learning_unit_year=cls.link_leaf.child_leaf,
+            type=ProposalType.MODIFICATION.name
+        )
+
+    def test_load_nodes_of_links(self):
+        nodes = {n.pk: n for n in load_node.load_multiple([self.link_branch.pk, self.link_leaf.pk])}
+
+        education_group_year = self.link_branch.child_branch
+        branch = nodes[education_group_year.pk]
+        self.assertIsInstance(branch, node.NodeEducationGroupYear)
+        self.assertEqual(branch.acronym, education_group_year.acronym)
+        self.assertEqual(branch.title, education_group_year.title)
+        self.assertEqual(branch.year, education_group_year.academic_year.year)
+        self.assertIsNone(branch.proposal_type)
+
+        learning_unit_year = self.link_leaf.child_leaf
+        leaf = nodes[learning_unit_year.pk]
+        self.assertIsInstance(leaf, node.NodeLearningUnitYear)
+        self.assertEqual(leaf.acronym, learning_unit_year.acronym)
+        self.assertEqual(leaf.title, "Common - Specific")
+        self.assertEqual(leaf.year, learning_unit_year.academic_year.year)
+        self.assertEqual(leaf.proposal_type, ProposalType.MODIFICATION.name)
+
+    def test_load_nothing(self):
+        self.assertEqual(load_node.load_multiple([]), [])
+
+    def test_node_not_found(self):
+        with self.assertRaises(node.NodeNotFoundException):
+            load_node.load_node_learning_unit_year(-1)
+
+
+class TestGetFullTitle(SimpleTestCase):
+    def test_full_title(self):
+        self.assertEqual(load_node._get_full_title("Common", "Specific"), "Common - Specific")
+        self.assertEqual(load_node._get_full_title("", "Specific"), "Specific")
+        self.assertEqual(load_node._get_full_title("Common", None), "Common")
@@ -137,6 +137,31 @@ class TestLoadTree(TestCase):
                 self.assertTrue(leaf.has_proposal)
                 self.assertEquals(leaf.proposal_type, p_type)
 
+    def test_case_node_used_in_multiple_paths_is_shared(self):
+        link_level_1_bis = GroupElementYearFactory(parent=self.root_node.education_group_year)
+        GroupElementYearFactory(parent=link_level_1_bis.child_branch, child_branch=self.link_level_1.child_branch)
+
+        education_group_program_tree = load_tree.load(self.root_node.education_group_year.pk)
+        path_1 = "|".join([str(self.root_node.education_group_year.pk), str(self.link_level_1.child_branch.pk)])
+        path_2 = "|".join([
+            str(self.root_node.education_group_year.pk),
+            str(link_level_1_bis.child_branch.pk),
+            str(self.link_level_1.child_branch.pk)
+        ])
+        node_path_1 = education_group_program_tree.get_node(path_1)
+        self.assertIs(node_path_1, education_group_program_tree.get_node(path_2))
+        self.assertEqual(len(node_path_1.children), 1)
+        self.assertEqual(node_path_1.children[0].child.pk, self.link_level_2.child_leaf.pk)
+
+    def test_case_children_keep_order(self):
+        link_level_1_bis = GroupElementYearFactory(parent=self.root_node.education_group_year)
+
+        education_group_program_tree = load_tree.load(self.root_node.education_group_year.pk)
+        self.assertListEqual(
+            [link.child.pk for link in education_group_program_tree.root_node.children],
+            [self.link_level_1.child_branch.pk, link_level_1_bis.child_branch.pk]
+        )
+
     def test_case_load_tree_leaf_node_have_no_proposal(self):
         education_group_program_tree = load_tree.load(self.root_node.education_group_year.pk)
         leaf = education_group_program_tree.root_node.children[0].child.children[0].child
@@ -144,6 +169,51 @@ class TestLoadTree(TestCase):
         self.assertIsNone(leaf.proposal_type)
 
 
+class TestLoadMany(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.academic_year = AcademicYearFactory(year=2020)
+        cls.common_link = GroupElementYearFactory(
+            parent__academic_year=cls.academic_year,
+            child_branch=None,
+            child_leaf=LearningUnitYearFactory(academic_year=cls.academic_year)
+        )
+        cls.root_link_1 = GroupElementYearFactory(
+            parent__academic_year=cls.academic_year,
+            child_branch=cls.common_link.parent
+        )
+        cls.root_link_2 = GroupElementYearFactory(
+            parent__academic_year=cls.academic_year,
+            child_branch=cls.common_link.parent
+        )
+
+    def test_when_root_ids_is_empty(self):
+        self.assertListEqual(load_tree.load_many([]), [])
+
+    def test_when_one_root_not_exist(self):
+        with self.assertRaises(node.NodeNotFoundException):
+            load_tree.load_many([self.root_link_1.parent.pk, -1])
+
+    def test_return_trees_in_same_order_as_root_ids(self):
+        root_ids = [self.root_link_2.parent.pk, self.root_link_1.parent.pk]
+        result = load_tree.load_many(root_ids)
+        self.assertListEqual([tree.root_node.pk for tree in result], root_ids)
+        self.assertListEqual(result, [load_tree.load(root_id) for root_id in root_ids])
+
+    def test_prerequisites_are_loaded_by_tree(self):
+        PrerequisiteFactory(
+            education_group_year=self.root_link_1.parent,
+            learning_unit_year=self.common_link.child_leaf,
+            items__groups=((LearningUnitYearFactory(acronym='LDROI1200', academic_year=self.academic_year),),)
+        )
+        tree_1, tree_2 = load_tree.load_many([self.root_link_1.parent.pk, self.root_link_2.parent.pk])
+        leaf_tree_1 = tree_1.root_node.children[0].child.children[0].child
+        leaf_tree_2 = tree_2.root_node.children[0].child.children[0].child
+
+        self.assertEqual(str(leaf_tree_1.prerequisite), 'LDROI1200')
+        self.assertFalse(leaf_tree_2.has_prerequisite)
+
+
 class TestLoadTreesFromChildren(TestCase):
 
     @classmethod
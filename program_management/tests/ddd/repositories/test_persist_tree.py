@@ -23,11 +23,15 @@
 #    see http://www.gnu.org/licenses/.
 #
 ##############################################################################
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 
+from base.models.enums.education_group_types import GroupType, MiniTrainingType
+from base.models.enums.link_type import LinkTypes
 from base.models.group_element_year import GroupElementYear
 from base.tests.factories.academic_year import AcademicYearFactory
-from base.tests.factories.education_group_year import TrainingFactory, GroupFactory
+from base.tests.factories.education_group_year import TrainingFactory, GroupFactory, MiniTrainingFactory
+from base.tests.factories.group_element_year import GroupElementYearFactory
 from base.tests.factories.learning_unit_year import LearningUnitYearFactory
 from program_management.ddd.domain.node import NodeEducationGroupYear, NodeLearningUnitYear
 from program_management.ddd.repositories import persist_tree
@@ -36,16 +40,16 @@ from program_management.tests.ddd.factories.program_tree import ProgramTreeFacto
 
 class TestSaveTree(TestCase):
     def setUp(self):
-        academic_year = AcademicYearFactory(current=True)
-        training = TrainingFactory(academic_year=academic_year)
-        common_core = GroupFactory(academic_year=academic_year)
-        learning_unit_year = LearningUnitYearFactory(academic_year=academic_year)
+        self.academic_year = AcademicYearFactory(current=True)
+        self.training = TrainingFactory(academic_year=self.academic_year)
+        common_core = GroupFactory(academic_year=self.academic_year)
+        learning_unit_year = LearningUnitYearFactory(academic_year=self.academic_year)
 
         self.root_node = NodeEducationGroupYear(
-            node_id=training.pk,
-            acronym=training.acronym,
-            title=training.title,
-            year=training.academic_year.year
+            node_id=self.training.pk,
+            acronym=self.training.acronym,
+            title=self.training.title,
+            year=self.training.academic_year.year
         )
         self.common_core_node = NodeEducationGroupYear(
             node_id=common_core.pk,
@@ -92,3 +96,76 @@ class TestSaveTree(TestCase):
         tree.detach_node(path_to_detach)
         persist_tree.persist(tree)
         self.assertEquals(GroupElementYear.objects.all().count(), 0)
+
+    def test_case_tree_persist_after_link_update(self):
+        self.root_node.add_child(self.common_core_node, relative_credits=5)
+        tree = ProgramTreeFactory(root_node=self.root_node)
+        persist_tree.persist(tree)
+
+        tree.root_node.children[0].relative_credits = 10
+        persist_tree.persist(tree)
+        self.assertEqual(GroupElementYear.objects.get().relative_credits, 10)
+
+    def test_case_tree_persist_after_detach_learning_unit_with_the_id_of_a_group(self):
+        same_id = 10 ** 7
+        group = GroupFactory(id=same_id, academic_year=self.academic_year)
+        learning_unit_year = LearningUnitYearFactory(id=same_id, academic_year=self.academic_year)
+        self.common_core_node.add_child(NodeEducationGroupYear(node_id=group.pk))
+        self.common_core_node.add_child(NodeLearningUnitYear(node_id=learning_unit_year.pk))
+        self.root_node.add_child(self.common_core_node)
+        tree = ProgramTreeFactory(root_node=self.root_node)
+        persist_tree.persist(tree)
+
+        self.common_core_node.children.pop()
+        persist_tree.persist(tree)
+        self.assertTrue(GroupElementYear.objects.filter(child_branch=group).exists())
+        self.assertFalse(GroupElementYear.objects.filter(child_leaf=learning_unit_year).exists())
+
+    def test_case_tree_persist_keep_children_order(self):
+        another_common_core = GroupFactory(academic_year=self.academic_year)
+        self.root_node.add_child(self.common_core_node)
+        self.root_node.add_child(NodeEducationGroupYear(node_id=another_common_core.pk))
+        tree = ProgramTreeFactory(root_node=self.root_node)
+
+        persist_tree.persist(tree)
+        self.assertListEqual(
+            list(GroupElementYear.objects.order_by('order').values_list('child_branch_id', flat=True)),
+            [self.common_core_node.pk, another_common_core.pk]
+        )
+
+    def test_case_tree_persist_does_not_delete_links_unknown_from_the_tree(self):
+        self.root_node.add_child(self.common_core_node)
+        tree = ProgramTreeFactory(root_node=self.root_node)
+        persist_tree.persist(tree)
+
+        GroupElementYearFactory(parent=self.training, child_branch__academic_year=self.academic_year)
+        self.root_node.children[0].block = 1
+        persist_tree.persist(tree)
+        self.assertEqual(GroupElementYear.objects.all().count(), 2)
+
+    def test_case_tree_persist_minor_in_minor_list_choice_as_reference(self):
+        minor_list_choice = GroupFactory(
+            academic_year=self.academic_year,
+            education_group_type__name=GroupType.MINOR_LIST_CHOICE.name
+        )
+        minor = MiniTrainingFactory(
+            academic_year=self.academic_year,
+            education_group_type__name=MiniTrainingType.OPEN_MINOR.name
+        )
+        minor_list_choice_node = NodeEducationGroupYear(node_id=minor_list_choice.pk)
+        minor_list_choice_node.add_child(NodeEducationGroupYear(node_id=minor.pk))
+        self.root_node.add_child(minor_list_choice_node)
+        tree = ProgramTreeFactory(root_node=self.root_node)
+
+        persist_tree.persist(tree)
+        self.assertEqual(GroupElementYear.objects.get(child_branch=minor).link_type, LinkTypes.REFERENCE.name)
+        self.assertEqual(minor_list_choice_node.children[0].link_type, LinkTypes.REFERENCE.name)
+
+    def test_case_tree_persist_child_of_another_academic_year(self):
+        group_of_another_year = GroupFactory(academic_year__year=self.academic_year.year + 1)
+        self.root_node.add_child(NodeEducationGroupYear(node_id=group_of_another_year.pk))
+        tree = ProgramTreeFactory(root_node=self.root_node)
+
+        with self.assertRaises(ValidationError):
+            persist_tree.persist(tree)
+        self.assertFalse(GroupElementYear.objects.exists())
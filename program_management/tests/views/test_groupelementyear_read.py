@@ -28,7 +28,9 @@ import random
 from django.conf import settings
 from django.db.models import F, When, Case
 from django.http import HttpResponse
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from waffle.testutils import override_flag, override_switch
@@ -208,3 +210,74 @@ class TestReadTree(TestCase):
                                        self.groupe_element_yr_2,
                                        [self.groupe_element_yr_3, self.groupe_element_yr_4]]
                               )
+
+
+class TestGroupElementYearChildren(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        academic_year = AcademicYearFactory()
+        cls.root = EducationGroupYearFactory(academic_year=academic_year)
+        cls.group_element_year = GroupElementYearFactory(parent=cls.root, child_branch__academic_year=academic_year)
+        cls.child_group_element_year = GroupElementYearFactory(
+            parent=cls.group_element_year.child_branch,
+            child_branch__academic_year=academic_year
+        )
+        cls.person = CentralManagerFactory("can_access_education_group")
+        cls.url = reverse(
+            "group_element_year_children",
+            args=[cls.root.id, cls.group_element_year.child_branch.id, cls.group_element_year.id]
+        )
+
+    def setUp(self):
+        self.client.force_login(self.person.user)
+
+    def test_permission_denied_when_no_permission(self):
+        self.client.force_login(PersonFactory().user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_not_found_when_link_is_not_of_the_element(self):
+        url = reverse("group_element_year_children", args=[self.root.id, self.root.id, self.group_element_year.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_return_children_only(self):
+        response = self.client.get(self.url)
+
+        children = response.json()
+        self.assertEqual(len(children), 1)
+        self.assertEqual(children[0]['a_attr']['group_element_year'], self.child_group_element_year.id)
+        self.assertEqual(children[0]['a_attr']['root'], self.root.id)
+        self.assertEqual(children[0]['children'], [])
+
+    def test_children_ids_are_the_same_as_in_the_whole_tree(self):
+        tree_json = EducationGroupHierarchy(self.root).to_json()
+        child_json = tree_json['children'][0]
+        response = self.client.get(self.url, data={'path': child_json['id']})
+
+        self.assertEqual(response.json()[0]['id'], child_json['children'][0]['id'])
+
+    def test_children_ids_ignore_invalid_path(self):
+        response = self.client.get(self.url, data={'path': '<script>'})
+
+        self.assertEqual(
+            response.json()[0]['id'],
+            "{}_{}_{}".format(self.root.id, self.group_element_year.id, self.child_group_element_year.id)
+        )
+
+    def test_number_of_queries_does_not_depend_on_the_size_of_the_subtree(self):
+        child_branch = self.child_group_element_year.child_branch
+        GroupElementYearFactory(parent=child_branch, child_branch__academic_year=child_branch.academic_year)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+
+        for group_element_year in GroupElementYearFactory.create_batch(
+                5, parent=child_branch, child_branch__academic_year=child_branch.academic_year
+        ):
+            GroupElementYearFactory.create_batch(
+                3,
+                parent=group_element_year.child_branch,
+                child_branch__academic_year=child_branch.academic_year
+            )
+        with self.assertNumQueries(len(queries)):
+            self.client.get(self.url)
@@ -47,7 +47,9 @@ urlpatterns = [
                 url(r'^move/$', groupelementyear_create.MoveGroupElementYearView.as_view(),
                     name='group_element_year_move'),
                 url(r'^update/$', groupelementyear_update.UpdateGroupElementYearView.as_view(),
-                    name="group_element_year_update")
+                    name="group_element_year_update"),
+                url(r'^children/$', groupelementyear_read.group_element_year_children,
+                    name="group_element_year_children"),
             ]))
         ])),
         url(r'^group_content/', groupelementyear_read.ReadEducationGroupTypeView.as_view(), name="group_content"),
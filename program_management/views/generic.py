@@ -48,6 +48,9 @@ NO_PREREQUISITES = TrainingType.finality_types() + [
     MiniTrainingType.MOBILITY_PARTNERSHIP.name,
 ] + GroupType.get_names()
 
+# Levels of the tree sent with the page, the deeper levels are loaded when the nodes are opened
+TREE_INITIAL_DEPTH = 1
+
 
 @method_decorator(login_required, name='dispatch')
 class GenericGroupElementYearMixin(FlagMixin, RulesRequiredMixin, SuccessMessageMixin, AjaxTemplateMixin):
@@ -109,7 +112,7 @@ class LearningUnitGenericUpdateView(RulesRequiredMixin, SuccessMessageMixin, Upd
         context['root'] = root
         context['root_id'] = self.kwargs.get("root_id")
         context['parent'] = root
-        context['tree'] = json.dumps(self.education_group_year_hierarchy.to_json())
+        context['tree'] = json.dumps(EducationGroupHierarchy(root, depth=TREE_INITIAL_DEPTH).to_json())
 
         context['group_to_parent'] = self.request.GET.get("group_to_parent") or '0'
         return context
@@ -130,17 +133,24 @@ class LearningUnitGenericDetailView(PermissionRequiredMixin, DetailView, Catalog
     def get_root(self):
         return get_object_or_404(EducationGroupYear, pk=self.kwargs.get("root_id"))
 
+    @cached_property
+    def hierarchy(self):
+        return EducationGroupHierarchy(self.get_root(), tab_to_show=self.request.GET.get("tab_to_show"))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         root = self.get_root()
-        self.hierarchy = EducationGroupHierarchy(root, tab_to_show=self.request.GET.get("tab_to_show"))
         # TODO remove parent in context
         context['person'] = self.get_person()
         context['root'] = root
         context['root_id'] = root.pk
         context['parent'] = root
-        context['tree'] = json.dumps(self.hierarchy.to_json())
+        context['tree'] = json.dumps(EducationGroupHierarchy(
+            root,
+            tab_to_show=self.request.GET.get("tab_to_show"),
+            depth=TREE_INITIAL_DEPTH
+        ).to_json())
         context['group_to_parent'] = self.request.GET.get("group_to_parent") or '0'
         context['show_prerequisites'] = self.show_prerequisites(root)
         context['selected_element_clipboard'] = self.get_selected_element_for_clipboard()
@@ -22,8 +22,10 @@
 #  see http://www.gnu.org/licenses/.                                                               #
 # ##################################################################################################
 import datetime
+import re
 
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, permission_required
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils import translation
@@ -32,15 +34,19 @@ from waffle.decorators import waffle_switch
 
 from base.forms.education_group.common import SelectLanguage
 from base.models.education_group_year import EducationGroupYear
+from base.models.group_element_year import GroupElementYear
 from base.views.mixins import FlagMixin, AjaxTemplateMixin
 from osis_common.document.pdf_build import render_pdf
-from program_management.business.group_element_years.group_element_year_tree import EducationGroupHierarchy
+from program_management.business.group_element_years.group_element_year_tree import EducationGroupHierarchy, \
+    NODE_PATH_SEPARATOR
 
 CURRENT_SIZE_FOR_ANNUAL_COLUMN = 15
 MAIN_PART_INIT_SIZE = 650
 PADDING = 10
 USUAL_NUMBER_OF_BLOCKS = 3
 
+NODE_PATH_REGEX = re.compile(r'^\d+({}\d+)+$'.format(re.escape(NODE_PATH_SEPARATOR)))
+
 
 @login_required
 @waffle_switch('education_group_year_generate_pdf')
@@ -64,6 +70,34 @@ def pdf_content(request, root_id, education_group_year_id, language):
         )
 
 
+@login_required
+@permission_required('base.can_access_education_group', raise_exception=True)
+def group_element_year_children(request, root_id, education_group_year_id, group_element_year_id):
+    """ Return the jstree json of the children of a node of the tree (loaded when the node is opened) """
+    root = get_object_or_404(EducationGroupYear, pk=root_id)
+    group_element_year = get_object_or_404(
+        GroupElementYear.objects.select_related('child_branch'),
+        pk=group_element_year_id,
+        child_branch_id=education_group_year_id
+    )
+    node = EducationGroupHierarchy(
+        root,
+        group_element_year,
+        tab_to_show=request.GET.get("tab_to_show"),
+        depth=1,
+        path=_get_node_path(request, group_element_year)
+    )
+    return JsonResponse([child.to_json() for child in node.children], safe=False)
+
+
+def _get_node_path(request, group_element_year):
+    # The path of the opened node, given by its children_url, is the prefix of the ids of its children
+    path = request.GET.get("path", "")
+    if NODE_PATH_REGEX.match(path) and path.endswith(NODE_PATH_SEPARATOR + str(group_element_year.pk)):
+        return path
+    return None
+
+
 class ReadEducationGroupTypeView(FlagMixin, AjaxTemplateMixin, FormView):
     flag = "pdf_content"
     template_name = "group_element_year/pdf_content.html"